@@ -0,0 +1,36 @@
+"""add notification_stream_tickets table
+
+Revision ID: 13b602d572ae
+Revises: fb5b35ecf5d7
+Create Date: 2026-10-16 22:14:05.318202
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '13b602d572ae'
+down_revision: Union[str, Sequence[str], None] = 'fb5b35ecf5d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('notification_stream_tickets',
+    sa.Column('ticket_hash', sa.String(length=64), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ticket_hash')
+    )
+    op.create_index(op.f('ix_notification_stream_tickets_expires_at'), 'notification_stream_tickets', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_notification_stream_tickets_expires_at'), table_name='notification_stream_tickets')
+    op.drop_table('notification_stream_tickets')
@@ -0,0 +1,42 @@
+"""add notification_counters table
+
+Revision ID: 228400eea173
+Revises: 858fbcf53fce
+Create Date: 2026-10-16 11:04:27.730615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '228400eea173'
+down_revision: Union[str, Sequence[str], None] = '858fbcf53fce'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('notification_counters',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('unread_count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Backfill from the existing notifications
+    op.execute("""
+        INSERT INTO notification_counters (user_id, unread_count)
+        SELECT recipient_id, count(*)
+        FROM partner_notifications
+        WHERE status = 'unread'
+        GROUP BY recipient_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('notification_counters')
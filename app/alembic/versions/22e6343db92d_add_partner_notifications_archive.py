@@ -0,0 +1,56 @@
+"""add partner_notifications_archive table
+
+Revision ID: 22e6343db92d
+Revises: 228400eea173
+Create Date: 2026-10-16 14:21:09.114382
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '22e6343db92d'
+down_revision: Union[str, Sequence[str], None] = '228400eea173'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Reuse the enum types of partner_notifications
+    notification_type = postgresql.ENUM(name='notificationtype', create_type=False)
+    notification_state = postgresql.ENUM(name='notificationstate', create_type=False)
+
+    op.create_table('partner_notifications_archive',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('recipient_id', sa.UUID(), nullable=False),
+    sa.Column('actor_id', sa.UUID(), nullable=True),
+    sa.Column('type', notification_type, nullable=False),
+    sa.Column('goal_id', sa.UUID(), nullable=True),
+    sa.Column('proof_id', sa.UUID(), nullable=True),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('status', notification_state, nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_partner_notifications_archive_recipient_created', 'partner_notifications_archive',
+                    ['recipient_id', 'created_at'])
+
+    # Lets the retention job find expired rows without scanning the table
+    with op.get_context().autocommit_block():
+        op.create_index('ix_partner_notifications_status_created', 'partner_notifications',
+                        ['status', 'created_at'], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_partner_notifications_status_created', table_name='partner_notifications',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_index('ix_partner_notifications_archive_recipient_created', table_name='partner_notifications_archive')
+    op.drop_table('partner_notifications_archive')
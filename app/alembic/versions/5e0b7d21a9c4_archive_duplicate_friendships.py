@@ -0,0 +1,71 @@
+"""archive duplicate friendships
+
+Revision ID: 5e0b7d21a9c4
+Revises: 2df9fcb63cd3
+Create Date: 2026-10-16 09:05:12.804417
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0b7d21a9c4'
+down_revision: Union[str, Sequence[str], None] = '2df9fcb63cd3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Reuse the enum type of friends
+    friend_status = postgresql.ENUM(name='friendstatus', create_type=False)
+
+    op.create_table('friends_duplicates_archive',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('kept_id', sa.UUID(), nullable=False),
+    sa.Column('requester_id', sa.UUID(), nullable=False),
+    sa.Column('addressee_id', sa.UUID(), nullable=False),
+    sa.Column('status', friend_status, nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # Move duplicate friendships (A->B and B->A, or repeated requests) out of
+    # friends so the next revision can make the unordered pair unique. The
+    # accepted row of a pair is kept first, then the oldest.
+    moved = op.get_bind().execute(sa.text("""
+        WITH ranked AS (
+            SELECT id, first_value(id) OVER pair AS kept_id, row_number() OVER pair AS rn
+            FROM friends
+            WINDOW pair AS (
+                PARTITION BY LEAST(requester_id, addressee_id), GREATEST(requester_id, addressee_id)
+                ORDER BY (status = 'accepted') DESC, created_at ASC, id ASC
+            )
+        ), moved AS (
+            DELETE FROM friends f
+            USING ranked r
+            WHERE f.id = r.id AND r.rn > 1
+            RETURNING f.id, r.kept_id, f.requester_id, f.addressee_id, f.status, f.created_at
+        )
+        INSERT INTO friends_duplicates_archive (id, kept_id, requester_id, addressee_id, status, created_at)
+        SELECT id, kept_id, requester_id, addressee_id, status, created_at FROM moved
+    """)).rowcount
+    if moved:
+        logger.warning(f"Moved {moved} duplicate friendships to friends_duplicates_archive")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        INSERT INTO friends (id, requester_id, addressee_id, status, created_at)
+        SELECT id, requester_id, addressee_id, status, created_at FROM friends_duplicates_archive
+    """)
+    op.drop_table('friends_duplicates_archive')
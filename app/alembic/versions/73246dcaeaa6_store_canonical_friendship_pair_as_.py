@@ -0,0 +1,42 @@
+"""store canonical friendship pair as generated columns
+
+Revision ID: 73246dcaeaa6
+Revises: b8bc383f712f
+Create Date: 2026-10-16 20:04:31.253497
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '73246dcaeaa6'
+down_revision: Union[str, Sequence[str], None] = 'b8bc383f712f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Generated columns are computed for existing rows while the table is
+    # rewritten, so no separate backfill is needed. The expression index of
+    # the same name already guarantees the pairs are unique.
+    op.add_column('friends', sa.Column('user_low_id', sa.UUID(),
+                  sa.Computed('LEAST(requester_id, addressee_id)', persisted=True), nullable=True))
+    op.add_column('friends', sa.Column('user_high_id', sa.UUID(),
+                  sa.Computed('GREATEST(requester_id, addressee_id)', persisted=True), nullable=True))
+    op.execute("DROP INDEX IF EXISTS uq_friends_pair")
+    op.create_unique_constraint('uq_friends_pair', 'friends', ['user_low_id', 'user_high_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_friends_pair', 'friends', type_='unique')
+    op.drop_column('friends', 'user_high_id')
+    op.drop_column('friends', 'user_low_id')
+    op.execute(
+        "CREATE UNIQUE INDEX uq_friends_pair "
+        "ON friends (LEAST(requester_id, addressee_id), GREATEST(requester_id, addressee_id))"
+    )
@@ -0,0 +1,64 @@
+"""add secondary indexes for hot query paths
+
+Revision ID: 858fbcf53fce
+Revises: 5e0b7d21a9c4
+Create Date: 2026-10-16 09:12:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '858fbcf53fce'
+down_revision: Union[str, Sequence[str], None] = '5e0b7d21a9c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, extra kwargs) - kept in sync with __table_args__ in app/db/models.py
+INDEXES = [
+    ('ix_proofs_user_uploaded', 'proofs', ['user_id', 'uploaded_at', 'id'], {}),
+    ('ix_proofs_goal_status', 'proofs', ['goal_id', 'status'], {}),
+    ('ix_proofs_pending_expires', 'proofs', ['verification_expires_at'],
+     {'postgresql_where': sa.text("status = 'pending'")}),
+    ('ix_proof_verifications_proof_verifier', 'proof_verifications', ['proof_id', 'verifier_id'], {}),
+    ('ix_proof_verifications_verifier_created', 'proof_verifications', ['verifier_id', 'created_at'], {}),
+    ('ix_friends_requester_status', 'friends', ['requester_id', 'status'], {}),
+    ('ix_friends_addressee_status', 'friends', ['addressee_id', 'status'], {}),
+    ('ix_partner_notifications_recipient_created', 'partner_notifications',
+     ['recipient_id', 'created_at', 'id'], {}),
+    ('ix_partner_notifications_recipient_status_created', 'partner_notifications',
+     ['recipient_id', 'status', 'created_at'], {}),
+    ('ix_milestones_goal_due', 'milestones', ['goal_id', 'due_date'], {}),
+    ('ix_daily_tasks_user_created', 'daily_tasks', ['user_id', 'created_at'], {}),
+    ('ix_goals_user_status', 'goals', ['user_id', 'status'], {}),
+    ('ix_goal_allowed_viewers_user', 'goal_allowed_viewers', ['user_id'], {}),
+    ('ix_interval_change_requests_goal_status', 'interval_change_requests', ['goal_id', 'status'], {}),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build indexes without blocking writes on large tables
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True,
+                            if_not_exists=True, **kwargs)
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_friends_pair "
+            "ON friends (LEAST(requester_id, addressee_id), GREATEST(requester_id, addressee_id))"
+        )
+
+    # Planner statistics for the uq_friends_pair expressions
+    op.execute("ANALYZE friends")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS uq_friends_pair")
+        for name, table, columns, kwargs in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,35 @@
+"""add partial index for the overdue milestone sweep
+
+Revision ID: b8bc383f712f
+Revises: cc995352b185
+Create Date: 2026-10-16 19:53:58.399171
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8bc383f712f'
+down_revision: Union[str, Sequence[str], None] = 'cc995352b185'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Lets the milestone expiry job find open overdue milestones without
+    # scanning the table
+    with op.get_context().autocommit_block():
+        op.create_index('ix_milestones_open_due', 'milestones', ['due_date'],
+                        postgresql_where=sa.text('completed = false'),
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_milestones_open_due', table_name='milestones',
+                      postgresql_concurrently=True, if_exists=True)
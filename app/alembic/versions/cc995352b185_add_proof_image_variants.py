@@ -0,0 +1,30 @@
+"""add thumbnail and medium image urls to proofs
+
+Revision ID: cc995352b185
+Revises: 22e6343db92d
+Create Date: 2026-10-16 16:02:51.447120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cc995352b185'
+down_revision: Union[str, Sequence[str], None] = '22e6343db92d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('proofs', sa.Column('thumbnail_url', sa.String(), nullable=True))
+    op.add_column('proofs', sa.Column('medium_url', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('proofs', 'medium_url')
+    op.drop_column('proofs', 'thumbnail_url')
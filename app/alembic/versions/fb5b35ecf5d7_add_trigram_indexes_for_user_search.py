@@ -0,0 +1,44 @@
+"""add trigram indexes for user search
+
+Revision ID: fb5b35ecf5d7
+Revises: 73246dcaeaa6
+Create Date: 2026-10-16 20:31:12.804417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fb5b35ecf5d7'
+down_revision: Union[str, Sequence[str], None] = '73246dcaeaa6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, column) - kept in sync with User.__table_args__ in app/db/models.py
+TRIGRAM_INDEXES = [
+    ('ix_users_email_trgm', 'email'),
+    ('ix_users_username_trgm', 'username'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # GIN trigram indexes let /users/search's ILIKE '%term%' skip the
+    # sequential scan of users
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        for name, column in TRIGRAM_INDEXES:
+            op.create_index(name, 'users', [column], postgresql_using='gin',
+                            postgresql_ops={column: 'gin_trgm_ops'},
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The pg_trgm extension is left installed; other objects may use it
+    with op.get_context().autocommit_block():
+        for name, _ in TRIGRAM_INDEXES:
+            op.drop_index(name, table_name='users', postgresql_concurrently=True, if_exists=True)
@@ -1,22 +1,19 @@
 from datetime import datetime, timedelta
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from jose import jwt
-from passlib.context import CryptContext
 
 from app.db import models
 from app.api import deps
 from app.schemas import user as schemas
 from app.core.config import settings
+from app.core.security import hash_password, verify_and_update_password
 
 router = APIRouter()
 
-# Migrated from bcrypt to Argon2 - no more 72-byte limit!
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
 def create_access_token(subject: str, expires_delta: timedelta = None) -> str:
@@ -30,16 +27,6 @@ def create_access_token(subject: str, expires_delta: timedelta = None) -> str:
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    # Argon2 has no password length limits - much better than bcrypt!
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    # Argon2 handles passwords of any length securely
-    return pwd_context.hash(password)
-
-
 async def get_user(db: AsyncSession, email: str):
     result = await db.execute(select(models.User).where(models.User.email == email))
     return result.scalars().first()
@@ -49,8 +36,16 @@ async def authenticate_user(db: AsyncSession, email: str, password: str):
     user = await get_user(db, email)
     if not user:
         return False
-    if not verify_password(password, user.password_hash):
+    # End the read transaction so the DB connection goes back to the pool
+    # while the hash is computed
+    await db.commit()
+    valid, new_hash = await verify_and_update_password(password, user.password_hash)
+    if not valid:
         return False
+    if new_hash:
+        # Argon2 parameters changed since this hash was made
+        user.password_hash = new_hash
+        await db.commit()
     return user
 
 
@@ -72,8 +67,9 @@ async def register(user_in: schemas.UserCreate, db: AsyncSession = Depends(deps.
             detail="Username already taken"
         )
     
-    # Create user with Argon2 hashing
-    hashed_password = get_password_hash(user_in.password)
+    # Create user with Argon2 hashing (no DB connection held meanwhile)
+    await db.commit()
+    hashed_password = await hash_password(user_in.password)
     db_user = models.User(
         email=user_in.email,
         username=user_in.username,
@@ -119,24 +115,6 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
 
 @router.get("/me", response_model=schemas.UserOut)
 async def get_current_user_info(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(deps.get_db)
+    current_user: models.User = Depends(deps.get_current_user)
 ):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except jwt.JWTError:
-        raise credentials_exception
-    
-    result = await db.execute(select(models.User).where(models.User.id == user_id))
-    user = result.scalars().first()
-    if user is None:
-        raise credentials_exception
-    return user
+    return current_user
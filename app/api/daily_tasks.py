@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, cast, Date
 from typing import List
-from datetime import date
+from datetime import date, timedelta
 
 from app.db import models
 from app.api import deps
@@ -13,9 +13,13 @@ router = APIRouter()
 
 
 async def get_todays_tasks(db: AsyncSession, user_id: str):
+    # Range on created_at (same day boundaries as date(created_at)) so the
+    # (user_id, created_at) index can be used
+    today = date.today()
     stmt = select(models.DailyTask).where(
         models.DailyTask.user_id == user_id,
-        func.date(models.DailyTask.created_at) == date.today()
+        models.DailyTask.created_at >= cast(today, Date),
+        models.DailyTask.created_at < cast(today + timedelta(days=1), Date)
     )
     result = await db.execute(stmt)
     return result.scalars().all()
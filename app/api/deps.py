@@ -4,9 +4,11 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
 from sqlalchemy import select
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, read_session_factory
 from app.core.config import settings
 from app.db import models
+from app.services.auth_cache import auth_cache
+from app.services.user_loader import UserLoader
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
@@ -14,9 +16,43 @@ async def get_db() -> AsyncGenerator:
     async with SessionLocal() as session:
         yield session
 
+async def get_read_db(db: AsyncSession = Depends(get_db)) -> AsyncGenerator:
+    """
+    Session for read-only endpoints that opt in: a READ ONLY replica session
+    when a replica is configured and caught up, where results may trail the
+    primary by up to READ_REPLICA_MAX_LAG_SECONDS. Otherwise the request's
+    own get_db session, so the request holds one primary connection, never
+    one for get_current_user plus one for its reads.
+    """
+    session_factory = await read_session_factory()
+    if session_factory is None:
+        yield db
+        return
+    async with session_factory() as session:
+        yield session
+
+async def get_user_loader(db: AsyncSession = Depends(get_db)) -> UserLoader:
+    """
+    The request's UserLoader. FastAPI caches dependencies per request, so
+    every Depends(get_user_loader) in one request shares its lookups.
+    """
+    return UserLoader(db)
+
+async def get_read_user_loader(db: AsyncSession = Depends(get_read_db)) -> UserLoader:
+    """get_user_loader for endpoints that read through get_read_db."""
+    return UserLoader(db)
+
 async def get_current_user(
     db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)
 ) -> models.User:
+    return await get_user_from_token(db, token)
+
+async def get_user_from_token(db: AsyncSession, token: str) -> models.User:
+    # Fresh cached snapshot: no JWT decode and no users query
+    cached_user = auth_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -34,4 +70,5 @@ async def get_current_user(
     user = result.scalars().first()
     if user is None:
         raise credentials_exception
+    auth_cache.put(token, user, payload.get("exp"))
     return user
\ No newline at end of file
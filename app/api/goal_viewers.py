@@ -5,6 +5,8 @@ from uuid import UUID
 
 from app.api import deps
 from app.db import models
+from app.services.friend_graph import are_friends, friend_count
+from app.services.user_loader import UserLoader
 from app.schemas import social as social_schemas
 from app.schemas.goal_viewers import AllowedViewerAddIn
 
@@ -15,6 +17,7 @@ async def get_goal_allowed_viewers(
     goal_id: UUID,
     db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
+    users: UserLoader = Depends(deps.get_user_loader),
 ):
     """
     Get all users who are allowed to view and verify a specific goal.
@@ -39,26 +42,17 @@ async def get_goal_allowed_viewers(
     allowed_viewers = viewers_result.scalars().all()
     
     # Transform to FriendOut format
+    summaries = await users.load_many(viewer.user_id for viewer in allowed_viewers)
     viewers_list = []
     for viewer in allowed_viewers:
-        user_stmt = select(models.User).where(models.User.id == viewer.user_id)
-        user_result = await db.execute(user_stmt)
-        user = user_result.scalars().first()
-        
+        user = summaries.get(viewer.user_id)
         if user:
-            # Get profile for avatar
-            profile_stmt = select(models.UserProfile).where(
-                models.UserProfile.user_id == viewer.user_id
-            )
-            profile_result = await db.execute(profile_stmt)
-            profile = profile_result.scalars().first()
-            
             viewers_list.append(social_schemas.FriendOut(
                 id=str(viewer.user_id),  # Use user ID instead of viewer relationship ID
                 user_id=str(user.id),
                 name=user.username,
                 email=user.email,
-                avatar=profile.avatar_url if profile else None,
+                avatar=user.avatar_url,
                 status="accepted",  # Since they're allowed viewers, treat as accepted
                 added_at=None  # Not tracking when viewers were added
             ))
@@ -72,6 +66,7 @@ async def add_goal_allowed_viewer(
     viewer_data: AllowedViewerAddIn,
     db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
+    users: UserLoader = Depends(deps.get_user_loader),
 ):
     """
     Add a friend as an allowed viewer for a goal.
@@ -89,24 +84,7 @@ async def add_goal_allowed_viewer(
         raise HTTPException(status_code=404, detail="Goal not found or you don't have permission")
     
     # Verify that viewer_id is a friend
-    friendship_stmt = select(models.Friend).where(
-        or_(
-            and_(
-                models.Friend.requester_id == current_user.id,
-                models.Friend.addressee_id == viewer_data.viewer_id,
-                models.Friend.status == models.FriendStatus.accepted
-            ),
-            and_(
-                models.Friend.requester_id == viewer_data.viewer_id,
-                models.Friend.addressee_id == current_user.id,
-                models.Friend.status == models.FriendStatus.accepted
-            )
-        )
-    )
-    friendship_result = await db.execute(friendship_stmt)
-    friendship = friendship_result.scalars().first()
-    
-    if not friendship:
+    if not await are_friends(db, current_user.id, viewer_data.viewer_id):
         raise HTTPException(status_code=400, detail="You can only add friends as allowed viewers")
     
     # Check if already added
@@ -128,22 +106,14 @@ async def add_goal_allowed_viewer(
     await db.commit()
     
     # Get user details for response
-    user_stmt = select(models.User).where(models.User.id == viewer_data.viewer_id)
-    user_result = await db.execute(user_stmt)
-    user = user_result.scalars().first()
-    
-    profile_stmt = select(models.UserProfile).where(
-        models.UserProfile.user_id == viewer_data.viewer_id
-    )
-    profile_result = await db.execute(profile_stmt)
-    profile = profile_result.scalars().first()
+    user = await users.load(viewer_data.viewer_id)
     
     return social_schemas.FriendOut(
         id=str(user.id),
         user_id=str(user.id),
         name=user.username,
         email=user.email,
-        avatar=profile.avatar_url if profile else None,
+        avatar=user.avatar_url,
         status="accepted",
         added_at=None
     )
@@ -220,15 +190,7 @@ async def check_can_upload_proof(
         viewer_count_result = await db.execute(viewer_count_stmt)
         required = viewer_count_result.scalar() or 1
     elif goal.privacy_setting == models.GoalPrivacy.friends:
-        friend_count_stmt = select(func.count()).where(
-            or_(
-                models.Friend.requester_id == current_user.id,
-                models.Friend.addressee_id == current_user.id
-            ),
-            models.Friend.status == models.FriendStatus.accepted
-        )
-        friend_count_result = await db.execute(friend_count_stmt)
-        required = friend_count_result.scalar() or 1
+        required = await friend_count(db, current_user.id) or 1
     
     return {
         "can_upload": True,
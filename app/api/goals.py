@@ -4,44 +4,39 @@ from sqlalchemy import select, and_, or_, func
 from sqlalchemy.orm import selectinload
 from typing import Union, List
 from datetime import datetime
+import logging
 from app.api import deps
 from app.schemas import goal as schemas
 from app.db import models
+from app.services.friend_graph import friends_of
+from app.services.user_loader import UserLoader
+
+logger = logging.getLogger("backend")
 
 router = APIRouter()
 
-async def auto_fail_overdue_milestones(db: AsyncSession, goal: models.Goal):
+async def _require_friends(db: AsyncSession, user_id, friend_ids) -> None:
     """
-    Auto-fail milestones that have passed their due_date.
-    Returns the updated milestones list.
+    Reject (400) selected viewers who are not the user's accepted friends,
+    checked against one uncached read of the friend set.
     """
-    from datetime import date
-    
-    # Query milestones for this goal
-    milestones_stmt = select(models.Milestone).where(
-        models.Milestone.goal_id == goal.id,
-        models.Milestone.completed == False,
-        models.Milestone.due_date.isnot(None),
-        models.Milestone.due_date < date.today()
-    )
-    
-    result = await db.execute(milestones_stmt)
-    overdue_milestones = result.scalars().all()
-    
-    for milestone in overdue_milestones:
-        milestone.completed = True
-        milestone.failed = True  # NEW FIELD - see schema changes below
-        milestone.completed_at = datetime.utcnow()
-    
-    if overdue_milestones:
-        await db.commit()
+    if not friend_ids:
+        return
+    friends = await friends_of(db, user_id, cached=False)
+    strangers = [str(friend_id) for friend_id in dict.fromkeys(friend_ids) if friend_id not in friends]
+    if strangers:
+        raise HTTPException(status_code=400, detail=f"Not your friends: {', '.join(strangers)}")
 
 @router.post("", response_model=schemas.GoalDetailOut)
 async def create_goal(
     goal_in: Union[schemas.GoalCreateFlexibleIn, schemas.GoalCreateDefinedIn],
     db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
+    users: UserLoader = Depends(deps.get_user_loader),
 ):
+    if goal_in.privacy_setting == models.GoalPrivacy.select_friends:
+        await _require_friends(db, current_user.id, goal_in.selected_friend_ids)
+
     # 1. Create Goal Record
     db_goal = models.Goal(
         user_id=current_user.id,
@@ -103,37 +98,14 @@ async def create_goal(
     
     # 3. Handle selected friends for select_friends privacy
     if goal_in.privacy_setting == models.GoalPrivacy.select_friends and hasattr(goal_in, 'selected_friend_ids') and goal_in.selected_friend_ids:
-        # Validate each friend is actually a friend
-        for friend_id in goal_in.selected_friend_ids:
-            # Check if they are friends
-            friend_stmt = select(models.Friend).where(
-                or_(
-                    and_(
-                        models.Friend.requester_id == current_user.id,
-                        models.Friend.addressee_id == friend_id,
-                        models.Friend.status == models.FriendStatus.accepted
-                    ),
-                    and_(
-                        models.Friend.requester_id == friend_id,
-                        models.Friend.addressee_id == current_user.id,
-                        models.Friend.status == models.FriendStatus.accepted
-                    )
-                )
+        # Validated as friends above
+        for friend_id in dict.fromkeys(goal_in.selected_friend_ids):
+            allowed_viewer = models.GoalAllowedViewer(
+                goal_id=db_goal.id,
+                user_id=friend_id,
+                can_verify=True
             )
-            friend_result = await db.execute(friend_stmt)
-            friendship = friend_result.scalars().first()
-            
-            if friendship:
-                # Add as allowed viewer
-                allowed_viewer = models.GoalAllowedViewer(
-                    goal_id=db_goal.id,
-                    user_id=friend_id,
-                    can_verify=True
-                )
-                db.add(allowed_viewer)
-            else:
-                # Log warning but don't fail - friend might have been removed
-                print(f"Warning: User {friend_id} is not a friend of {current_user.id}, skipping")
+            db.add(allowed_viewer)
     
     await db.commit()
     
@@ -151,26 +123,11 @@ async def create_goal(
         hasattr(goal_in, 'selected_friend_ids') and 
         goal_in.selected_friend_ids):
         
+        summaries = await users.load_many(goal_in.selected_friend_ids)
         for friend_id in goal_in.selected_friend_ids:
-            # Get user details
-            user_stmt = select(models.User).where(models.User.id == friend_id)
-            user_result = await db.execute(user_stmt)
-            user = user_result.scalars().first()
-            
-            if user:
-                # Get profile
-                profile_stmt = select(models.UserProfile).where(
-                    models.UserProfile.user_id == friend_id
-                )
-                profile_result = await db.execute(profile_stmt)
-                profile = profile_result.scalars().first()
-                
-                verifying_partners.append(schemas.UserSummaryOut(
-                    id=user.id,
-                    username=user.username,
-                    email=user.email,
-                    avatar_url=profile.avatar_url if profile else None
-                ))
+            summary = summaries.get(friend_id)
+            if summary:
+                verifying_partners.append(summary)
     
     # Return with verifying partners
     return schemas.GoalDetailOut(
@@ -195,10 +152,15 @@ async def create_goal(
 
 @router.get("", response_model=List[schemas.GoalListOut])
 async def list_goals(
-    db: AsyncSession = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_user),
 ):
-    """List all goals for the current user"""
+    """
+    List all goals for the current user. Overdue milestones are failed by
+    the milestone expiry job, not here, so this endpoint can read from a replica;
+    a milestone may still show as open for up to MILESTONE_EXPIRY_INTERVAL_SECONDS
+    (plus replica lag) after it falls due.
+    """
     stmt = select(models.Goal).where(
         models.Goal.user_id == current_user.id,
         models.Goal.status != models.GoalStatus.archived
@@ -207,13 +169,7 @@ async def list_goals(
     ).order_by(models.Goal.created_at.desc())
     
     result = await db.execute(stmt)
-    goals = result.scalars().all()
-    
-    # Auto-fail overdue milestones and compute recent milestones for each goal
-    for goal in goals:
-        await auto_fail_overdue_milestones(db, goal)
-    
-    return goals
+    return result.scalars().all()
 
 
 @router.post("/{goal_id}/milestones", response_model=List[schemas.MilestoneOut])
@@ -288,6 +244,7 @@ async def get_goal(
     goal_id: str,
     db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
+    users: UserLoader = Depends(deps.get_user_loader),
 ):
     """Get detailed information about a specific goal"""
     stmt = select(models.Goal).where(
@@ -311,25 +268,11 @@ async def get_goal(
         viewers_result = await db.execute(viewers_stmt)
         allowed_viewers = viewers_result.scalars().all()
         
+        summaries = await users.load_many(viewer.user_id for viewer in allowed_viewers)
         for viewer in allowed_viewers:
-            user_stmt = select(models.User).where(models.User.id == viewer.user_id)
-            user_result = await db.execute(user_stmt)
-            user = user_result.scalars().first()
-            
-            if user:
-                # Get profile
-                profile_stmt = select(models.UserProfile).where(
-                    models.UserProfile.user_id == viewer.user_id
-                )
-                profile_result = await db.execute(profile_stmt)
-                profile = profile_result.scalars().first()
-                
-                verifying_partners.append(schemas.UserSummaryOut(
-                    id=user.id,
-                    username=user.username,
-                    email=user.email,
-                    avatar_url=profile.avatar_url if profile else None
-                ))
+            summary = summaries.get(viewer.user_id)
+            if summary:
+                verifying_partners.append(summary)
     
     # Return with verifying partners
     return schemas.GoalDetailOut(
@@ -382,7 +325,8 @@ async def update_goal(
         
         if new_privacy == models.GoalPrivacy.select_friends:
             # Get selected friend IDs from the request
-            selected_friend_ids = update_data.get('selected_friend_ids', [])
+            selected_friend_ids = update_data.get('selected_friend_ids') or []
+            await _require_friends(db, current_user.id, selected_friend_ids)
             
             # Remove existing allowed viewers
             delete_stmt = select(models.GoalAllowedViewer).where(
@@ -391,35 +335,17 @@ async def update_goal(
             existing_viewers = (await db.execute(delete_stmt)).scalars().all()
             for viewer in existing_viewers:
                 await db.delete(viewer)
+            # Delete before re-adding: a friend who stays selected keeps the same key
+            await db.flush()
             
             # Add new allowed viewers
-            for friend_id in selected_friend_ids:
-                # Validate each friend is actually a friend
-                friend_stmt = select(models.Friend).where(
-                    or_(
-                        and_(
-                            models.Friend.requester_id == current_user.id,
-                            models.Friend.addressee_id == friend_id,
-                            models.Friend.status == models.FriendStatus.accepted
-                        ),
-                        and_(
-                            models.Friend.requester_id == friend_id,
-                            models.Friend.addressee_id == current_user.id,
-                            models.Friend.status == models.FriendStatus.accepted
-                        )
-                    )
+            for friend_id in dict.fromkeys(selected_friend_ids):
+                allowed_viewer = models.GoalAllowedViewer(
+                    goal_id=goal_id,
+                    user_id=friend_id,
+                    can_verify=True
                 )
-                friend_result = await db.execute(friend_stmt)
-                friendship = friend_result.scalars().first()
-                
-                if friendship:
-                    # Add as allowed viewer
-                    allowed_viewer = models.GoalAllowedViewer(
-                        goal_id=goal_id,
-                        user_id=friend_id,
-                        can_verify=True
-                    )
-                    db.add(allowed_viewer)
+                db.add(allowed_viewer)
         
         # If privacy is NOT select_friends, clean up allowed viewers
         elif new_privacy != models.GoalPrivacy.select_friends:
@@ -8,7 +8,9 @@ from datetime import datetime, timezone
 from app.api import deps
 from app.schemas import interval_change as schemas
 from app.db import models
-from app.services.notification import create_notification
+from app.services.notification import create_notifications_bulk
+from app.services.friend_graph import are_friends, friends_of
+from app.services.user_loader import UserLoader
 
 router = APIRouter()
 
@@ -58,49 +60,28 @@ async def create_interval_change_request(
     await db.flush()
     
     # 5. Send notifications to accountability partners
+    recipient_ids = []
     if goal.privacy_setting == models.GoalPrivacy.select_friends:
         # Get allowed viewers
-        viewers_stmt = select(models.GoalAllowedViewer).where(
+        viewers_stmt = select(models.GoalAllowedViewer.user_id).where(
             models.GoalAllowedViewer.goal_id == goal.id,
             models.GoalAllowedViewer.can_verify == True
         )
         viewers_result = await db.execute(viewers_stmt)
-        viewers = viewers_result.scalars().all()
-        
-        for viewer in viewers:
-            await create_notification(
-                db,
-                recipient_id=viewer.user_id,
-                type=models.NotificationType.interval_change_request,
-                message=f"{current_user.username} requested to change milestone interval for '{goal.title}' from {goal.milestone_interval_days or 0} to {request_in.requested_interval} days",
-                actor_id=current_user.id,
-                goal_id=goal.id
-            )
+        recipient_ids = viewers_result.scalars().all()
     
     elif goal.privacy_setting == models.GoalPrivacy.friends:
         # Get all friends
-        friends_stmt = select(models.Friend).where(
-            or_(
-                models.Friend.requester_id == current_user.id,
-                models.Friend.addressee_id == current_user.id
-            ),
-            models.Friend.status == models.FriendStatus.accepted
-        )
-        friends_result = await db.execute(friends_stmt)
-        friendships = friends_result.scalars().all()
-        
-        for friendship in friendships:
-            friend_id = (friendship.addressee_id if friendship.requester_id == current_user.id 
-                        else friendship.requester_id)
-            
-            await create_notification(
-                db,
-                recipient_id=friend_id,
-                type=models.NotificationType.interval_change_request,
-                message=f"{current_user.username} requested to change milestone interval for '{goal.title}' from {goal.milestone_interval_days or 0} to {request_in.requested_interval} days",
-                actor_id=current_user.id,
-                goal_id=goal.id
-            )
+        recipient_ids = list(await friends_of(db, current_user.id))
+    
+    await create_notifications_bulk(
+        db,
+        recipient_ids,
+        type=models.NotificationType.interval_change_request,
+        message=f"{current_user.username} requested to change milestone interval for '{goal.title}' from {goal.milestone_interval_days or 0} to {request_in.requested_interval} days",
+        actor_id=current_user.id,
+        goal_id=goal.id
+    )
     
     await db.commit()
     await db.refresh(db_request)
@@ -120,8 +101,9 @@ async def create_interval_change_request(
 
 @router.get("/pending", response_model=list[schemas.IntervalChangeRequestOut])
 async def list_pending_interval_change_requests(
-    db: AsyncSession = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_user),
+    users: UserLoader = Depends(deps.get_read_user_loader),
 ):
     """
     List all pending interval change requests that the current user can verify.
@@ -145,6 +127,7 @@ async def list_pending_interval_change_requests(
         )
         requests_result = await db.execute(requests_stmt)
         requests = requests_result.scalars().all()
+        requesters = await users.load_many(req.requester_id for req in requests)
         
         for req in requests:
             # Get goal and requester details
@@ -152,9 +135,7 @@ async def list_pending_interval_change_requests(
             goal_result = await db.execute(goal_stmt)
             goal = goal_result.scalars().first()
             
-            user_stmt = select(models.User).where(models.User.id == req.requester_id)
-            user_result = await db.execute(user_stmt)
-            user = user_result.scalars().first()
+            user = requesters.get(req.requester_id)
             
             if goal and user:
                 pending_requests.append(schemas.IntervalChangeRequestOut(
@@ -170,19 +151,7 @@ async def list_pending_interval_change_requests(
                 ))
     
     # Also check for friends privacy goals
-    friends_stmt = select(models.Friend).where(
-        or_(
-            models.Friend.requester_id == current_user.id,
-            models.Friend.addressee_id == current_user.id
-        ),
-        models.Friend.status == models.FriendStatus.accepted
-    )
-    friends_result = await db.execute(friends_stmt)
-    friendships = friends_result.scalars().all()
-    
-    friend_ids = []
-    for f in friendships:
-        friend_ids.append(f.addressee_id if f.requester_id == current_user.id else f.requester_id)
+    friend_ids = await friends_of(db, current_user.id)
     
     if friend_ids:
         # Get goals from friends with 'friends' privacy setting
@@ -201,6 +170,7 @@ async def list_pending_interval_change_requests(
             )
             requests_result = await db.execute(requests_stmt)
             requests = requests_result.scalars().all()
+            requesters = await users.load_many(req.requester_id for req in requests)
             
             for req in requests:
                 # Skip if already added
@@ -209,9 +179,7 @@ async def list_pending_interval_change_requests(
                     
                 goal = next((g for g in friend_goals if g.id == req.goal_id), None)
                 
-                user_stmt = select(models.User).where(models.User.id == req.requester_id)
-                user_result = await db.execute(user_stmt)
-                user = user_result.scalars().first()
+                user = requesters.get(req.requester_id)
                 
                 if goal and user:
                     pending_requests.append(schemas.IntervalChangeRequestOut(
@@ -274,22 +242,7 @@ async def verify_interval_change_request(
         has_permission = viewer_result.scalars().first() is not None
     
     elif goal.privacy_setting == models.GoalPrivacy.friends:
-        friend_stmt = select(models.Friend).where(
-            or_(
-                and_(
-                    models.Friend.requester_id == current_user.id,
-                    models.Friend.addressee_id == goal.user_id,
-                    models.Friend.status == models.FriendStatus.accepted
-                ),
-                and_(
-                    models.Friend.requester_id == goal.user_id,
-                    models.Friend.addressee_id == current_user.id,
-                    models.Friend.status == models.FriendStatus.accepted
-                )
-            )
-        )
-        friend_result = await db.execute(friend_stmt)
-        has_permission = friend_result.scalars().first() is not None
+        has_permission = await are_friends(db, current_user.id, goal.user_id)
     
     if not has_permission:
         raise HTTPException(status_code=403, detail="You don't have permission to verify this request")
@@ -305,9 +258,9 @@ async def verify_interval_change_request(
     
     # 5. Notify the requester
     status_text = "approved" if verification.approved else "rejected"
-    await create_notification(
+    await create_notifications_bulk(
         db,
-        recipient_id=change_request.requester_id,
+        [change_request.requester_id],
         type=models.NotificationType.interval_change_request,
         message=f"{current_user.username} {status_text} your interval change request for '{goal.title}'",
         actor_id=current_user.id,
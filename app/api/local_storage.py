@@ -0,0 +1,67 @@
+import mimetypes
+from urllib.parse import urlparse
+
+from fastapi import APIRouter, File, Form, HTTPException, Request, Response, UploadFile
+
+from app.core.config import settings
+from app.services.storage import ObjectNotFound, storage_service
+
+# Serves LocalStorageBackend's URLs (LOCAL_STORAGE_BASE_URL/<key>) when
+# STORAGE_BACKEND=local: GET reads an object, PUT and POST stand in for the
+# presigned upload URLs. Like those URLs, nothing here is authenticated, so
+# it is only mounted for local development and tests.
+router = APIRouter()
+
+
+def mount_path() -> str:
+    """Path prefix of LOCAL_STORAGE_BASE_URL, where this router is mounted."""
+    path = urlparse(settings.LOCAL_STORAGE_BASE_URL).path.rstrip("/")
+    if not path:
+        raise ValueError("LOCAL_STORAGE_BASE_URL needs a path, e.g. http://localhost:8000/storage")
+    return path
+
+
+def _check_size(size: int) -> None:
+    if size < 1 or size > settings.MAX_PROOF_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Object must be 1 to {settings.MAX_PROOF_UPLOAD_BYTES} bytes")
+
+
+@router.get("/{object_name:path}")
+async def get_object(object_name: str):
+    try:
+        data = await storage_service.get_object(object_name)
+    except (ObjectNotFound, ValueError):
+        raise HTTPException(status_code=404, detail="Object not found")
+    media_type = mimetypes.guess_type(object_name)[0] or "application/octet-stream"
+    return Response(content=data, media_type=media_type)
+
+
+@router.put("/{object_name:path}")
+async def put_object(object_name: str, request: Request):
+    """Stand-in for the presigned PUT URL."""
+    declared = request.headers.get("Content-Length")
+    if declared is not None and declared.isdigit():
+        _check_size(int(declared))  # Refuse before reading the body
+    data = await request.body()
+    _check_size(len(data))
+    try:
+        await storage_service.put_object(object_name, data, request.headers.get("Content-Type", ""))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid object key")
+    return Response(status_code=200)
+
+
+@router.post("/{object_name:path}")
+async def post_object(
+    object_name: str,
+    file: UploadFile = File(...),
+    content_type: str = Form("", alias="Content-Type"),
+):
+    """Stand-in for the presigned POST form (fields from generate_presigned_post, then file)."""
+    data = await file.read()
+    _check_size(len(data))
+    try:
+        await storage_service.put_object(object_name, data, content_type)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid object key")
+    return Response(status_code=204)
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 from uuid import UUID
 
 from app.api import deps
+from app.api.pagination import NEXT_CURSOR_HEADER, keyset_paginate, set_next_cursor
+from app.core.config import settings
 from app.db import models
-from pydantic import BaseModel, ConfigDict
-from typing import Optional, List
+from app.db.session import SessionLocal
+from app.services.notification import get_unread_count, adjust_unread_count, transition_notifications
+from app.services.notification_stream import hub, issue_stream_ticket, redeem_stream_ticket
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, List, Union
 from datetime import datetime
 
 router = APIRouter()
@@ -24,24 +33,64 @@ class NotificationOut(BaseModel):
     created_at: datetime
     
     model_config = ConfigDict(from_attributes=True)
+
+
+class NotificationCompactOut(BaseModel):
+    """List item without the fields the client already knows or rarely needs."""
+    id: UUID
+    type: str
+    goal_id: Optional[UUID]
+    message: str
+    status: str
+    created_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
     
 
 class NotificationUpdateStatus(BaseModel):
     status: str  # 'read' or 'archived'
 
 
-@router.get("/notifications", response_model=List[NotificationOut])
+class NotificationBulkStatusUpdate(BaseModel):
+    status: models.NotificationState
+    # Optional filters, combined with AND; none selects all of the user's notifications
+    ids: Optional[List[UUID]] = Field(default=None, max_length=1000)
+    older_than: Optional[datetime] = None
+    type: Optional[models.NotificationType] = None
+
+
+@router.get("/notifications", response_model=List[Union[NotificationOut, NotificationCompactOut]])
 async def list_notifications(
+    response: Response,
     status: Optional[str] = None,
+    type: Optional[models.NotificationType] = None,
+    goal_id: Optional[UUID] = None,
+    compact: bool = Query(False, description="Return NotificationCompactOut items"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description=f"Value of the {NEXT_CURSOR_HEADER} header from the previous page"),
     db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
 ):
     """
-    List notifications for the current user.
+    List notifications for the current user, newest first.
     Optional status filter: 'unread', 'read', 'archived'
+
+    Keyset-paginated on (created_at, id); the cursor for the next page is
+    returned in the X-Next-Cursor response header.
     """
-    # Build query
-    query = select(models.PartnerNotification).where(
+    # Build query; compact mode only reads the columns it returns
+    if compact:
+        query = select(
+            models.PartnerNotification.id,
+            models.PartnerNotification.type,
+            models.PartnerNotification.goal_id,
+            models.PartnerNotification.message,
+            models.PartnerNotification.status,
+            models.PartnerNotification.created_at
+        )
+    else:
+        query = select(models.PartnerNotification)
+    query = query.where(
         models.PartnerNotification.recipient_id == current_user.id
     )
     
@@ -60,13 +109,21 @@ async def list_notifications(
                 models.PartnerNotification.status == models.NotificationState.archived
             )
     
+    if type:
+        query = query.where(models.PartnerNotification.type == type)
+    if goal_id:
+        query = query.where(models.PartnerNotification.goal_id == goal_id)
+    
     # Order by newest first
-    query = query.order_by(models.PartnerNotification.created_at.desc())
+    query = keyset_paginate(
+        query, models.PartnerNotification.created_at, models.PartnerNotification.id, limit, cursor
+    )
     
     result = await db.execute(query)
-    notifications = result.scalars().all()
-    
-    return notifications
+    if compact:
+        rows = set_next_cursor(response, result.all(), limit, "created_at")
+        return [NotificationCompactOut.model_validate(row) for row in rows]
+    return set_next_cursor(response, result.scalars().all(), limit, "created_at")
 
 
 @router.patch("/notifications/{notification_id}", response_model=NotificationOut)
@@ -83,13 +140,15 @@ async def update_notification(
     query = select(models.PartnerNotification).where(
         models.PartnerNotification.id == notification_id,
         models.PartnerNotification.recipient_id == current_user.id
-    )
+    ).with_for_update()  # Serialize concurrent updates so the unread counter moves once
     result = await db.execute(query)
     notification = result.scalars().first()
     
     if not notification:
         raise HTTPException(status_code=404, detail="Notification not found")
     
+    was_unread = notification.status == models.NotificationState.unread
+    
     # Update status
     if update_data.status == 'read':
         notification.status = models.NotificationState.read
@@ -100,6 +159,9 @@ async def update_notification(
     else:
         raise HTTPException(status_code=400, detail="Invalid status value")
     
+    is_unread = notification.status == models.NotificationState.unread
+    await adjust_unread_count(db, current_user.id, int(is_unread) - int(was_unread))
+    
     await db.commit()
     await db.refresh(notification)
     
@@ -148,19 +210,38 @@ async def mark_all_notifications_as_read(
     """
     Mark all unread notifications as read for the current user.
     """
-    query = select(models.PartnerNotification).where(
-        models.PartnerNotification.recipient_id == current_user.id,
-        models.PartnerNotification.status == models.NotificationState.unread
+    updated = await transition_notifications(
+        db,
+        current_user.id,
+        models.NotificationState.read,
+        from_status=models.NotificationState.unread
     )
-    result = await db.execute(query)
-    notifications = result.scalars().all()
-    
-    for notification in notifications:
-        notification.status = models.NotificationState.read
+    await db.commit()
     
+    return {"message": f"Marked {updated} notifications as read"}
+
+
+@router.post("/notifications/bulk-status")
+async def bulk_update_notification_status(
+    update_data: NotificationBulkStatusUpdate,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user),
+):
+    """
+    Move many notifications to a new status (read, archived, unread) at once.
+    Select them by id list, an "older than" cutoff and/or type.
+    """
+    updated = await transition_notifications(
+        db,
+        current_user.id,
+        update_data.status,
+        ids=update_data.ids,
+        older_than=update_data.older_than,
+        type=update_data.type
+    )
     await db.commit()
     
-    return {"message": f"Marked {len(notifications)} notifications as read"}
+    return {"updated": updated}
 
 
 @router.get("/notifications/unread-count")
@@ -170,12 +251,111 @@ async def get_unread_notification_count(
 ):
     """
     Get the count of unread notifications for the current user.
+    Served from the per-user counter, without touching the notifications table.
     """
-    query = select(models.PartnerNotification).where(
-        models.PartnerNotification.recipient_id == current_user.id,
-        models.PartnerNotification.status == models.NotificationState.unread
+    return {"unread_count": await get_unread_count(db, current_user.id)}
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class StreamTicketOut(BaseModel):
+    ticket: str
+    expires_in: int
+
+
+@router.post("/notifications/stream-ticket", response_model=StreamTicketOut)
+async def create_stream_ticket(
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user),
+):
+    """
+    Issue a single-use ticket for opening /notifications/stream?ticket=...
+    EventSource cannot set headers, and the access token must not end up in
+    URLs (and so in access logs); the ticket expires after
+    NOTIFICATION_STREAM_TICKET_SECONDS and is spent by the first connection.
+    """
+    ticket = await issue_stream_ticket(db, current_user.id)
+    await db.commit()
+    return StreamTicketOut(ticket=ticket, expires_in=settings.NOTIFICATION_STREAM_TICKET_SECONDS)
+
+
+@router.get("/notifications/stream")
+async def stream_notifications(
+    request: Request,
+    ticket: Optional[str] = None,
+):
+    """
+    Server-Sent Events stream of the current user's new notifications and
+    unread-count changes, replacing polling of /notifications/unread-count.
+    Authenticate with ?ticket= from POST /notifications/stream-ticket
+    (browsers) or with the usual Authorization header.
+
+    Events: "unread_count" ({"unread_count"}) on connect and on status changes,
+    "notification" ({"notification_id", "unread_count"}) for each new
+    notification; fetch it with GET /notifications/{notification_id}.
+    """
+    if not settings.NOTIFICATION_STREAM_ENABLED:
+        raise HTTPException(status_code=404, detail="Notification stream is disabled")
+
+    # Short-lived session: an open stream must not pin a pooled DB connection
+    async with SessionLocal() as db:
+        if ticket is not None:
+            user_id = await redeem_stream_ticket(db, ticket)
+            if user_id is None:
+                raise HTTPException(status_code=401, detail="Invalid or expired stream ticket")
+        else:
+            _, _, token = request.headers.get("Authorization", "").partition(" ")
+            user_id = (await deps.get_user_from_token(db, token)).id
+
+    async def events():
+        # Subscribe here, not in the endpoint: the finally below only runs
+        # once iteration has started, and a client can leave before that.
+        # Subscribe before reading the count so no change falls in between.
+        queue = hub.subscribe(user_id)
+        try:
+            async with SessionLocal() as db:
+                unread_count = await get_unread_count(db, user_id)
+            yield _sse("unread_count", {"unread_count": unread_count})
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), timeout=settings.NOTIFICATION_STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                # The event dict is shared by all of this user's connections
+                data = {k: v for k, v in event.items() if k not in ("event", "recipient_id")}
+                yield _sse(event["event"], data)
+        finally:
+            hub.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    result = await db.execute(query)
-    notifications = result.scalars().all()
-    
-    return {"unread_count": len(notifications)}
\ No newline at end of file
+
+
+# Declared after the literal /notifications/... GET routes so it does not shadow them
+@router.get("/notifications/{notification_id}", response_model=NotificationOut)
+async def get_notification(
+    notification_id: UUID,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user),
+):
+    """
+    Get one of the current user's notifications, e.g. after a stream event.
+    """
+    result = await db.execute(select(models.PartnerNotification).where(
+        models.PartnerNotification.id == notification_id,
+        models.PartnerNotification.recipient_id == current_user.id,
+    ))
+    notification = result.scalars().first()
+    if not notification:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    return notification
@@ -0,0 +1,63 @@
+import base64
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+# Response header carrying the cursor for the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode(sort_value: str, row_id: UUID) -> str:
+    raw = f"{sort_value}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str, parse_sort_value: Callable[[str], Any]) -> Tuple[Any, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return parse_sort_value(sort_value), UUID(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_cursor(sort_value: datetime, row_id: UUID) -> str:
+    return _encode(sort_value.isoformat(), row_id)
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    return _decode(cursor, datetime.fromisoformat)
+
+
+def encode_rank_cursor(rank: int, row_id: UUID) -> str:
+    """Cursor for lists ordered by an integer relevance rank instead of a timestamp."""
+    return _encode(str(rank), row_id)
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[int, UUID]:
+    return _decode(cursor, int)
+
+
+def keyset_paginate(stmt, sort_column, id_column, limit: int, cursor: Optional[str] = None, decode=decode_cursor):
+    """
+    Order a select newest-first (descending) on (sort_column, id_column) and
+    start it after the cursor position. Fetches one extra row so the caller
+    can tell whether another page exists (see set_next_cursor).
+    """
+    if cursor:
+        sort_value, row_id = decode(cursor)
+        stmt = stmt.where(tuple_(sort_column, id_column) < tuple_(sort_value, row_id))
+    return stmt.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def set_next_cursor(response: Response, rows: Sequence, limit: int, sort_attr: str, encode=encode_cursor) -> list:
+    """Trim the look-ahead row and advertise the next cursor if there is one."""
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode(getattr(last, sort_attr), last.id)
+    return rows
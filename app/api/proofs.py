@@ -1,48 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func
-from sqlalchemy.orm import joinedload
+from typing import Optional
 from uuid import UUID
 import uuid
 import re
+import logging
 from datetime import datetime, timedelta, timezone
 
 from app.api import deps
+from app.api.pagination import NEXT_CURSOR_HEADER, keyset_paginate, set_next_cursor
 from app.schemas import proof as schemas
-from app.services.storage import storage_service
-from app.services.notification import create_notification
+from app.services.storage import StorageUnavailable, storage_service
+from app.services.image_pipeline import process_proof_image
+from app.services.notification import create_notifications_bulk
+from app.services.friend_graph import friend_count, friends_of
+from app.services.proof_feed import ProofFeedBuilder, visible_proofs_query
 from app.db import models
+from app.core.config import settings
 
-router = APIRouter()
+logger = logging.getLogger("backend")
 
-# NEW: Background task to expire old proofs
-async def expire_old_proofs(db: AsyncSession):
-    """Expire proofs that are past their 72-hour verification window"""
-    expiry_time = datetime.now(timezone.utc) - timedelta(hours=72)
-    
-    # Find pending proofs past expiry
-    expired_stmt = select(models.Proof).options(joinedload(models.Proof.goal)).where(
-        models.Proof.status == models.ProofStatus.pending,
-        models.Proof.verification_expires_at < datetime.now(timezone.utc)
-    )
-    result = await db.execute(expired_stmt)
-    expired_proofs = result.scalars().all()
-    
-    for proof in expired_proofs:
-        proof.status = models.ProofStatus.rejected
-        
-        # Create expiry notification for the uploader
-        await create_notification(
-            db,
-            recipient_id=proof.user_id,
-            type=models.NotificationType.proof_expired,
-            message=f"Your proof for '{proof.goal.title}' has expired without sufficient verifications",
-            actor_id=proof.user_id,  # System notification
-            goal_id=proof.goal_id,
-            proof_id=proof.id
-        )
-    
-    await db.commit()
+router = APIRouter()
 
 # NEW: Check if user can verify a proof based on privacy settings
 async def can_user_verify_proof(
@@ -51,214 +30,48 @@ async def can_user_verify_proof(
     proof: models.Proof
 ) -> bool:
     """Check if user has permission to verify this proof based on privacy settings"""
-    
-    # Cannot verify your own proof
-    if proof.user_id == user_id:
-        return False
-    
-    # Get the goal
-    goal_stmt = select(models.Goal).where(models.Goal.id == proof.goal_id)
-    goal_result = await db.execute(goal_stmt)
-    goal = goal_result.scalars().first()
-    
-    if not goal:
-        return False
-    
-    # Check privacy setting
-    if goal.privacy_setting == models.GoalPrivacy.select_friends:
-        # Check if user is in allowed viewers list
-        viewer_stmt = select(models.GoalAllowedViewer).where(
-            models.GoalAllowedViewer.goal_id == goal.id,
-            models.GoalAllowedViewer.user_id == user_id,
-            models.GoalAllowedViewer.can_verify == True
-        )
-        viewer_result = await db.execute(viewer_stmt)
-        return viewer_result.scalars().first() is not None
-        
-    elif goal.privacy_setting == models.GoalPrivacy.friends:
-        # Check if users are friends
-        friend_stmt = select(models.Friend).where(
-            or_(
-                and_(
-                    models.Friend.requester_id == user_id,
-                    models.Friend.addressee_id == proof.user_id,
-                    models.Friend.status == models.FriendStatus.accepted
-                ),
-                and_(
-                    models.Friend.requester_id == proof.user_id,
-                    models.Friend.addressee_id == user_id,
-                    models.Friend.status == models.FriendStatus.accepted
-                )
-            )
-        )
-        friend_result = await db.execute(friend_stmt)
-        return friend_result.scalars().first() is not None
-    
-    return False  # Private goals cannot be verified by others
+    feed = ProofFeedBuilder(db, user_id, cached_friends=False)
+    await feed.load_access([proof])
+    return feed.can_verify(proof)
 
 @router.get("", response_model=list[schemas.ProofOut])
 async def list_proofs(
-    background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(deps.get_db),
+    response: Response,
+    scope: schemas.ProofFeedScope = "all",
+    status: Optional[models.ProofStatus] = None,
+    goal_id: Optional[UUID] = None,
+    since: Optional[datetime] = Query(None, description="Only proofs uploaded after this time (incremental refresh)"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description=f"Value of the {NEXT_CURSOR_HEADER} header from the previous page"),
+    db: AsyncSession = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_user),
 ):
     """
-    List all proofs that the current user can see/verify:
-    - Proofs submitted by the user (their pending proofs)
-    - Proofs from friends that are pending verification
+    List proofs that the current user can see/verify, newest first:
+    - Proofs submitted by the user (scope=mine)
+    - Proofs from friends that are pending verification or that the user
+      recently approved (scope=to_verify)
+
+    Keyset-paginated on (uploaded_at, id); the cursor for the next page is
+    returned in the X-Next-Cursor response header.
     """
-    # Expire old proofs first
-    background_tasks.add_task(expire_old_proofs, db)
-    
-    # Get proofs submitted by current user
-    user_proofs_stmt = select(models.Proof).where(
-        models.Proof.user_id == current_user.id
-    )
-    
-    # Define 48-hour cutoff for recently approved proofs
-    cutoff_time = datetime.now(timezone.utc) - timedelta(hours=48)
-    
-    # Create "Verified By Me Recently" Subquery
-    verified_by_me_recently = select(models.ProofVerification).where(
-        models.ProofVerification.proof_id == models.Proof.id,
-        models.ProofVerification.verifier_id == current_user.id,
-        models.ProofVerification.approved == True,
-        models.ProofVerification.created_at >= cutoff_time
-    ).exists()
-    
-    # Define privacy check (existing logic)
-    privacy_check = or_(
-        and_(
-            models.Goal.privacy_setting == models.GoalPrivacy.friends,
-            select(models.Friend).where(
-                or_(
-                    and_(
-                        models.Friend.requester_id == current_user.id,
-                        models.Friend.addressee_id == models.Proof.user_id,
-                        models.Friend.status == models.FriendStatus.accepted
-                    ),
-                    and_(
-                        models.Friend.addressee_id == current_user.id,
-                        models.Friend.requester_id == models.Proof.user_id,
-                        models.Friend.status == models.FriendStatus.accepted
-                    )
-                )
-            ).exists()
-        ),
-        and_(
-            models.Goal.privacy_setting == models.GoalPrivacy.select_friends,
-            select(models.GoalAllowedViewer).where(
-                models.GoalAllowedViewer.goal_id == models.Goal.id,
-                models.GoalAllowedViewer.user_id == current_user.id,
-                models.GoalAllowedViewer.can_verify == True
-            ).exists()
-        )
-    )
-    
-    # Get proofs from friends - both pending and recently approved by me
-    friends_proofs_stmt = select(models.Proof).join(
-        models.Goal,
-        models.Goal.id == models.Proof.goal_id
-    ).where(
-        and_(
-            models.Proof.user_id != current_user.id,  # Still never show my own proofs here
-            or_(
-                # Scenario A: Pending Verification (Old Logic)
-                and_(
-                    models.Proof.status == models.ProofStatus.pending,
-                    privacy_check
-                ),
-                # Scenario B: Recently Approved by Me (New Logic)
-                verified_by_me_recently
-            )
-        )
-    )
+    stmt = visible_proofs_query(current_user.id, scope)
     
-    # Execute both queries
-    user_proofs_result = await db.execute(user_proofs_stmt)
-    friends_proofs_result = await db.execute(friends_proofs_stmt)
+    if status:
+        stmt = stmt.where(models.Proof.status == status)
+    if goal_id:
+        stmt = stmt.where(models.Proof.goal_id == goal_id)
+    if since:
+        stmt = stmt.where(models.Proof.uploaded_at > since)
     
-    user_proofs = user_proofs_result.scalars().all(); print(f"DEBUG Proof Listing: User {current_user.id} querying proofs...")
-    friends_proofs = friends_proofs_result.scalars().all(); print(f"DEBUG Proof Listing: Found {len(user_proofs)} user proofs, {len(friends_proofs)} friend proofs")
-
-    
-    # Combine all proofs
-    all_proofs = list(user_proofs) + list(friends_proofs)
+    stmt = keyset_paginate(stmt, models.Proof.uploaded_at, models.Proof.id, limit, cursor)
+    result = await db.execute(stmt)
+    proofs = set_next_cursor(response, result.scalars().all(), limit, "uploaded_at")
+    logger.debug(f"Proof listing: user {current_user.id} found {len(proofs)} proofs (scope={scope})")
     
     # Transform to include additional frontend-required fields
-    result = []
-    for proof in all_proofs:
-        # Get the user who submitted the proof
-        user_stmt = select(models.User).where(models.User.id == proof.user_id)
-        user_result = await db.execute(user_stmt)
-        user = user_result.scalars().first()
-        
-        # Get the goal details
-        goal_stmt = select(models.Goal).where(models.Goal.id == proof.goal_id)
-        goal_result = await db.execute(goal_stmt)
-        goal = goal_result.scalars().first()
-        
-        # Get milestone details if milestone_id exists
-        milestone_title = None
-        milestone_description = None
-        if proof.milestone_id:
-            milestone_stmt = select(models.Milestone).where(models.Milestone.id == proof.milestone_id)
-            milestone_result = await db.execute(milestone_stmt)
-            milestone = milestone_result.scalars().first()
-            if milestone:
-                milestone_title = milestone.title
-                milestone_description = milestone.description
-        
-        # Get verification details
-        verif_stmt = select(models.ProofVerification).where(
-            models.ProofVerification.proof_id == proof.id
-        )
-        verif_result = await db.execute(verif_stmt)
-        verifications = verif_result.scalars().all()
-        
-        # Check if current user can verify this proof
-        can_verify = False
-        if proof.user_id != current_user.id:
-            can_verify = await can_user_verify_proof(db, current_user.id, proof)
-        
-        # Transform verifications to include verifier names
-        verif_out = []
-        for v in verifications:
-            verifier_stmt = select(models.User).where(models.User.id == v.verifier_id)
-            verifier_result = await db.execute(verifier_stmt)
-            verifier = verifier_result.scalars().first()
-            
-            verif_out.append(schemas.ProofVerificationOut(
-                id=v.id,
-                verifier_id=v.verifier_id,
-                verifier_name=verifier.username if verifier else "Unknown",
-                approved=v.approved,
-                comment=v.comment,
-                timestamp=v.created_at
-            ))
-        
-        # Create the proof output with all required fields
-        proof_out = schemas.ProofOut(
-            id=proof.id,
-            goal_id=proof.goal_id,
-            milestone_id=proof.milestone_id,
-            user_id=proof.user_id,
-            user_name=user.username if user else "Unknown",
-            image_url=proof.image_url,
-            caption=proof.caption,
-            status=proof.status,
-            requiredVerifications=proof.required_verifications,
-            uploadedAt=proof.uploaded_at,  # FIXED: Uses uploaded_at field
-            verificationExpiresAt=proof.verification_expires_at,  # NEW: Expiry time
-            verifications=verif_out,
-            goalTitle=goal.title if goal else "Unknown Goal",
-            milestoneTitle=milestone_title,
-            milestoneDescription=milestone_description,
-            canVerify=can_verify  # NEW: Permission flag
-        )
-        result.append(proof_out)
-    
-    return result
+    feed = ProofFeedBuilder(db, current_user.id)
+    return await feed.build(proofs)
 
 @router.get("/{proof_id}", response_model=schemas.ProofOut)
 async def get_proof_details(
@@ -279,11 +92,14 @@ async def get_proof_details(
     if not proof:
         raise HTTPException(status_code=404, detail="Proof not found")
     
+    feed = ProofFeedBuilder(db, current_user.id, cached_friends=False)
+    
     # Check if user has permission to view this proof
     # User can view if they submitted it OR if they're an allowed verifier
     if proof.user_id != current_user.id:
         # Check if user can verify (which also means they can view)
-        if not await can_user_verify_proof(db, current_user.id, proof):
+        await feed.load_access([proof])
+        if not feed.can_verify(proof):
             raise HTTPException(status_code=403, detail="You don't have permission to view this proof")
     
     # Check if proof has expired
@@ -293,111 +109,107 @@ async def get_proof_details(
             await db.commit()
             await db.refresh(proof)
     
-    # Get all related details
-    user_stmt = select(models.User).where(models.User.id == proof.user_id)
-    user_result = await db.execute(user_stmt)
-    user = user_result.scalars().first()
-    
-    goal_stmt = select(models.Goal).where(models.Goal.id == proof.goal_id)
-    goal_result = await db.execute(goal_stmt)
-    goal = goal_result.scalars().first()
-    
-    # Get milestone details
-    milestone_title = None
-    milestone_description = None
-    if proof.milestone_id:
-        milestone_stmt = select(models.Milestone).where(models.Milestone.id == proof.milestone_id)
-        milestone_result = await db.execute(milestone_stmt)
-        milestone = milestone_result.scalars().first()
-        if milestone:
-            milestone_title = milestone.title
-            milestone_description = milestone.description
-    
-    # Get verification details
-    verif_stmt = select(models.ProofVerification).where(
-        models.ProofVerification.proof_id == proof.id
-    )
-    verif_result = await db.execute(verif_stmt)
-    verifications = verif_result.scalars().all()
-    
-    # Check if current user can verify
-    can_verify = False
-    if proof.user_id != current_user.id:
-        can_verify = await can_user_verify_proof(db, current_user.id, proof)
-    
-    # Transform verifications
-    verif_out = []
-    for v in verifications:
-        verifier_stmt = select(models.User).where(models.User.id == v.verifier_id)
-        verifier_result = await db.execute(verifier_stmt)
-        verifier = verifier_result.scalars().first()
-        
-        verif_out.append(schemas.ProofVerificationOut(
-            id=v.id,
-            verifier_id=v.verifier_id,
-            verifier_name=verifier.username if verifier else "Unknown",
-            approved=v.approved,
-            comment=v.comment,
-            timestamp=v.created_at
-        ))
-    
-    return schemas.ProofOut(
-        id=proof.id,
-        goal_id=proof.goal_id,
-        milestone_id=proof.milestone_id,
-        user_id=proof.user_id,
-        user_name=user.username if user else "Unknown", # Renamed from userName
-        image_url=proof.image_url,
-        caption=proof.caption,
-        status=proof.status,
-        requiredVerifications=proof.required_verifications,
-        uploadedAt=proof.uploaded_at,
-        verificationExpiresAt=proof.verification_expires_at,
-        verifications=verif_out,
-        goalTitle=goal.title if goal else "Unknown Goal",
-        milestoneTitle=milestone_title,
-        milestoneDescription=milestone_description,
-        canVerify=can_verify
-    )
+    # Get all related details in one batch
+    proof_out, = await feed.build([proof])
+    return proof_out
 
-@router.get("/storage/upload-url")
-async def get_upload_url(
-    filename: str, 
-    content_type: str,
-    current_user: models.User = Depends(deps.get_current_user)
-):
+# Accept only images
+ALLOWED_UPLOAD_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp', 'heic', 'heif'}
+ALLOWED_UPLOAD_CONTENT_TYPES = {
+    'image/jpeg', 'image/jpg', 'image/png', 'image/gif', 
+    'image/webp', 'image/heic', 'image/heif', 'image/heif-sequence'
+}
+
+
+# Upload keys are issued per user; create_proof only accepts the caller's own
+UPLOAD_KEY_PREFIX = "proofs"
+_UPLOAD_KEY_RE = re.compile(
+    rf"^{UPLOAD_KEY_PREFIX}/(?P<user_id>[0-9a-f-]{{36}})/[0-9a-f-]{{36}}\.(?:{'|'.join(sorted(ALLOWED_UPLOAD_EXTENSIONS))})$"
+)
+
+
+def upload_key(user_id: UUID, ext: str) -> str:
+    return f"{UPLOAD_KEY_PREFIX}/{user_id}/{uuid.uuid4()}.{ext}"
+
+
+def is_upload_key_of(storage_key: str, user_id: UUID) -> bool:
+    """Whether storage_key is an original upload key issued to user_id."""
+    match = _UPLOAD_KEY_RE.match(storage_key)
+    return match is not None and match.group("user_id") == str(user_id)
+
+
+async def create_upload_url(user_id: UUID, filename: str, content_type: str, size: Optional[int] = None) -> dict:
     """
-    Get a presigned URL to upload a file directly to MinIO/S3.
-    Validates file type and size limits.
+    Validate one file and presign a direct upload for it under a random key
+    owned by user_id. The store enforces the size limit: the POST policy
+    carries a content-length range, and the PUT URL (only issued when the
+    client declares the file's size) is signed for exactly that length.
     """
-    # Validate file type - accept only images
-    allowed_extensions = {'jpg', 'jpeg', 'png', 'gif', 'webp', 'heic', 'heif'}
-    allowed_content_types = {
-        'image/jpeg', 'image/jpg', 'image/png', 'image/gif', 
-        'image/webp', 'image/heic', 'image/heif', 'image/heif-sequence'
-    }
-    
     ext = filename.split(".")[-1].lower()
     
-    if ext not in allowed_extensions:
+    if ext not in ALLOWED_UPLOAD_EXTENSIONS:
         raise HTTPException(
             status_code=400, 
-            detail=f"Invalid file type. Allowed types: {', '.join(allowed_extensions)}"
+            detail=f"Invalid file type. Allowed types: {', '.join(ALLOWED_UPLOAD_EXTENSIONS)}"
         )
     
-    if content_type and content_type.lower() not in allowed_content_types:
+    if content_type and content_type.lower() not in ALLOWED_UPLOAD_CONTENT_TYPES:
         raise HTTPException(
             status_code=400, 
-            detail=f"Invalid content type. Allowed types: {', '.join(allowed_content_types)}"
+            detail=f"Invalid content type. Allowed types: {', '.join(ALLOWED_UPLOAD_CONTENT_TYPES)}"
+        )
+
+    if size is not None and size > settings.MAX_PROOF_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {settings.MAX_PROOF_UPLOAD_BYTES // (1024 * 1024)} MB"
         )
     
     # Generate random filename
-    storage_key = f"{uuid.uuid4()}.{ext}"
+    storage_key = upload_key(user_id, ext)
     
-    url = storage_service.generate_presigned_put(storage_key, content_type)
+    url = None
+    if size is not None:
+        url = await storage_service.generate_presigned_put(storage_key, content_type, size)
+    upload_post = await storage_service.generate_presigned_post(
+        storage_key, content_type, settings.MAX_PROOF_UPLOAD_BYTES
+    )
     public_url = storage_service.get_public_url(storage_key)
     
-    return {"upload_url": url, "public_url": public_url, "file_path": storage_key}
+    return {
+        "upload_url": url,
+        "upload_post": upload_post,
+        "max_bytes": settings.MAX_PROOF_UPLOAD_BYTES,
+        "public_url": public_url,
+        "file_path": storage_key
+    }
+
+
+@router.get("/storage/upload-url")
+async def get_upload_url(
+    filename: str, 
+    content_type: str,
+    size: Optional[int] = Query(None, ge=1, description="File size in bytes; required for a PUT upload_url"),
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """
+    Get a presigned upload to MinIO/S3: a POST policy (upload_post), plus a
+    PUT URL (upload_url) when the file size is given.
+    Validates file type and size limits.
+    """
+    return await create_upload_url(current_user.id, filename, content_type, size)
+
+
+@router.post("/storage/upload-urls")
+async def get_upload_urls(
+    batch: schemas.UploadUrlBatchIn,
+    current_user: models.User = Depends(deps.get_current_user)
+):
+    """
+    Presigned upload URLs for several files in one request, in input order.
+    The whole batch is rejected if any file fails validation.
+    """
+    return [await create_upload_url(current_user.id, f.filename, f.content_type, f.size) for f in batch.files]
 
 @router.post("", response_model=schemas.ProofOut)
 async def create_proof(
@@ -406,6 +218,25 @@ async def create_proof(
     db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
 ):
+    # 0. The upload must be the caller's own, complete and within the size
+    # limit (checked before any DB work so no connection is held during the
+    # storage round trip)
+    if not is_upload_key_of(proof_in.storage_key, current_user.id):
+        raise HTTPException(status_code=403, detail="Unknown upload; request an upload URL first")
+    try:
+        uploaded = (await storage_service.head_objects([proof_in.storage_key]))[proof_in.storage_key]
+    except StorageUnavailable:
+        logger.exception(f"Could not check upload {proof_in.storage_key}")
+        raise HTTPException(status_code=502, detail="Storage is unavailable; try again")
+    if uploaded is None:
+        raise HTTPException(status_code=400, detail="Uploaded file not found; finish the upload first")
+    # The presigned upload already caps the size; this catches anything that bypassed it
+    if uploaded.size > settings.MAX_PROOF_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {settings.MAX_PROOF_UPLOAD_BYTES // (1024 * 1024)} MB"
+        )
+
     # 1. Validate Goal
     goal_stmt = select(models.Goal).where(models.Goal.id == proof_in.goal_id)
     res = await db.execute(goal_stmt)
@@ -438,15 +269,7 @@ async def create_proof(
         required = viewer_count_result.scalar() or 1
     elif goal.privacy_setting == models.GoalPrivacy.friends:
         # For 'friends' privacy, count all accepted friends
-        friend_count_stmt = select(func.count()).where(
-            or_(
-                models.Friend.requester_id == current_user.id,
-                models.Friend.addressee_id == current_user.id
-            ),
-            models.Friend.status == models.FriendStatus.accepted
-        )
-        friend_count_result = await db.execute(friend_count_stmt)
-        required = friend_count_result.scalar() or 1
+        required = await friend_count(db, current_user.id) or 1
     else:
         # For private goals, only 1 verification needed (from self or default)
         required = 1
@@ -469,57 +292,39 @@ async def create_proof(
     await db.flush()  # Flush to get the proof ID
 
     # 5. Trigger Notifications for verifiers based on privacy settings
+    recipient_ids = []
     if goal.privacy_setting == models.GoalPrivacy.select_friends:
         # Get specific allowed viewers
-        viewers_stmt = select(models.GoalAllowedViewer).where(
+        viewers_stmt = select(models.GoalAllowedViewer.user_id).where(
             models.GoalAllowedViewer.goal_id == goal.id,
             models.GoalAllowedViewer.can_verify == True
         )
         viewers_result = await db.execute(viewers_stmt)
-        viewers = viewers_result.scalars().all()
-        print(f"DEBUG Proof Creation: Goal {goal.id} has {len(viewers)} allowed viewers for notifications")
-        
-        for viewer in viewers:
-            await create_notification(
-                db,
-                recipient_id=viewer.user_id,
-                type=models.NotificationType.proof_submission,
-                message=f"{current_user.username} submitted proof for milestone in '{goal.title}'",
-                actor_id=current_user.id,
-                goal_id=goal.id,
-                proof_id=db_proof.id
-            )
+        recipient_ids = viewers_result.scalars().all()
+        logger.debug(f"Proof creation: goal {goal.id} has {len(recipient_ids)} allowed viewers to notify")
     
     elif goal.privacy_setting == models.GoalPrivacy.friends:
         # Get all accepted friends
-        friends_stmt = select(models.Friend).where(
-            or_(
-                models.Friend.requester_id == current_user.id,
-                models.Friend.addressee_id == current_user.id
-            ),
-            models.Friend.status == models.FriendStatus.accepted
-        )
-        friends_result = await db.execute(friends_stmt)
-        friendships = friends_result.scalars().all()
-        
-        # Extract friend IDs and send notifications
-        for friendship in friendships:
-            friend_id = (friendship.addressee_id if friendship.requester_id == current_user.id 
-                        else friendship.requester_id)
-            
-            await create_notification(
-                db,
-                recipient_id=friend_id,
-                type=models.NotificationType.proof_submission,
-                message=f"{current_user.username} submitted proof for milestone in '{goal.title}'",
-                actor_id=current_user.id,
-                goal_id=goal.id,
-                proof_id=db_proof.id
-            )
+        recipient_ids = list(await friends_of(db, current_user.id))
+    
+    # One INSERT for the whole fan-out, committed together with the proof
+    await create_notifications_bulk(
+        db,
+        recipient_ids,
+        type=models.NotificationType.proof_submission,
+        message=f"{current_user.username} submitted proof for milestone in '{goal.title}'",
+        actor_id=current_user.id,
+        goal_id=goal.id,
+        proof_id=db_proof.id
+    )
     
     await db.commit()
     await db.refresh(db_proof)
 
+    # Thumbnails are generated after the response is sent
+    if settings.IMAGE_PIPELINE_ENABLED:
+        background_tasks.add_task(process_proof_image, db_proof.id, proof_in.storage_key)
+
     # 6. Get milestone details for response
     milestone_title = None
     milestone_description = None
@@ -575,7 +380,9 @@ async def verify_proof(
         raise HTTPException(status_code=400, detail="This proof has expired and can no longer be verified")
     
     # NEW: Enhanced access control check
-    if not await can_user_verify_proof(db, current_user.id, proof):
+    feed = ProofFeedBuilder(db, current_user.id, cached_friends=False)
+    await feed.load_access([proof])
+    if not feed.can_verify(proof):
         if proof.user_id == current_user.id:
             raise HTTPException(status_code=400, detail="Cannot verify your own proof")
         else:
@@ -600,9 +407,7 @@ async def verify_proof(
     db.add(verif)
     
     # 3.5 Fetch the goal for the notification message
-    goal_stmt = select(models.Goal).where(models.Goal.id == proof.goal_id)
-    goal_result = await db.execute(goal_stmt)
-    goal = goal_result.scalars().first()
+    goal = feed.goals.get(proof.goal_id)
     
     if not goal:
         raise HTTPException(status_code=404, detail="Goal not found")
@@ -637,9 +442,9 @@ async def verify_proof(
         proof.status = models.ProofStatus.rejected
 
     # 5. Create verification notification
-    await create_notification(
+    await create_notifications_bulk(
         db,
-        recipient_id=proof.user_id,
+        [proof.user_id],
         type=models.NotificationType.proof_verified,
         message=f"{current_user.username} {'approved' if verification.approved else 'rejected'} your proof for '{goal.title}'",
         actor_id=current_user.id,
@@ -650,63 +455,6 @@ async def verify_proof(
     await db.commit()
     
     # 6. Return the updated proof with all details
-    # Fetch updated proof with all verifications
-    verif_stmt = select(models.ProofVerification).where(
-        models.ProofVerification.proof_id == proof_id
-    )
-    verif_result = await db.execute(verif_stmt)
-    verifications = verif_result.scalars().all()
-    
-    # Get milestone details
-    milestone_title = None
-    milestone_description = None
-    if proof.milestone_id:
-        milestone_stmt = select(models.Milestone).where(models.Milestone.id == proof.milestone_id)
-        milestone_result = await db.execute(milestone_stmt)
-        milestone = milestone_result.scalars().first()
-        if milestone:
-            milestone_title = milestone.title
-            milestone_description = milestone.description
-    
-    # Transform verifications
-    verif_out = []
-    for v in verifications:
-        verifier_stmt = select(models.User).where(models.User.id == v.verifier_id)
-        verifier_result = await db.execute(verifier_stmt)
-        verifier = verifier_result.scalars().first()
-        
-        verif_out.append(schemas.ProofVerificationOut(
-            id=v.id,
-            verifier_id=v.verifier_id,
-            verifier_name=verifier.username if verifier else "Unknown",
-            approved=v.approved,
-            comment=v.comment,
-            timestamp=v.created_at
-        ))
-    
-    user_stmt = select(models.User).where(models.User.id == proof.user_id)
-    user_result = await db.execute(user_stmt)
-    user = user_result.scalars().first()
-    
-    goal_stmt = select(models.Goal).where(models.Goal.id == proof.goal_id)
-    goal_result = await db.execute(goal_stmt)
-    goal = goal_result.scalars().first()
-    
-    return schemas.ProofOut(
-        id=proof.id,
-        goal_id=proof.goal_id,
-        milestone_id=proof.milestone_id,
-        user_id=proof.user_id,
-        user_name=user.username if user else "Unknown", # Renamed from userName
-        image_url=proof.image_url,
-        caption=proof.caption,
-        status=proof.status,
-        requiredVerifications=proof.required_verifications,
-        uploadedAt=proof.uploaded_at,
-        verificationExpiresAt=proof.verification_expires_at,
-        verifications=verif_out,
-        goalTitle=goal.title if goal else "Unknown Goal",
-        milestoneTitle=milestone_title,
-        milestoneDescription=milestone_description,
-        canVerify=False  # After verification, user can no longer verify
-    )
\ No newline at end of file
+    proof_out, = await feed.build([proof])
+    proof_out.canVerify = False  # After verification, user can no longer verify
+    return proof_out
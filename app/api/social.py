@@ -1,194 +1,146 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.api import deps
+from app.api.pagination import NEXT_CURSOR_HEADER, keyset_paginate, set_next_cursor
 from app.schemas import social as schemas
 from app.db import models
-from app.services.notification import create_notification
+from app.services.notification import create_notifications_bulk
+from app.services.friend_graph import friend_counts_query, friend_list_query, friendship_between, invalidate_friendship
+from app.services.user_loader import UserLoader
 from uuid import UUID
+from typing import Optional
 
 router = APIRouter()
 
 @router.get("", response_model=list[schemas.FriendOut])
 async def list_friends(
-    db: AsyncSession = Depends(deps.get_db),
+    response: Response,
+    status: Optional[schemas.FriendListStatus] = None,
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size; all friendships if omitted"),
+    cursor: Optional[str] = Query(None, description=f"Value of the {NEXT_CURSOR_HEADER} header from the previous page"),
+    db: AsyncSession = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_user),
 ):
     """
-    List all friends and friend requests for the current user.
+    List all friends and friend requests for the current user, newest first.
     Returns both accepted friends and pending requests (both sent and received).
+    Optional status filter: 'accepted', 'pending_sent', 'pending_received'
+
+    With a limit, keyset-paginated on (added_at, id); the cursor for the
+    next page is returned in the X-Next-Cursor response header.
     """
-    # Get all friend relationships where current user is either requester or addressee
-    stmt = select(models.Friend).where(
-        or_(
-            models.Friend.requester_id == current_user.id,
-            models.Friend.addressee_id == current_user.id
-        )
-    )
+    stmt = friend_list_query(current_user.id, status)
+    if limit is None:
+        result = await db.execute(stmt.order_by(models.Friend.created_at.desc(), models.Friend.id.desc()))
+        return [schemas.FriendOut.model_validate(row) for row in result.all()]
+
+    stmt = keyset_paginate(stmt, models.Friend.created_at, models.Friend.id, limit, cursor)
     result = await db.execute(stmt)
-    friendships = result.scalars().all()
-    
-    # Transform the friendships into FriendOut schema format
-    friends_list = []
-    seen_user_ids = set()
-    
-    for friendship in friendships:
-        # Determine the other user's ID and the friendship status from current user's perspective
-        if friendship.requester_id == current_user.id:
-            # Current user sent the request
-            other_user_id = friendship.addressee_id
-            if friendship.status == models.FriendStatus.pending:
-                # Current user is waiting for their request to be accepted
-                status = "pending_sent"
-            else:
-                status = "accepted"
-        else:
-            # Current user received the request
-            other_user_id = friendship.requester_id
-            if friendship.status == models.FriendStatus.pending:
-                # Current user needs to accept/reject this request
-                status = "pending_received"
-            else:
-                status = "accepted"
-        
-        # Skip if we've already processed this user (deduplication)
-        if other_user_id in seen_user_ids:
-            continue
-            
-        seen_user_ids.add(other_user_id)
-        
-        # Get the other user's details
-        user_stmt = select(models.User).where(models.User.id == other_user_id)
-        user_result = await db.execute(user_stmt)
-        other_user = user_result.scalars().first()
-        
-        # Get the other user's profile for avatar URL
-        profile_stmt = select(models.UserProfile).where(models.UserProfile.user_id == other_user_id)
-        profile_result = await db.execute(profile_stmt)
-        profile = profile_result.scalars().first()
-        
-        if other_user:
-            friends_list.append(schemas.FriendOut(
-                id=str(friendship.id),
-                user_id=str(other_user.id),
-                name=other_user.username,
-                email=other_user.email,
-                avatar=profile.avatar_url if profile else None,  # Use actual avatar URL from profile
-                status=status,
-                added_at=friendship.created_at
-            ))
-    
-    return friends_list
+    rows = set_next_cursor(response, result.all(), limit, "added_at")
+    return [schemas.FriendOut.model_validate(row) for row in rows]
+
+@router.get("/counts", response_model=schemas.FriendCountsOut)
+async def count_friends(
+    db: AsyncSession = Depends(deps.get_read_db),
+    current_user: models.User = Depends(deps.get_current_user),
+):
+    """Number of accepted friends and of pending requests sent and received."""
+    result = await db.execute(friend_counts_query(current_user.id))
+    return schemas.FriendCountsOut(**dict(result.all()))
 
 @router.post("/requests", response_model=schemas.FriendOut)
 async def send_friend_request(
     request_in: schemas.FriendRequestCreateIn,
     db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
+    users: UserLoader = Depends(deps.get_user_loader),
 ):
     target_id = request_in.target_user_id
-    
-    # Check for existing reverse request (UX requirement)
-    stmt = select(models.Friend).where(
-        models.Friend.requester_id == target_id,
-        models.Friend.addressee_id == current_user.id,
-        models.Friend.status == models.FriendStatus.pending
+    if target_id == current_user.id:
+        raise HTTPException(status_code=400, detail="Cannot send friend request to yourself")
+
+    # There is at most one row per pair, in either direction
+    stmt = select(models.Friend).where(friendship_between(current_user.id, target_id)).with_for_update()
+    existing = (await db.execute(stmt)).scalars().first()
+
+    if existing is None:
+        # ON CONFLICT: a concurrent request for the same pair (either
+        # direction) got in first; handle its row like any existing one
+        inserted = await db.execute(
+            pg_insert(models.Friend)
+            .values(requester_id=current_user.id, addressee_id=target_id, status=models.FriendStatus.pending)
+            .on_conflict_do_nothing(constraint="uq_friends_pair")
+            .returning(models.Friend.id)
+        )
+        new_id = inserted.scalar()
+        if new_id is None:
+            existing = (await db.execute(stmt)).scalars().first()
+
+    reverse_request = (
+        existing if existing is not None
+        and existing.requester_id == target_id
+        and existing.status == models.FriendStatus.pending
+        else None
     )
-    result = await db.execute(stmt)
-    reverse_request = result.scalars().first()
 
     if reverse_request:
-        # Auto-accept
+        # Auto-accept (UX requirement)
         reverse_request.status = models.FriendStatus.accepted
-        await db.commit()
-        await db.refresh(reverse_request)
-        
-        await create_notification(
-            db, recipient_id=target_id, 
+        await create_notifications_bulk(
+            db, [target_id],
             type=models.NotificationType.friend_request_accepted,
             message=f"{current_user.username} accepted your friend request",
             actor_id=current_user.id
         )
+        await db.commit()
+        invalidate_friendship(current_user.id, target_id)
+        await db.refresh(reverse_request)
         
         # Get the other user's details for response
-        user_stmt = select(models.User).where(models.User.id == target_id)
-        user_result = await db.execute(user_stmt)
-        other_user = user_result.scalars().first()
-        
-        profile_stmt = select(models.UserProfile).where(models.UserProfile.user_id == target_id)
-        profile_result = await db.execute(profile_stmt)
-        profile = profile_result.scalars().first()
+        other_user = await users.load(target_id)
         
         return schemas.FriendOut(
             id=str(reverse_request.id),
             user_id=str(other_user.id),
             name=other_user.username,
             email=other_user.email,
-            avatar=profile.avatar_url if profile else None,
+            avatar=other_user.avatar_url,
             status="accepted",
             added_at=reverse_request.created_at
         )
 
-    # Check if a request already exists from current user to target
-    stmt = select(models.Friend).where(
-        models.Friend.requester_id == current_user.id,
-        models.Friend.addressee_id == target_id
-    )
-    result = await db.execute(stmt)
-    existing_request = result.scalars().first()
-    
-    if existing_request:
-        if existing_request.status == models.FriendStatus.pending:
+    if existing is not None:
+        if existing.status == models.FriendStatus.pending:
             raise HTTPException(status_code=400, detail="Friend request already sent")
-        elif existing_request.status == models.FriendStatus.accepted:
+        elif existing.status == models.FriendStatus.accepted:
             raise HTTPException(status_code=400, detail="Already friends")
-        elif existing_request.status == models.FriendStatus.blocked:
+        elif existing.status == models.FriendStatus.blocked:
             raise HTTPException(status_code=400, detail="Cannot send friend request")
-    
-    # Check if they are already friends (accepted) where current user is addressee
-    stmt = select(models.Friend).where(
-        models.Friend.requester_id == target_id,
-        models.Friend.addressee_id == current_user.id,
-        models.Friend.status == models.FriendStatus.accepted
-    )
-    result = await db.execute(stmt)
-    existing_friendship = result.scalars().first()
-    
-    if existing_friendship:
-        raise HTTPException(status_code=400, detail="Already friends")
+        # A rejected request can be sent again, reusing the pair's row
+        existing.requester_id, existing.addressee_id = current_user.id, target_id
+        existing.status = models.FriendStatus.pending
+        new_id = existing.id
 
-    # Create new request
-    new_friendship = models.Friend(
-        requester_id=current_user.id,
-        addressee_id=target_id,
-        status=models.FriendStatus.pending
-    )
-    db.add(new_friendship)
-    await db.commit()
-    await db.refresh(new_friendship)
-    
-    await create_notification(
-        db, recipient_id=target_id,
+    await create_notifications_bulk(
+        db, [target_id],
         type=models.NotificationType.friend_request,
         message=f"{current_user.username} sent you a friend request",
         actor_id=current_user.id
     )
+    await db.commit()
+    new_friendship = await db.get(models.Friend, new_id, populate_existing=True)
     
     # Get the other user's details for response
-    user_stmt = select(models.User).where(models.User.id == target_id)
-    user_result = await db.execute(user_stmt)
-    other_user = user_result.scalars().first()
-    
-    profile_stmt = select(models.UserProfile).where(models.UserProfile.user_id == target_id)
-    profile_result = await db.execute(profile_stmt)
-    profile = profile_result.scalars().first()
+    other_user = await users.load(target_id)
     
     return schemas.FriendOut(
         id=str(new_friendship.id),
         user_id=str(other_user.id),
         name=other_user.username,
         email=other_user.email,
-        avatar=profile.avatar_url if profile else None,
+        avatar=other_user.avatar_url,
         status="pending_sent",
         added_at=new_friendship.created_at
     )
@@ -198,6 +150,7 @@ async def accept_friend_request(
     friendship_id: UUID,
     db: AsyncSession = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_user),
+    users: UserLoader = Depends(deps.get_user_loader),
 ):
     """Accept a pending friend request."""
     # Find the friend request
@@ -215,34 +168,27 @@ async def accept_friend_request(
             detail="Friend request not found or you don't have permission to accept it"
         )
     
-    # Accept the request
+    # Accept the request and notify the requester in the same transaction
     friendship.status = models.FriendStatus.accepted
-    await db.commit()
-    await db.refresh(friendship)
-    
-    # Send notification to the requester
-    await create_notification(
-        db, recipient_id=friendship.requester_id,
+    await create_notifications_bulk(
+        db, [friendship.requester_id],
         type=models.NotificationType.friend_request_accepted,
         message=f"{current_user.username} accepted your friend request",
         actor_id=current_user.id
     )
+    await db.commit()
+    invalidate_friendship(friendship.requester_id, friendship.addressee_id)
+    await db.refresh(friendship)
     
     # Get the requester's details for response
-    user_stmt = select(models.User).where(models.User.id == friendship.requester_id)
-    user_result = await db.execute(user_stmt)
-    other_user = user_result.scalars().first()
-    
-    profile_stmt = select(models.UserProfile).where(models.UserProfile.user_id == friendship.requester_id)
-    profile_result = await db.execute(profile_stmt)
-    profile = profile_result.scalars().first()
+    other_user = await users.load(friendship.requester_id)
     
     return schemas.FriendOut(
         id=str(friendship.id),
         user_id=str(other_user.id),
         name=other_user.username,
         email=other_user.email,
-        avatar=profile.avatar_url if profile else None,
+        avatar=other_user.avatar_url,
         status="accepted",
         added_at=friendship.created_at
     )
@@ -272,6 +218,7 @@ async def decline_friend_request(
     # Delete the request (decline)
     await db.delete(friendship)
     await db.commit()
+    invalidate_friendship(friendship.requester_id, friendship.addressee_id)
     
     return None
 
@@ -303,5 +250,6 @@ async def remove_friend(
     # Delete the friendship (hard delete)
     await db.delete(friendship)
     await db.commit()
+    invalidate_friendship(friendship.requester_id, friendship.addressee_id)
     
     return None
\ No newline at end of file
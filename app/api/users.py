@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_
-from typing import List
+from sqlalchemy import select
+from typing import List, Optional
 
 from app.db import models
 from app.api import deps
 from app.schemas import user as schemas
 from app.api.deps import get_current_user
+from app.api.pagination import (
+    NEXT_CURSOR_HEADER, decode_rank_cursor, encode_rank_cursor, keyset_paginate, set_next_cursor,
+)
+from app.services.user_search import user_search_query
 
 router = APIRouter()
 
@@ -86,66 +90,27 @@ async def get_me(current_user: models.User = Depends(get_current_user)):
 
 @router.get("/search", response_model=List[schemas.UserSearchResult])
 async def search_users(
-    email: str = Query(..., description="Email to search for"),
-    db: AsyncSession = Depends(deps.get_db),
+    response: Response,
+    email: str = Query(..., description="Email or username (or part of one) to search for"),
+    limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description=f"Value of the {NEXT_CURSOR_HEADER} header from the previous page"),
+    db: AsyncSession = Depends(deps.get_read_db),
     current_user: models.User = Depends(get_current_user),
 ):
     """
-    Search for users by email to add as friends.
-    Returns users that match the email query, along with friendship status.
+    Search for users by email or username to add as friends, best matches first.
+    Returns users that match the query, along with friendship status.
+
+    Terms shorter than three characters match prefixes only. The cursor for
+    the next page is returned in the X-Next-Cursor response header.
     """
-    # Search for users matching the email
-    search_stmt = select(models.User).where(
-        models.User.email.ilike(f"%{email}%"),
-        models.User.id != current_user.id  # Don't return current user
-    ).limit(10)
-    
-    result = await db.execute(search_stmt)
-    matching_users = result.scalars().all()
-    
-    if not matching_users:
+    term = email.strip()
+    if not term:
         return []
-    
-    # Get current user's friendships to determine status
-    friendships_stmt = select(models.Friend).where(
-        or_(
-            models.Friend.requester_id == current_user.id,
-            models.Friend.addressee_id == current_user.id
-        )
-    )
-    friendships_result = await db.execute(friendships_stmt)
-    friendships = friendships_result.scalars().all()
-    
-    # Create a dict for quick lookup
-    friendship_map = {}
-    for friendship in friendships:
-        other_user_id = (friendship.addressee_id if friendship.requester_id == current_user.id else friendship.requester_id)
-        friendship_map[other_user_id] = friendship
-    
-    results = []
-    for user in matching_users:
-        # Get the user's profile
-        profile_stmt = select(models.UserProfile).where(models.UserProfile.user_id == user.id)
-        profile_result = await db.execute(profile_stmt)
-        profile = profile_result.scalars().first()
-        
-        # Determine friendship status
-        is_friend = False
-        has_pending_request = False
-        if user.id in friendship_map:
-            friendship = friendship_map[user.id]
-            if friendship.status == models.FriendStatus.accepted:
-                is_friend = True
-            elif friendship.status == models.FriendStatus.pending:
-                has_pending_request = True
-        
-        results.append(schemas.UserSearchResult(
-            id=user.id,
-            email=user.email,
-            username=user.username,
-            avatar_url=profile.avatar_url if profile else None,
-            is_friend=is_friend,
-            has_pending_request=has_pending_request
-        ))
-    
-    return results
+
+    search = user_search_query(current_user.id, term)
+    stmt = keyset_paginate(search, search.selected_columns.rank, models.User.id, limit, cursor,
+                           decode=decode_rank_cursor)
+    result = await db.execute(stmt)
+    rows = set_next_cursor(response, result.all(), limit, "rank", encode=encode_rank_cursor)
+    return [schemas.UserSearchResult.model_validate(row) for row in rows]
@@ -30,10 +30,58 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = "accountability_hub"
     DATABASE_URL: str = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}/{POSTGRES_DB}"
 
+    # Server (python -m app.server)
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WEB_CONCURRENCY: Optional[int] = None  # Worker processes; None = one per usable CPU (affinity, cgroup quota) under app.server, else 1
+    GRACEFUL_SHUTDOWN_SECONDS: int = 30  # How long in-flight requests may run after SIGTERM
+
+    # Request instrumentation (Prometheus metrics at /metrics). Not served by
+    # the app: each worker serves its own metrics on an internal port, the
+    # first free one from METRICS_PORT up, so scrape METRICS_PORT ..
+    # METRICS_PORT + WEB_CONCURRENCY - 1 as separate targets
+    METRICS_ENABLED: bool = True
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int = 9100
+    SLOW_REQUEST_SECONDS: float = 1.0  # Log requests slower than this
+    SLOW_REQUEST_QUERY_COUNT: int = 25  # Log requests issuing at least this many SQL statements
+
+    # Connection pool (per worker process)
+    # Budget for the whole deployment, including each worker's dedicated
+    # LISTEN connection and the elected job leader's one connection; keep
+    # under Postgres max_connections
+    DB_MAX_CONNECTIONS: int = 40
+    DB_POOL_SIZE: Optional[int] = None  # None = the worker's share of the budget minus overflow
+    DB_MAX_OVERFLOW: int = 5  # Lowered when the worker's share cannot fit it
+    DB_POOL_TIMEOUT: float = 10  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 30 * 60  # Reconnect connections older than this (seconds)
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # Prepared statements per connection; 0 behind PgBouncer
+    DB_STATEMENT_TIMEOUT_MS: int = 30_000  # Server-side statement_timeout
+
+    # Read replica (optional); read-only endpoints use it through deps.get_read_db
+    READ_REPLICA_URL: Optional[str] = None
+    READ_REPLICA_MAX_CONNECTIONS: Optional[int] = None  # Budget on the replica server; None = DB_MAX_CONNECTIONS
+    READ_REPLICA_MAX_LAG_SECONDS: float = 5  # Fall back to the primary when the replica is further behind
+    READ_REPLICA_CHECK_INTERVAL_SECONDS: float = 5  # How long a lag measurement is reused
+
     # Authentication
     SECRET_KEY: str = "CHANGE_THIS_IN_PRODUCTION_TO_A_STRONG_RANDOM_STRING"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    # A user change (deactivation, rename, deletion) drops the cached user at
+    # once in the worker that made it; every other worker keeps serving the
+    # old snapshot, and accepting a deactivated or deleted user's tokens, for
+    # up to AUTH_CACHE_TTL_SECONDS
+    AUTH_CACHE_TTL_SECONDS: int = 60  # How stale a cached user may get in other workers; 0 disables
+    AUTH_CACHE_MAX_SIZE: int = 10_000
+    # Friend sets for feeds and lists; permission checks always query the primary
+    FRIEND_GRAPH_CACHE_TTL_SECONDS: int = 30  # How stale friend sets may get in other workers; 0 disables
+    FRIEND_GRAPH_CACHE_MAX_SIZE: int = 10_000
+    ARGON2_TIME_COST: int = 3  # Changing any of these rehashes each password at its next successful login
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASH_WORKERS: Optional[int] = None  # Hashing threads; None = min(4, CPU count)
 
     # Storage (MinIO)
     MINIO_ENDPOINT: str = "localhost:9000"
@@ -42,6 +90,46 @@ class Settings(BaseSettings):
     PROOF_BUCKET: str = "goal-proofs"
     SECURE_STORAGE: bool = False  # Set True for HTTPS/S3
     MINIO_PUBLIC_ENDPOINT: Optional[str] = None  # Publicly accessible endpoint for client-side uploads
+    STORAGE_BACKEND: str = "s3"  # "s3" (MinIO/S3) or "local" (filesystem, for tests/dev)
+    STORAGE_MAX_POOL_CONNECTIONS: int = 20  # boto3 connection pool and storage I/O threads
+    MAX_PROOF_UPLOAD_BYTES: int = 10 * 1024 * 1024
+
+    # Proof image pipeline (thumbnail/medium WebP variants)
+    IMAGE_PIPELINE_ENABLED: bool = True
+    IMAGE_PIPELINE_WORKERS: int = 2
+    IMAGE_THUMBNAIL_SIZE: int = 320  # Longest edge, px
+    IMAGE_MEDIUM_SIZE: int = 1280
+    IMAGE_WEBP_QUALITY: int = 80
+    LOCAL_STORAGE_PATH: str = "./storage"
+    LOCAL_STORAGE_BASE_URL: str = "http://localhost:8000/storage"
+
+    # Background jobs
+    LEADER_ELECTION_INTERVAL_SECONDS: int = 10  # Only the lock holder among all workers runs the periodic jobs
+    PROOF_EXPIRY_ENABLED: bool = True  # Run the expiry sweeper inside the API process
+    PROOF_EXPIRY_INTERVAL_SECONDS: int = 60
+    PROOF_EXPIRY_BATCH_SIZE: int = 500  # Proofs expired (and notified) per transaction
+    # Overdue milestones are failed only by this job, so a milestone can still
+    # read as open for up to MILESTONE_EXPIRY_INTERVAL_SECONDS after its due_date
+    # has passed (GET /goals no longer fails them as it reads)
+    MILESTONE_EXPIRY_ENABLED: bool = True  # Fail overdue milestones on a timer
+    MILESTONE_EXPIRY_INTERVAL_SECONDS: int = 5 * 60
+    MILESTONE_EXPIRY_BATCH_SIZE: int = 500  # Milestones failed per transaction
+    NOTIFICATION_STREAM_ENABLED: bool = True  # LISTEN/NOTIFY push behind /notifications/stream
+    NOTIFICATION_STREAM_HEARTBEAT_SECONDS: int = 15
+    NOTIFICATION_STREAM_TICKET_SECONDS: int = 60  # Lifetime of the single-use ticket that opens a stream
+    # Notification retention (app/services/notification_retention.py) is opt-in:
+    # once enabled, every NOTIFICATION_RETENTION_INTERVAL_SECONDS it removes read
+    # notifications older than NOTIFICATION_READ_TTL_DAYS and archived ones older
+    # than NOTIFICATION_ARCHIVED_TTL_DAYS (by created_at) from
+    # partner_notifications, NOTIFICATION_RETENTION_BATCH_SIZE rows per
+    # transaction. Unread notifications are never touched.
+    # `python -m app.services.notification_retention` applies it once by hand
+    NOTIFICATION_RETENTION_ENABLED: bool = False
+    NOTIFICATION_RETENTION_MODE: str = "archive"  # "archive" (move to partner_notifications_archive) or "delete"
+    NOTIFICATION_READ_TTL_DAYS: Optional[int] = 90  # None keeps read notifications forever
+    NOTIFICATION_ARCHIVED_TTL_DAYS: Optional[int] = 30  # None keeps archived notifications forever
+    NOTIFICATION_RETENTION_BATCH_SIZE: int = 1000
+    NOTIFICATION_RETENTION_INTERVAL_SECONDS: int = 60 * 60
 
     class Config:
         env_file = ".env"
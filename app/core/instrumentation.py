@@ -0,0 +1,138 @@
+"""
+Per-request timing and database instrumentation.
+
+RequestMetricsMiddleware opens a RequestStats for every HTTP request in a
+context variable. SQLAlchemy cursor events (every engine) and the pool's
+checkout timer (app/db/session.py) add to it. When the response is sent,
+the middleware records per-route histograms. It logs the request if it
+crossed SLOW_REQUEST_SECONDS or SLOW_REQUEST_QUERY_COUNT, which makes N+1
+query regressions stand out.
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger("backend")
+
+# Queries per request
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+db_queries = metrics.counter("db_queries_total", "SQL statements executed")
+db_query_seconds = metrics.histogram("db_query_seconds", "SQL statement execution time")
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "pool_wait_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def record_pool_wait(seconds: float) -> None:
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+
+# AsyncSession runs these sync events in a greenlet that shares the calling
+# task's context, so the request's RequestStats is visible here
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    db_queries.inc()
+    db_query_seconds.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def _route_template(scope) -> str:
+    """The matched route's path template (/api/v1/proofs/{proof_id}), never the raw path."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware, so the request runs in the caller's context and
+    streaming responses are not buffered. Timing stops when the last body
+    chunk is sent; background tasks that run afterwards are not counted.
+    Event streams are skipped since their duration is the connection's.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        response = {"status": 500, "stream": False, "seconds": None}
+
+        def finish():
+            response.update(
+                seconds=time.perf_counter() - started, queries=stats.queries,
+                db_seconds=stats.db_seconds, pool_wait_seconds=stats.pool_wait_seconds,
+            )
+
+        async def send_and_time(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["stream"] = any(
+                    key == b"content-type" and value.startswith(b"text/event-stream")
+                    for key, value in message.get("headers", ())
+                )
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_time)
+        finally:
+            _request_stats.reset(token)
+            if response["seconds"] is None:  # Failed before a complete response
+                finish()
+            if not response["stream"]:
+                self._record(scope, response)
+
+    @staticmethod
+    def _record(scope, response) -> None:
+        route = _route_template(scope)
+        labels = {"method": scope["method"], "route": route}
+        metrics.counter("http_requests_total", "HTTP requests", {**labels, "status": str(response["status"])}).inc()
+        metrics.histogram("http_request_duration_seconds", "HTTP request latency", labels=labels).observe(response["seconds"])
+        metrics.histogram("http_request_db_queries", "SQL statements per HTTP request",
+                          QUERY_COUNT_BUCKETS, labels).observe(response["queries"])
+        metrics.histogram("http_request_db_seconds", "SQL time per HTTP request",
+                          labels=labels).observe(response["db_seconds"])
+        metrics.histogram("http_request_pool_wait_seconds", "DB pool checkout wait per HTTP request",
+                          labels=labels).observe(response["pool_wait_seconds"])
+
+        if response["seconds"] >= settings.SLOW_REQUEST_SECONDS or response["queries"] >= settings.SLOW_REQUEST_QUERY_COUNT:
+            logger.warning(
+                f"Slow request {scope['method']} {route} -> {response['status']}: "
+                f"{response['seconds'] * 1000:.0f}ms, {response['queries']} queries "
+                f"({response['db_seconds'] * 1000:.0f}ms in DB, {response['pool_wait_seconds'] * 1000:.0f}ms waiting for a connection)"
+            )
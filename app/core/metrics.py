@@ -0,0 +1,208 @@
+"""
+Minimal in-process metrics registry.
+
+Metrics are per process; values are plain numbers updated from the event
+loop (and from executor threads under a lock), cheap enough for hot paths.
+Each worker serves its own registry on an internal port (serve_metrics),
+one scrape target per worker, so no counter is ever read from a different
+process than the one before.
+"""
+import asyncio
+import bisect
+import logging
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+# Seconds; suits request latency, DB time and pool waits alike
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Optional[Dict[str, str]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Counter:
+    """Monotonically increasing count."""
+
+    def __init__(self, name: str, description: str, labels: Labels = None):
+        self.name = name
+        self.description = description
+        self.labels = labels or {}
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """Value that can go up and down."""
+
+    def __init__(self, name: str, description: str, labels: Labels = None):
+        self.name = name
+        self.description = description
+        self.labels = labels or {}
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(-amount)
+
+
+class Histogram:
+    """Cumulative-bucket distribution of observed values (Prometheus style)."""
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS, labels: Labels = None):
+        self.name = name
+        self.description = description
+        self.labels = labels or {}
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> float:
+        return self.count
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (inf if past the last bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    """
+    Metrics by name and label set. Labelled metrics are created on first use,
+    so label values must come from a small fixed set (route templates, not
+    raw paths).
+    """
+
+    def __init__(self):
+        self._metrics: Dict[Tuple[str, tuple], object] = {}
+
+    def _register(self, cls, name: str, description: str, labels: Labels = None, **kwargs):
+        key = (name, tuple(sorted(labels.items())) if labels else ())
+        metric = self._metrics.get(key)
+        if metric is None:
+            metric = self._metrics[key] = cls(name, description, labels=labels, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} is already registered as {type(metric).__name__}")
+        return metric
+
+    def counter(self, name: str, description: str = "", labels: Labels = None) -> Counter:
+        return self._register(Counter, name, description, labels)
+
+    def gauge(self, name: str, description: str = "", labels: Labels = None) -> Gauge:
+        return self._register(Gauge, name, description, labels)
+
+    def histogram(self, name: str, description: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS,
+                  labels: Labels = None) -> Histogram:
+        return self._register(Histogram, name, description, labels, buckets=buckets)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {name + _format_labels(metric.labels): metric.value for (name, _), metric in list(self._metrics.items())}
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        families: Dict[str, list] = {}
+        for (name, _), metric in list(self._metrics.items()):
+            families.setdefault(name, []).append(metric)
+
+        lines = []
+        for name, members in sorted(families.items()):
+            kind = {Counter: "counter", Gauge: "gauge", Histogram: "histogram"}[type(members[0])]
+            lines.append(f"# HELP {name} {members[0].description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for metric in members:
+                if kind != "histogram":
+                    lines.append(f"{name}{_format_labels(metric.labels)} {metric.value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float("inf"),), metric.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    lines.append(f"{name}_bucket{_format_labels({**metric.labels, 'le': le})} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(metric.labels)} {metric.sum}")
+                lines.append(f"{name}_count{_format_labels(metric.labels)} {metric.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+logger = logging.getLogger("backend")
+
+METRICS_READ_TIMEOUT_SECONDS = 5
+
+
+async def _serve_scrape(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Answer one plain HTTP/1.x request: GET /metrics, anything else 404."""
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), METRICS_READ_TIMEOUT_SECONDS)
+        while (await asyncio.wait_for(reader.readline(), METRICS_READ_TIMEOUT_SECONDS)).strip():
+            pass  # Headers are not needed
+        parts = request_line.split()
+        if len(parts) >= 2 and parts[0] == b"GET" and parts[1].split(b"?")[0] == b"/metrics":
+            status, body = b"200 OK", metrics.render_prometheus().encode()
+        else:
+            status, body = b"404 Not Found", b"Not Found\n"
+        writer.write(
+            b"HTTP/1.1 " + status + b"\r\n"
+            b"Content-Type: text/plain; version=0.0.4\r\n"
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+            b"Connection: close\r\n\r\n" + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_metrics(host: str, first_port: int, ports: int) -> None:
+    """
+    Serve this process's metrics at http://host:port/metrics until cancelled,
+    on the first free port of first_port .. first_port + ports - 1. With one
+    port per worker each worker gets its own, and a restarted worker takes
+    over the port its predecessor released.
+    """
+    for port in range(first_port, first_port + ports):
+        try:
+            server = await asyncio.start_server(_serve_scrape, host, port)
+        except OSError:
+            continue  # Another worker's
+        logger.info(f"Serving metrics on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+    logger.warning(f"No free metrics port in {first_port}-{first_port + ports - 1}; metrics are not served")
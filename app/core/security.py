@@ -1,12 +1,27 @@
+import asyncio
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Optional, Tuple, Union
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.metrics import metrics
 
 # Migrated from bcrypt to Argon2 - no more 72-byte limit!
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__rounds=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
+
+# Cost parameters encoded in an Argon2 hash: $argon2id$v=19$m=65536,t=3,p=4$salt$hash
+_ARGON2_PARAMS = re.compile(r"^\$argon2(?:id|i|d)\$v=\d+\$m=(\d+),t=(\d+),p=(\d+)\$")
 
 ALGORITHM = "HS256"
 
@@ -33,3 +48,79 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     # Argon2 handles passwords of any length securely
     return pwd_context.hash(password)
+
+
+# --- Async hashing -------------------------------------------------------
+# Argon2 takes tens of milliseconds of CPU per call. The async helpers below
+# run it on a dedicated, bounded thread pool (argon2-cffi releases the GIL),
+# so a burst of logins queues here instead of stalling the event loop.
+
+HASH_WORKERS = settings.PASSWORD_HASH_WORKERS or min(4, os.cpu_count() or 1)
+
+_hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_slots: Optional[asyncio.Semaphore] = None
+
+hash_queue_depth = metrics.gauge("password_hash_queue_depth", "Password hash operations waiting for a worker")
+hash_in_flight = metrics.gauge("password_hash_in_flight", "Password hash operations running")
+hash_operations = metrics.counter("password_hash_operations_total", "Password hash/verify operations completed")
+hash_seconds = metrics.counter("password_hash_seconds_total", "Time spent hashing/verifying passwords")
+
+
+async def _run_hashing(fn, *args):
+    global _hash_slots
+    if _hash_slots is None:
+        _hash_slots = asyncio.Semaphore(HASH_WORKERS)
+
+    hash_queue_depth.inc()
+    try:
+        await _hash_slots.acquire()
+    finally:
+        hash_queue_depth.dec()
+    hash_in_flight.inc()
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+    finally:
+        hash_seconds.inc(time.perf_counter() - started)
+        hash_operations.inc()
+        hash_in_flight.dec()
+        _hash_slots.release()
+
+
+async def hash_password(password: str) -> str:
+    return await _run_hashing(get_password_hash, password)
+
+
+def hash_params_outdated(hashed_password: str) -> bool:
+    """
+    Whether a hash was made with other Argon2 memory/time/parallelism costs
+    than the configured ARGON2_* settings. Checked explicitly because
+    passlib's needs_update() does not compare every cost parameter.
+    """
+    match = _ARGON2_PARAMS.match(hashed_password)
+    if match is None:
+        return True
+    memory_cost, time_cost, parallelism = map(int, match.groups())
+    return (memory_cost, time_cost, parallelism) != (
+        settings.ARGON2_MEMORY_COST, settings.ARGON2_TIME_COST, settings.ARGON2_PARALLELISM
+    )
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    valid, new_hash = pwd_context.verify_and_update(plain_password, hashed_password)
+    if valid and new_hash is None and hash_params_outdated(hashed_password):
+        new_hash = pwd_context.hash(plain_password)
+    return valid, new_hash
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: Optional[str]
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password off the event loop. Returns (valid, new_hash); new_hash
+    is set when the password is valid but the stored hash's cost parameters
+    differ from ARGON2_* (raised or lowered), and should be saved.
+    """
+    if not hashed_password:
+        return False, None  # OAuth-only accounts have no password
+    return await _run_hashing(_verify_and_update, plain_password, hashed_password)
@@ -3,7 +3,7 @@ import uuid
 import enum
 from sqlalchemy import (
     Column, String, Boolean, ForeignKey, Integer, Text, Date, DateTime, 
-    Enum, func
+    Enum, Index, UniqueConstraint, Computed, func, text
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -67,6 +67,13 @@ class User(Base):
     is_active = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Trigram (pg_trgm) indexes serve the substring ILIKE of user search
+    __table_args__ = (
+        Index("ix_users_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
+        Index("ix_users_username_trgm", "username", postgresql_using="gin",
+              postgresql_ops={"username": "gin_trgm_ops"}),
+    )
+
     profile = relationship("UserProfile", back_populates="user", uselist=False)
     goals = relationship("Goal", back_populates="owner")
     
@@ -84,6 +91,9 @@ class UserProfile(Base):
 
 class Goal(Base):
     __tablename__ = "goals"
+    __table_args__ = (
+        Index("ix_goals_user_status", "user_id", "status"),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     title = Column(String, nullable=False)
@@ -114,6 +124,9 @@ class Goal(Base):
 
 class GoalAllowedViewer(Base):
     __tablename__ = "goal_allowed_viewers"
+    __table_args__ = (
+        Index("ix_goal_allowed_viewers_user", "user_id"),
+    )
     goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id"), primary_key=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
     can_verify = Column(Boolean, default=True)
@@ -123,6 +136,11 @@ class GoalAllowedViewer(Base):
 
 class Milestone(Base):
     __tablename__ = "milestones"
+    __table_args__ = (
+        Index("ix_milestones_goal_due", "goal_id", "due_date"),
+        Index("ix_milestones_open_due", "due_date",
+              postgresql_where=text("completed = false")),  # Overdue milestone sweep
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id"), nullable=False)
     title = Column(String, nullable=False)
@@ -143,12 +161,20 @@ class Milestone(Base):
 
 class Proof(Base):
     __tablename__ = "proofs"
+    __table_args__ = (
+        Index("ix_proofs_user_uploaded", "user_id", "uploaded_at", "id"),
+        Index("ix_proofs_goal_status", "goal_id", "status"),
+        Index("ix_proofs_pending_expires", "verification_expires_at",
+              postgresql_where=text("status = 'pending'")),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id"), nullable=False)
     milestone_id = Column(UUID(as_uuid=True), ForeignKey("milestones.id"))
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     
     image_url = Column(String, nullable=False)
+    thumbnail_url = Column(String)  # Set by the image pipeline after upload
+    medium_url = Column(String)
     caption = Column(Text)
     status = Column(Enum(ProofStatus), default=ProofStatus.pending)
     required_verifications = Column(Integer, default=1)
@@ -162,6 +188,10 @@ class Proof(Base):
 
 class ProofVerification(Base):
     __tablename__ = "proof_verifications"
+    __table_args__ = (
+        Index("ix_proof_verifications_proof_verifier", "proof_id", "verifier_id"),
+        Index("ix_proof_verifications_verifier_created", "verifier_id", "created_at"),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     proof_id = Column(UUID(as_uuid=True), ForeignKey("proofs.id"), nullable=False)
     verifier_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -174,14 +204,41 @@ class ProofVerification(Base):
 
 class Friend(Base):
     __tablename__ = "friends"
+    __table_args__ = (
+        Index("ix_friends_requester_status", "requester_id", "status"),
+        Index("ix_friends_addressee_status", "addressee_id", "status"),
+        # A->B and B->A are the same friendship, so the unordered pair is unique
+        UniqueConstraint("user_low_id", "user_high_id", name="uq_friends_pair"),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     requester_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     addressee_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     status = Column(Enum(FriendStatus), default=FriendStatus.pending)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Canonical (smaller, larger) user ids, maintained by Postgres; pair
+    # lookups in either direction are one probe of uq_friends_pair
+    user_low_id = Column(UUID(as_uuid=True), Computed("LEAST(requester_id, addressee_id)", persisted=True))
+    user_high_id = Column(UUID(as_uuid=True), Computed("GREATEST(requester_id, addressee_id)", persisted=True))
+
+class FriendDuplicateArchive(Base):
+    """Duplicate friendship rows removed before the pair became unique; no foreign keys."""
+    __tablename__ = "friends_duplicates_archive"
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    kept_id = Column(UUID(as_uuid=True), nullable=False)  # The row of the pair that stayed in friends
+    requester_id = Column(UUID(as_uuid=True), nullable=False)
+    addressee_id = Column(UUID(as_uuid=True), nullable=False)
+    status = Column(Enum(FriendStatus))
+    created_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class PartnerNotification(Base):
     __tablename__ = "partner_notifications"
+    __table_args__ = (
+        Index("ix_partner_notifications_recipient_created", "recipient_id", "created_at", "id"),
+        Index("ix_partner_notifications_recipient_status_created", "recipient_id", "status", "created_at"),
+        Index("ix_partner_notifications_status_created", "status", "created_at"),  # Retention sweeps
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     recipient_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     actor_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
@@ -194,8 +251,41 @@ class PartnerNotification(Base):
     status = Column(Enum(NotificationState), default=NotificationState.unread)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class PartnerNotificationArchive(Base):
+    """Cold storage for notifications moved out by the retention job; no foreign keys."""
+    __tablename__ = "partner_notifications_archive"
+    __table_args__ = (
+        Index("ix_partner_notifications_archive_recipient_created", "recipient_id", "created_at"),
+    )
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    recipient_id = Column(UUID(as_uuid=True), nullable=False)
+    actor_id = Column(UUID(as_uuid=True))
+    type = Column(Enum(NotificationType), nullable=False)
+    goal_id = Column(UUID(as_uuid=True))
+    proof_id = Column(UUID(as_uuid=True))
+    message = Column(Text, nullable=False)
+    status = Column(Enum(NotificationState))
+    created_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class NotificationCounter(Base):
+    """Denormalized per-user unread count, kept in step with partner_notifications."""
+    __tablename__ = "notification_counters"
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    unread_count = Column(Integer, default=0, server_default="0", nullable=False)
+
+class NotificationStreamTicket(Base):
+    """Short-lived, single-use credential for opening /notifications/stream; only its hash is stored."""
+    __tablename__ = "notification_stream_tickets"
+    ticket_hash = Column(String(64), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
 class DailyTask(Base):
     __tablename__ = "daily_tasks"
+    __table_args__ = (
+        Index("ix_daily_tasks_user_created", "user_id", "created_at"),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id"), nullable=True)
@@ -214,6 +304,9 @@ class GoalTemplate(Base):
 
 class IntervalChangeRequest(Base):
     __tablename__ = "interval_change_requests"
+    __table_args__ = (
+        Index("ix_interval_change_requests_goal_status", "goal_id", "status"),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id"), nullable=False)
     requester_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -1,7 +1,274 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import asyncio
+import logging
+import math
+import os
+import time
+from typing import Optional, Tuple
+
+from sqlalchemy import event, exc, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.instrumentation import record_pool_wait
+
+logger = logging.getLogger("backend")
+
+pool_wait_seconds = metrics.histogram("db_pool_wait_seconds", "Time spent waiting to check out a DB connection")
+pool_timeouts = metrics.counter("db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT")
+replica_lag_seconds = metrics.gauge("db_replica_lag_seconds", "Replication lag at the last replica check")
+replica_fallbacks = metrics.counter("db_replica_fallbacks_total", "Read sessions sent to the primary because the replica was behind or down")
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_timeouts.inc()
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            pool_wait_seconds.observe(waited)
+            record_pool_wait(waited)
+
+
+def _cgroup_cpu_quota() -> Optional[float]:
+    """CPU quota of this container's cgroup (v2, else v1) in CPUs, or None if unlimited."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+    except (OSError, ValueError):
+        return None
+    return quota / period if quota > 0 and period > 0 else None
+
+
+def usable_cpus() -> int:
+    """CPUs this process may run on (its affinity set), capped by the cgroup CPU quota rounded up."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # No sched_getaffinity outside Linux
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(cpus, 1)
+
+
+def launcher_worker_count() -> int:
+    """
+    Worker processes app.server starts: WEB_CONCURRENCY, else one per
+    usable CPU, as many as DB_MAX_CONNECTIONS can give a pooled connection
+    plus their dedicated ones, after the leader's.
+    """
+    if settings.WEB_CONCURRENCY:
+        return settings.WEB_CONCURRENCY
+    affordable = max(pooled_budget() // (dedicated_connections() + 1), 1)
+    return min(usable_cpus(), affordable)
+
+
+def worker_count() -> int:
+    """
+    Worker processes sharing DB_MAX_CONNECTIONS with this one: WEB_CONCURRENCY,
+    which app.server sets for its workers, else 1 (a bare uvicorn, a script).
+    """
+    return settings.WEB_CONCURRENCY or 1
+
+
+def dedicated_connections() -> int:
+    """
+    Connections each worker holds on the primary outside the engine pool:
+    the notification LISTEN connection (notification_stream.run_notification_listener).
+    """
+    return int(settings.NOTIFICATION_STREAM_ENABLED)
+
+
+def pooled_budget() -> int:
+    """
+    DB_MAX_CONNECTIONS less the one connection the elected job leader takes
+    out of its pool (job_leader.run_as_leader), when periodic jobs run.
+    Campaigning workers only borrow a pool connection per attempt.
+    """
+    leader = settings.PROOF_EXPIRY_ENABLED or settings.MILESTONE_EXPIRY_ENABLED or settings.NOTIFICATION_RETENTION_ENABLED
+    return settings.DB_MAX_CONNECTIONS - int(leader)
+
+
+def pool_limits(max_connections: int, reserved: int = 0) -> Tuple[int, int]:
+    """
+    (pool_size, max_overflow) for one worker's engine so that all workers
+    together never open more than max_connections, after reserving
+    `reserved` dedicated connections per worker. Overflow shrinks to fit;
+    a budget too small for one pooled connection per worker, or a
+    DB_POOL_SIZE larger than the worker's share, is a configuration error.
+    """
+    workers = worker_count()
+    per_worker = max_connections // workers - reserved
+    if per_worker < 1:
+        raise RuntimeError(
+            f"A connection budget of {max_connections} cannot serve {workers} workers "
+            f"with {reserved} dedicated connections each"
+        )
+    if settings.DB_POOL_SIZE is None:
+        max_overflow = min(settings.DB_MAX_OVERFLOW, per_worker - 1)
+        return per_worker - max_overflow, max_overflow
+    if settings.DB_POOL_SIZE > per_worker:
+        raise RuntimeError(
+            f"DB_POOL_SIZE={settings.DB_POOL_SIZE} exceeds the {per_worker} connections "
+            f"each of {workers} workers may use"
+        )
+    pool_size = settings.DB_POOL_SIZE
+    max_overflow = min(settings.DB_MAX_OVERFLOW, per_worker - pool_size)
+    return pool_size, max_overflow
+
+
+def build_engine(url: str = None, pool_size: int = None, max_overflow: int = None, name: str = "primary") -> AsyncEngine:
+    """
+    Engine with an instrumented pool, by default sized to this worker's share
+    of the primary's budget. name labels its connections-in-use gauge.
+    """
+    if pool_size is None or max_overflow is None:
+        default_size, default_overflow = pool_limits(pooled_budget(), reserved=dedicated_connections())
+        pool_size = pool_size or default_size
+        max_overflow = default_overflow if max_overflow is None else max_overflow
+    engine = create_async_engine(
+        url or settings.DATABASE_URL,
+        echo=False,
+        future=True,  # Future=True for 2.0 style syntax
+        poolclass=TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            # asyncpg's and SQLAlchemy's prepared-statement caches; set to 0
+            # behind PgBouncer in transaction mode
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "server_settings": {
+                "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS),
+                "application_name": settings.PROJECT_NAME,
+            },
+        },
+    )
+
+    pool_in_use = metrics.gauge("db_pool_connections_in_use", "DB connections currently checked out", {"engine": name})
+
+    @event.listens_for(engine.sync_engine.pool, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_in_use.inc()
+
+    @event.listens_for(engine.sync_engine.pool, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        pool_in_use.dec()
+
+    @event.listens_for(engine.sync_engine.pool, "detach")
+    def _detach(dbapi_connection, connection_record):
+        pool_in_use.dec()  # Checked out, then taken out of the pool for good (the job leader)
+
+    return engine
+
+
+engine = build_engine()
+SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+# Replay lag of the replica in seconds: 0 on a primary or when everything
+# received has been replayed (an idle primary sends nothing to replay, so the
+# last replay timestamp alone would overstate lag)
+REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float8, 'infinity')
+    END
+""")
+REPLICA_CHECK_TIMEOUT_SECONDS = 2
+
+
+class ReplicaMonitor:
+    """
+    Decides whether reads may go to the replica, re-measuring lag at most once
+    per READ_REPLICA_CHECK_INTERVAL_SECONDS. An unreachable replica counts as
+    unusable until the next check.
+    """
+
+    def __init__(self, replica_engine: AsyncEngine):
+        self.engine = replica_engine
+        self._usable = False
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return time.monotonic() - self._checked_at < settings.READ_REPLICA_CHECK_INTERVAL_SECONDS
+
+    async def _measure_lag(self) -> float:
+        async with self.engine.connect() as conn:
+            return (await conn.execute(REPLICA_LAG_QUERY)).scalar()
+
+    async def is_usable(self) -> bool:
+        if self._fresh():
+            return self._usable
+        async with self._lock:
+            if self._fresh():
+                return self._usable  # Measured while we waited for the lock
+            try:
+                lag = await asyncio.wait_for(self._measure_lag(), REPLICA_CHECK_TIMEOUT_SECONDS)
+                replica_lag_seconds.set(lag)
+                self._usable = lag <= settings.READ_REPLICA_MAX_LAG_SECONDS
+                if not self._usable:
+                    logger.warning(f"Read replica is {lag:.1f}s behind; reading from the primary")
+            except Exception:
+                logger.warning("Read replica check failed; reading from the primary", exc_info=True)
+                self._usable = False
+            self._checked_at = time.monotonic()
+        return self._usable
+
+
+# The replica is a separate server with its own budget and no dedicated
+# connections; its sessions run in READ ONLY transactions, so a write
+# slipping into a read endpoint fails
+read_engine = build_engine(
+    settings.READ_REPLICA_URL,
+    *pool_limits(settings.READ_REPLICA_MAX_CONNECTIONS or settings.DB_MAX_CONNECTIONS),
+    name="replica",
+) if settings.READ_REPLICA_URL else None
+replica_monitor = ReplicaMonitor(read_engine) if read_engine else None
+ReplicaSessionLocal = sessionmaker(
+    read_engine.execution_options(postgresql_readonly=True),
+    class_=AsyncSession, expire_on_commit=False, info={"replica": True}
+) if read_engine else None
+
+
+def is_replica_session(db: AsyncSession) -> bool:
+    """Whether db reads from the replica, so its results may trail the primary."""
+    return db.info.get("replica", False)
+
+
+async def read_session_factory() -> Optional[sessionmaker]:
+    """Session factory for a read-only request: the replica's if it is caught up, else None (read from the primary)."""
+    if replica_monitor is None:
+        return None
+    if await replica_monitor.is_usable():
+        return ReplicaSessionLocal
+    replica_fallbacks.inc()
+    return None
+
 
-# Future=True for 2.0 style syntax
-engine = create_async_engine(settings.DATABASE_URL, echo=False, future=True)
-SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
\ No newline at end of file
+async def dispose_engines() -> None:
+    """Close every pooled connection; called once on worker shutdown."""
+    await engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
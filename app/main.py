@@ -1,9 +1,47 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.instrumentation import RequestMetricsMiddleware
+from app.core.metrics import serve_metrics
+from app.api import local_storage
 from app.api.router import api_router
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.services.proof_expiry import run_proof_expiry_worker
+from app.services.milestone_expiry import run_milestone_expiry_worker
+from app.services.notification_stream import run_notification_listener
+from app.services.notification_retention import run_notification_retention_worker
+from app.services.job_leader import run_as_leader
+from app.db.session import dispose_engines, worker_count
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Periodic jobs run off the request path, in one elected worker
+    periodic = []
+    if settings.PROOF_EXPIRY_ENABLED:
+        periodic.append(run_proof_expiry_worker)
+    if settings.MILESTONE_EXPIRY_ENABLED:
+        periodic.append(run_milestone_expiry_worker)
+    if settings.NOTIFICATION_RETENTION_ENABLED:
+        periodic.append(run_notification_retention_worker)
+    jobs = [asyncio.create_task(run_as_leader(periodic))]
+    # Every worker needs its own listener to feed its stream subscribers
+    if settings.NOTIFICATION_STREAM_ENABLED:
+        jobs.append(asyncio.create_task(run_notification_listener()))
+    if settings.METRICS_ENABLED:
+        jobs.append(asyncio.create_task(serve_metrics(settings.METRICS_HOST, settings.METRICS_PORT, worker_count())))
+    yield
+    for job in jobs:
+        job.cancel()
+        with suppress(asyncio.CancelledError):
+            await job
+    await dispose_engines()
 
-app = FastAPI(title=settings.PROJECT_NAME)
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
 # CORS (Allow Next.js frontend)
 app.add_middleware(
@@ -17,10 +55,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+if settings.METRICS_ENABLED:
+    app.add_middleware(RequestMetricsMiddleware)
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# The filesystem storage backend's URLs are served by the app itself
+if settings.STORAGE_BACKEND == "local":
+    app.include_router(local_storage.router, prefix=local_storage.mount_path(), include_in_schema=False)
+
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
@@ -1,17 +1,28 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal
 from uuid import UUID
 from datetime import datetime
 from app.db.models import ProofStatus
 from .common import UserSummaryOut
 from typing import Any
 
+# Which part of the proof feed to list: own submissions, proofs to verify, or both
+ProofFeedScope = Literal["all", "mine", "to_verify"]
+
 class ProofCreateIn(BaseModel):
     goal_id: UUID
     milestone_id: Optional[UUID] = None
     caption: Optional[str] = None
     storage_key: str  # Uploaded file key from MinIO
 
+class UploadUrlRequestIn(BaseModel):
+    filename: str
+    content_type: str
+    size: Optional[int] = Field(None, ge=1)  # Bytes; required for a PUT upload_url
+
+class UploadUrlBatchIn(BaseModel):
+    files: List[UploadUrlRequestIn] = Field(..., min_length=1, max_length=20)
+
 class ProofVerificationCreateIn(BaseModel):
     approved: bool
     comment: Optional[str] = None
@@ -34,6 +45,8 @@ class ProofOut(BaseModel):
     user_id: UUID
     user_name: Optional[str] = None  # Renamed from userName
     image_url: str
+    thumbnail_url: Optional[str] = None  # Small WebP variant; None until processed
+    medium_url: Optional[str] = None
     caption: Optional[str] = None
     status: ProofStatus
     requiredVerifications: int = 1  # Added for frontend compatibility
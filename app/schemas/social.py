@@ -2,7 +2,9 @@ from pydantic import BaseModel
 from uuid import UUID
 from app.db.models import FriendStatus
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Literal
+
+FriendListStatus = Literal["accepted", "pending_sent", "pending_received"]
 
 class FriendRequestCreateIn(BaseModel):
     target_user_id: UUID
@@ -17,4 +19,9 @@ class FriendOut(BaseModel):
     added_at: Optional[datetime] = None  # Optional: when the friend/viewer was added
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class FriendCountsOut(BaseModel):
+    accepted: int = 0
+    pending_sent: int = 0
+    pending_received: int = 0
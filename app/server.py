@@ -0,0 +1,94 @@
+"""
+Production entry point: python -m app.server
+
+Runs WEB_CONCURRENCY uvicorn worker processes (by default one per CPU the
+container actually gets, see session.launcher_worker_count) so a CPU-bound request
+only stalls its own worker. The app is imported once in the supervisor before any worker starts,
+so a broken import or bad config (including a DB_MAX_CONNECTIONS budget too
+small for the workers) fails the launch instead of crash-looping every worker.
+On SIGTERM each worker stops accepting connections, lets in-flight requests
+finish for up to GRACEFUL_SHUTDOWN_SECONDS, then stops its jobs and closes
+its pools.
+"""
+import copy
+import importlib.util
+import logging
+import logging.config
+import os
+import re
+
+import uvicorn
+from uvicorn.config import LOGGING_CONFIG
+
+from app.core.config import settings
+
+logger = logging.getLogger("backend")
+
+APP = "app.main:app"
+
+
+def event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+# Query parameters that carry credentials (e.g. /notifications/stream?ticket=)
+_SECRET_QUERY_PARAM = re.compile(r"\b(ticket|token|access_token)=[^&\s]*")
+
+
+class RedactSecretsFilter(logging.Filter):
+    """Mask credential query parameters in uvicorn access log lines."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # uvicorn.access args: (client_addr, method, full_path, http_version, status_code)
+        if isinstance(record.args, tuple) and len(record.args) == 5:
+            args = list(record.args)
+            args[2] = _SECRET_QUERY_PARAM.sub(r"\1=[redacted]", str(args[2]))
+            record.args = tuple(args)
+        return True
+
+
+def log_config() -> dict:
+    """uvicorn's logging setup plus the app's "backend" logger, applied in every worker."""
+    config = copy.deepcopy(LOGGING_CONFIG)
+    config["loggers"]["backend"] = {"handlers": ["default"], "level": "INFO", "propagate": False}
+    config["filters"] = {"redact_secrets": {"()": RedactSecretsFilter}}
+    config["handlers"]["access"]["filters"] = ["redact_secrets"]
+    return config
+
+
+def main() -> None:
+    logging.config.dictConfig(log_config())
+    from app.db.session import launcher_worker_count
+    workers = launcher_worker_count()
+    # Workers re-read settings on import; pin the count so each sizes its
+    # share of DB_MAX_CONNECTIONS from the same number (unset, a process
+    # assumes it is the only worker)
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    settings.WEB_CONCURRENCY = workers
+
+    from app.main import app  # Preload: fail here, once, on import errors
+
+    loop, http = event_loop(), http_protocol()
+    logger.info(f"Starting {workers} workers on {settings.HOST}:{settings.PORT} (loop={loop}, http={http})")
+    uvicorn.run(
+        # A single worker serves the preloaded app in this process
+        app if workers == 1 else APP,
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=workers,
+        loop=loop,
+        http=http,
+        proxy_headers=True,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_SECONDS,
+        log_config=log_config(),
+        log_level="info",
+        access_log=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db import models
+
+# Columns kept in a snapshot; password_hash never leaves the database path
+SNAPSHOT_COLUMNS = ("id", "email", "username", "auth_provider", "is_active", "created_at")
+
+cache_hits = metrics.counter("auth_cache_hits_total", "Authenticated requests served from the user cache")
+cache_misses = metrics.counter("auth_cache_misses_total", "Authenticated requests that loaded the user from the database")
+cache_size = metrics.gauge("auth_cache_entries", "Tokens currently cached")
+
+
+class AuthCache:
+    """
+    Bounded LRU of access token -> user snapshot, so authentication costs
+    neither a JWT decode nor a users query while an entry is fresh.
+
+    Entries live for at most ttl_seconds and never past the token's own
+    expiry. The cache is per process: invalidate_user() clears the local
+    copy immediately, other workers catch up within ttl_seconds. Until
+    then they still accept a deactivated or deleted user's tokens.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # token -> (expires_at, snapshot)
+        self._tokens_by_user: Dict[UUID, Set[str]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, token: str) -> Optional[models.User]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(token)
+        if entry is None:
+            cache_misses.inc()
+            return None
+        expires_at, snapshot = entry
+        if expires_at <= time.time():
+            self._discard(token)
+            cache_misses.inc()
+            return None
+        self._entries.move_to_end(token)
+        cache_hits.inc()
+        # Fresh instance per request so endpoints cannot share state. It is
+        # detached (it has an identity), so a session it is added or merged
+        # into treats it as the existing row rather than INSERTing it
+        user = models.User(**snapshot)
+        make_transient_to_detached(user)
+        return user
+
+    def put(self, token: str, user: models.User, token_expires_at: Optional[float] = None) -> None:
+        if not self.enabled:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        snapshot = {column: getattr(user, column) for column in SNAPSHOT_COLUMNS}
+        self._discard(token)
+        self._entries[token] = (expires_at, snapshot)
+        self._tokens_by_user.setdefault(user.id, set()).add(token)
+        while len(self._entries) > self.max_size:
+            self._discard(next(iter(self._entries)))
+        cache_size.set(len(self._entries))
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        for token in list(self._tokens_by_user.get(user_id, ())):
+            self._discard(token)
+        cache_size.set(len(self._entries))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tokens_by_user.clear()
+        cache_size.set(0)
+
+    def _discard(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_id = entry[1]["id"]
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+
+auth_cache = AuthCache(settings.AUTH_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: UUID) -> None:
+    """Drop cached authentication for a user whose account data changed."""
+    auth_cache.invalidate_user(user_id)
+
+
+# Any ORM update or delete of a user (username change, deactivation, ...)
+# invalidates their cached snapshot in this process
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_on_user_change(mapper, connection, target):
+    invalidate_user(target.id)
@@ -0,0 +1,182 @@
+import time
+from collections import OrderedDict
+from typing import FrozenSet, Optional
+from uuid import UUID
+
+from sqlalchemy import select, union_all, and_, or_, case, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db import models
+from app.db.session import is_replica_session
+
+cache_hits = metrics.counter("friend_graph_cache_hits_total", "Friend-set lookups served from the cache")
+cache_misses = metrics.counter("friend_graph_cache_misses_total", "Friend-set lookups that queried the database")
+cache_size = metrics.gauge("friend_graph_cache_entries", "Users whose friend set is cached")
+
+
+def friend_ids_query(user_id: UUID):
+    """Ids of a user's accepted friends; each branch is served by an ix_friends_*_status index."""
+    accepted = models.FriendStatus.accepted
+    return union_all(
+        select(models.Friend.addressee_id).where(
+            models.Friend.requester_id == user_id, models.Friend.status == accepted
+        ),
+        select(models.Friend.requester_id).where(
+            models.Friend.addressee_id == user_id, models.Friend.status == accepted
+        ),
+    )
+
+
+def friendship_between(user_id: UUID, other_id: UUID):
+    """Condition matching the one friendship row of a pair, in either direction (a uq_friends_pair probe)."""
+    # Python orders UUIDs like Postgres does (by their bytes)
+    low, high = sorted((UUID(str(user_id)), UUID(str(other_id))))
+    return and_(models.Friend.user_low_id == low, models.Friend.user_high_id == high)
+
+
+def _friendship_status(user_id: UUID):
+    """A friendship's status as seen by user_id: 'accepted', 'pending_sent' or 'pending_received'."""
+    return case(
+        (models.Friend.status == models.FriendStatus.accepted, "accepted"),
+        (models.Friend.requester_id == user_id, "pending_sent"),
+        else_="pending_received",
+    )
+
+
+def _listed_friendships(user_id: UUID, status: Optional[str] = None):
+    """Filter for a user's accepted and pending friendships, narrowed to one status if given."""
+    Friend = models.Friend
+    if status == "pending_sent":
+        return and_(Friend.requester_id == user_id, Friend.status == models.FriendStatus.pending)
+    if status == "pending_received":
+        return and_(Friend.addressee_id == user_id, Friend.status == models.FriendStatus.pending)
+    statuses = [models.FriendStatus.accepted] if status == "accepted" else \
+        [models.FriendStatus.accepted, models.FriendStatus.pending]
+    return and_(or_(Friend.requester_id == user_id, Friend.addressee_id == user_id), Friend.status.in_(statuses))
+
+
+def friend_list_query(user_id: UUID, status: Optional[str] = None):
+    """
+    One row per friendship of user_id, shaped like FriendOut: the other
+    user's id, name, email and avatar joined in, and the status from
+    user_id's side. Blocked and rejected pairs are not listed.
+    """
+    Friend, User = models.Friend, models.User
+    other_id = case((Friend.requester_id == user_id, Friend.addressee_id), else_=Friend.requester_id)
+    return (
+        select(
+            Friend.id,
+            User.id.label("user_id"),
+            User.username.label("name"),
+            User.email,
+            models.UserProfile.avatar_url.label("avatar"),
+            _friendship_status(user_id).label("status"),
+            Friend.created_at.label("added_at"),
+        )
+        .join(User, User.id == other_id)
+        .outerjoin(models.UserProfile, models.UserProfile.user_id == User.id)
+        .where(_listed_friendships(user_id, status))
+    )
+
+
+def friend_counts_query(user_id: UUID):
+    """(status, count) rows for the statuses friend_list_query reports."""
+    status = _friendship_status(user_id)
+    return select(status, func.count()).where(_listed_friendships(user_id)).group_by(status)
+
+
+class FriendGraph:
+    """
+    Bounded LRU of user id -> frozenset of accepted friend ids. After the
+    first lookup of a user, membership and count checks cost no query.
+    It serves feed and list building only; permission checks query the
+    primary (are_friends, friends_of(cached=False)).
+
+    Entries live for at most ttl_seconds. The cache is per process:
+    invalidate() clears the local copy immediately and other workers catch
+    up within ttl_seconds. A set loaded while an invalidation was in flight
+    is returned but not cached, so a slow read cannot put back a stale set.
+    Neither is a set read through a replica session: the replica may not
+    have the change an invalidation was for yet.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[UUID, tuple]" = OrderedDict()  # user id -> (expires_at, friend ids)
+        self._generation = 0  # Bumped by every invalidation
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    async def friends_of(self, db: AsyncSession, user_id: UUID) -> FrozenSet[UUID]:
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(user_id)
+            cache_hits.inc()
+            return entry[1]
+
+        cache_misses.inc()
+        generation = self._generation
+        friend_ids = frozenset((await db.execute(friend_ids_query(user_id))).scalars().all())
+        if self.enabled and generation == self._generation and not is_replica_session(db):
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, friend_ids)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            cache_size.set(len(self._entries))
+        return friend_ids
+
+    async def friend_count(self, db: AsyncSession, user_id: UUID) -> int:
+        return len(await self.friends_of(db, user_id))
+
+    def invalidate(self, *user_ids: UUID) -> None:
+        self._generation += 1
+        for user_id in user_ids:
+            self._entries.pop(user_id, None)
+        cache_size.set(len(self._entries))
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+        cache_size.set(0)
+
+
+friend_graph = FriendGraph(settings.FRIEND_GRAPH_CACHE_MAX_SIZE, settings.FRIEND_GRAPH_CACHE_TTL_SECONDS)
+
+
+async def friends_of(db: AsyncSession, user_id: UUID, cached: bool = True) -> FrozenSet[UUID]:
+    """
+    Ids of the user's accepted friends. With cached=False the set is always
+    read from db, for permission checks that must not act on a friendship
+    another worker has already ended.
+    """
+    if not cached:
+        return frozenset((await db.execute(friend_ids_query(user_id))).scalars().all())
+    return await friend_graph.friends_of(db, user_id)
+
+
+async def are_friends(db: AsyncSession, user_id: UUID, other_id: UUID) -> bool:
+    """
+    Whether the two users have an accepted friendship (in either direction).
+    A permission check, so never cached: one uq_friends_pair probe on db,
+    which should be a primary session.
+    """
+    result = await db.execute(
+        select(models.Friend.id).where(
+            friendship_between(user_id, other_id), models.Friend.status == models.FriendStatus.accepted
+        )
+    )
+    return result.first() is not None
+
+
+async def friend_count(db: AsyncSession, user_id: UUID) -> int:
+    return await friend_graph.friend_count(db, user_id)
+
+
+def invalidate_friendship(*user_ids: UUID) -> None:
+    """Drop cached friend sets of users whose friendships changed; call after commit."""
+    friend_graph.invalidate(*user_ids)
@@ -0,0 +1,88 @@
+import asyncio
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+from uuid import UUID
+
+from PIL import Image, ImageOps
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.storage import storage_service
+
+logger = logging.getLogger("backend")
+
+try:
+    # HEIC/HEIF decoding (iPhone photos) comes from pillow-heif
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+except ImportError:
+    logger.warning("pillow-heif is not installed; HEIC/HEIF proofs will get no thumbnails")
+
+# Pillow releases the GIL while decoding, resizing and encoding, so a small
+# thread pool keeps image work off the event loop without extra processes
+_image_executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_PIPELINE_WORKERS, thread_name_prefix="image-pipeline"
+)
+
+
+def variant_key(storage_key: str, variant: str) -> str:
+    """Key of a derived image, stored next to the original: abc.png -> abc_thumb.webp"""
+    stem = storage_key.rsplit(".", 1)[0]
+    return f"{stem}_{variant}.webp"
+
+
+def render_variants(data: bytes) -> Dict[str, bytes]:
+    """
+    Decode an uploaded image and encode the thumb and medium WebP variants.
+    EXIF orientation is applied to the pixels and all metadata (EXIF, GPS,
+    ICC, XMP) is dropped; transparency is kept. Images are only ever scaled
+    down.
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        # Transparency may be an alpha band (LA, PA) or a palette/colour-key
+        # entry (P, L, RGB); WebP keeps alpha, so convert those to RGBA
+        if "A" in image.getbands() or "transparency" in image.info:
+            image = image.convert("RGBA")
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        variants = {}
+        for variant, size in (("thumb", settings.IMAGE_THUMBNAIL_SIZE), ("medium", settings.IMAGE_MEDIUM_SIZE)):
+            resized = image.copy()
+            resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+            out = io.BytesIO()
+            resized.save(out, format="WEBP", quality=settings.IMAGE_WEBP_QUALITY, method=4)
+            variants[variant] = out.getvalue()
+        return variants
+
+
+async def process_proof_image(proof_id: UUID, storage_key: str) -> None:
+    """
+    Build the image variants of a freshly uploaded proof and record their URLs.
+    Runs after the response; on failure the proof keeps only its original
+    image and clients fall back to image_url.
+    """
+    try:
+        data = await storage_service.get_object(storage_key)
+        variants = await asyncio.get_running_loop().run_in_executor(_image_executor, render_variants, data)
+
+        urls = {}
+        for variant, content in variants.items():
+            key = variant_key(storage_key, variant)
+            await storage_service.put_object(key, content, "image/webp")
+            urls[variant] = storage_service.get_public_url(key)
+
+        async with SessionLocal() as db:
+            await db.execute(
+                update(models.Proof)
+                .where(models.Proof.id == proof_id)
+                .values(thumbnail_url=urls["thumb"], medium_url=urls["medium"])
+            )
+            await db.commit()
+    except Exception:
+        logger.exception(f"Image pipeline failed for proof {proof_id} ({storage_key})")
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.db.session import engine
+
+logger = logging.getLogger("backend")
+
+# Arbitrary application-wide key for the session-level pg_try_advisory_lock
+BACKGROUND_JOBS_LOCK_ID = 72_0000
+
+
+async def campaign() -> Optional[AsyncConnection]:
+    """
+    One election attempt on a pooled connection. If it takes the lock, the
+    connection is detached from the pool and returned: it now belongs to the
+    leader, and the lock lasts as long as it stays open. Otherwise it goes
+    straight back to the pool and None is returned.
+    """
+    conn = await engine.connect()
+    try:
+        # Nothing but the lock and the pings runs here; no transaction to hold open
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        won = (await conn.execute(select(func.pg_try_advisory_lock(BACKGROUND_JOBS_LOCK_ID)))).scalar()
+    except BaseException:
+        await conn.close()
+        raise
+    if not won:
+        await conn.close()
+        return None
+    conn.sync_connection.detach()
+    return conn
+
+
+async def run_as_leader(jobs: List[Callable[[], Awaitable[None]]], interval_seconds: int = None) -> None:
+    """
+    Run the given job loops in exactly one process of the deployment.
+
+    Every worker calls this and campaigns every interval_seconds for a
+    session-level advisory lock, each attempt borrowing a pool connection
+    for one query. The winner keeps that connection out of the pool (the one
+    leader connection in the DB_MAX_CONNECTIONS budget), starts the jobs and
+    pings it every interval_seconds, at which point any job that has died is
+    logged and started again (the lock stays with this worker, so nobody
+    else would run it). If the ping fails the jobs are stopped and the worker
+    campaigns again. Postgres releases the lock when the holder's connection
+    closes (shutdown, crash, network loss), and another worker takes over at
+    its next attempt. Runs until cancelled.
+    """
+    if not jobs:
+        return
+    interval_seconds = interval_seconds or settings.LEADER_ELECTION_INTERVAL_SECONDS
+
+    while True:
+        conn = None
+        tasks = []
+        try:
+            conn = await campaign()
+            while conn is None:
+                await asyncio.sleep(interval_seconds)
+                conn = await campaign()
+
+            logger.info(f"Worker {os.getpid()} elected to run {len(jobs)} background jobs")
+            tasks = [asyncio.create_task(job()) for job in jobs]
+            while True:
+                await asyncio.sleep(interval_seconds)
+                await asyncio.wait_for(conn.execute(text("SELECT 1")), interval_seconds)
+                for i, task in enumerate(tasks):
+                    if task.done():
+                        error = None if task.cancelled() else task.exception()
+                        logger.error(f"Background job {jobs[i].__name__} stopped; restarting it",
+                                     exc_info=(type(error), error, error.__traceback__) if error else None)
+                        tasks[i] = asyncio.create_task(jobs[i]())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"Worker {os.getpid()} failed to campaign for or keep the background job lock")
+        finally:
+            for task in tasks:
+                task.cancel()
+            # A job that died since the last ping must not hide why we stopped
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if conn is not None:
+                try:
+                    await conn.close()  # Releases the lock
+                except Exception:
+                    pass  # Already broken; the server dropped the lock with it
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from datetime import date
+
+from sqlalchemy import any_, select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import models
+from app.db.session import SessionLocal
+
+logger = logging.getLogger("backend")
+
+# Arbitrary application-wide key for pg_try_advisory_xact_lock
+MILESTONE_EXPIRY_LOCK_ID = 72_0002
+
+# Milestones of these goals are left as they are: archived goals were never
+# swept, and a completed goal's milestones are settled
+SKIPPED_GOAL_STATUSES = (
+    models.GoalStatus.archived,
+    models.GoalStatus.completed_pending,
+    models.GoalStatus.completed_verified,
+)
+
+
+def overdue_milestones_query(batch_size: int):
+    """
+    Up to batch_size open milestones whose due_date has passed, oldest first,
+    skipping milestones of archived and completed goals and rows locked by
+    someone else. Ordered by due_date so the chunk is read off the
+    ix_milestones_open_due partial index; each candidate's goal is checked
+    with a primary-key probe rather than a join over all goals.
+    """
+    live_goal = select(models.Goal.id).where(
+        models.Goal.id == models.Milestone.goal_id,
+        models.Goal.status.notin_(SKIPPED_GOAL_STATUSES)
+    ).exists()
+    return select(models.Milestone.id).where(
+        models.Milestone.completed == False,
+        models.Milestone.due_date < date.today(),
+        live_goal
+    ).order_by(models.Milestone.due_date).limit(batch_size).with_for_update(skip_locked=True)
+
+
+def fail_overdue_chunk_stmt(batch_size: int):
+    """
+    UPDATE failing one chunk of overdue milestones. The chunk's ids are
+    collected into an array first (id = ANY(ARRAY(...))) so the rows are
+    fetched by primary key; with IN (...) the planner may hash the chunk and
+    scan the whole table for it.
+    """
+    chunk = func.array(overdue_milestones_query(batch_size).scalar_subquery())
+    return (
+        update(models.Milestone)
+        .where(models.Milestone.id == any_(chunk))
+        .values(completed=True, failed=True, completed_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def fail_overdue_milestones(db: AsyncSession, batch_size: int = None) -> int:
+    """
+    Mark every open milestone whose due_date has passed as completed and
+    failed, skipping archived and completed goals, in chunks of
+    MILESTONE_EXPIRY_BATCH_SIZE committed one by one. This used to run per
+    (non-archived) goal inside GET /goals; doing it here keeps that endpoint
+    read-only.
+
+    Only one sweep runs at a time across all processes: each chunk takes the
+    advisory lock, and if another worker holds it the sweep stops there.
+    Returns the number of milestones failed.
+    """
+    batch_size = batch_size or settings.MILESTONE_EXPIRY_BATCH_SIZE
+    total = 0
+    while True:
+        locked = (await db.execute(select(func.pg_try_advisory_xact_lock(MILESTONE_EXPIRY_LOCK_ID)))).scalar()
+        if not locked:
+            await db.rollback()
+            return total
+        result = await db.execute(fail_overdue_chunk_stmt(batch_size))
+        await db.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+
+
+async def run_milestone_expiry_worker(interval_seconds: int = None) -> None:
+    """Fail overdue milestones every interval_seconds until cancelled."""
+    interval_seconds = interval_seconds or settings.MILESTONE_EXPIRY_INTERVAL_SECONDS
+    while True:
+        try:
+            async with SessionLocal() as db:
+                failed = await fail_overdue_milestones(db)
+            if failed:
+                logger.info(f"Failed {failed} overdue milestones")
+        except Exception:
+            logger.exception("Milestone expiry sweep failed")
+        await asyncio.sleep(interval_seconds)
+
+
+if __name__ == "__main__":
+    # Standalone worker: python -m app.services.milestone_expiry
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_milestone_expiry_worker())
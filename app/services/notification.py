@@ -1,24 +1,186 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional
+from sqlalchemy import insert, select, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.models import PartnerNotification, NotificationType, NotificationState
+from app.db.models import PartnerNotification, NotificationCounter, NotificationType, NotificationState
+from app.services.notification_stream import publish_events
 from uuid import UUID
 
-async def create_notification(
+# Rows per INSERT (and per counter upsert): a notification row binds about 8
+# parameters and asyncpg allows at most 32767 in one statement
+INSERT_BATCH_SIZE = 1000
+
+def unread_count_query(user_id: UUID):
+    """The user's unread counter, a primary-key lookup on notification_counters."""
+    return select(NotificationCounter.unread_count).where(NotificationCounter.user_id == user_id)
+
+def unread_count_upsert(rows: List[dict]):
+    """
+    Upsert adding each row's unread_count to its user's counter (creating the
+    counter if missing), returning (user_id, new unread_count).
+    """
+    stmt = pg_insert(NotificationCounter).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={"unread_count": NotificationCounter.unread_count + stmt.excluded.unread_count},
+    ).returning(NotificationCounter.user_id, NotificationCounter.unread_count)
+
+async def get_unread_count(db: AsyncSession, user_id: UUID) -> int:
+    """Read the user's unread counter; users without a counter row have none."""
+    result = await db.execute(unread_count_query(user_id))
+    return result.scalar() or 0
+
+async def _increment_unread_counts(db: AsyncSession, counts: Mapping[UUID, int]) -> Dict[UUID, int]:
+    """
+    Add to several users' unread counters, one upsert per INSERT_BATCH_SIZE
+    users, and return the new counts. Rows are written in user_id order so
+    concurrent fan-outs lock counter rows in the same order and cannot
+    deadlock.
+    """
+    rows = [
+        dict(user_id=user_id, unread_count=count)
+        for user_id, count in sorted(counts.items(), key=lambda item: str(item[0]))
+        if count > 0
+    ]
+    unread_counts = {}
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        result = await db.execute(unread_count_upsert(rows[start:start + INSERT_BATCH_SIZE]))
+        unread_counts.update(result.all())
+    return unread_counts
+
+async def adjust_unread_count(db: AsyncSession, user_id: UUID, delta: int) -> None:
+    """
+    Move one user's unread counter by delta (never below zero) after a status
+    change, and push the new count to their open streams.
+    Runs in the caller's transaction; nothing is committed here.
+    """
+    if delta > 0:
+        unread_count = (await _increment_unread_counts(db, {user_id: delta}))[user_id]
+    elif delta < 0:
+        result = await db.execute(
+            update(NotificationCounter)
+            .where(NotificationCounter.user_id == user_id)
+            .values(unread_count=func.greatest(NotificationCounter.unread_count + delta, 0))
+            .returning(NotificationCounter.unread_count)
+        )
+        unread_count = result.scalar() or 0
+    else:
+        return
+    await publish_events(db, [dict(recipient_id=user_id, event="unread_count", unread_count=unread_count)])
+
+async def transition_notifications(
     db: AsyncSession,
     recipient_id: UUID,
+    status: NotificationState,
+    ids: Optional[Iterable[UUID]] = None,
+    older_than: Optional[datetime] = None,
+    type: Optional[NotificationType] = None,
+    from_status: Optional[NotificationState] = None,
+) -> int:
+    """
+    Move every matching notification of one recipient to status with a single
+    UPDATE, adjusting the unread counter by the rows that actually changed.
+    Filters are ANDed; rows already in the target status are left alone.
+    Runs in the caller's transaction; nothing is committed here.
+    Returns the number of notifications updated.
+    """
+    targets = select(
+        PartnerNotification.id, PartnerNotification.status.label("old_status")
+    ).where(
+        PartnerNotification.recipient_id == recipient_id,
+        PartnerNotification.status != status
+    )
+    if ids is not None:
+        targets = targets.where(PartnerNotification.id.in_(list(ids)))
+    if older_than is not None:
+        targets = targets.where(PartnerNotification.created_at < older_than)
+    if type is not None:
+        targets = targets.where(PartnerNotification.type == type)
+    if from_status is not None:
+        targets = targets.where(PartnerNotification.status == from_status)
+    # Lock the rows so concurrent transitions cannot both count the same change
+    targets = targets.with_for_update().cte("targets")
+
+    updated = (
+        update(PartnerNotification)
+        .where(PartnerNotification.id == targets.c.id)
+        .values(status=status)
+        .returning(targets.c.old_status)
+        .cte("updated")
+    )
+    result = await db.execute(select(
+        func.count(),
+        func.count().filter(updated.c.old_status == NotificationState.unread)
+    ).select_from(updated))
+    changed, were_unread = result.one()
+
+    if status == NotificationState.unread:
+        await adjust_unread_count(db, recipient_id, changed)
+    else:
+        await adjust_unread_count(db, recipient_id, -were_unread)
+    return changed
+
+async def insert_notifications(db: AsyncSession, rows: List[dict]) -> int:
+    """
+    Insert prepared notification rows with one multi-row INSERT per
+    INSERT_BATCH_SIZE rows, bump the recipients' unread counters to match and
+    push the new notifications to their open streams.
+    Runs in the caller's transaction; nothing is committed here.
+    Returns the number of rows inserted.
+    """
+    for row in rows:
+        row.setdefault("status", NotificationState.unread)
+    # Batches in recipient order keep counter rows locked in user_id order
+    # across the whole fan-out, not just within one upsert
+    rows = sorted(rows, key=lambda row: str(row["recipient_id"]))
+    total = 0
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        result = await db.execute(
+            insert(PartnerNotification)
+            .values(rows[start:start + INSERT_BATCH_SIZE])
+            .returning(*PartnerNotification.__table__.columns)
+        )
+        inserted = result.all()
+        unread_counts = await _increment_unread_counts(db, Counter(
+            row.recipient_id for row in inserted if row.status == NotificationState.unread
+        ))
+        await publish_events(db, [
+            dict(
+                recipient_id=row.recipient_id,
+                event="notification",
+                notification_id=row.id,
+                unread_count=unread_counts.get(row.recipient_id),
+            )
+            for row in inserted
+        ])
+        total += len(inserted)
+    return total
+
+async def create_notifications_bulk(
+    db: AsyncSession,
+    recipient_ids: Iterable[UUID],
     type: NotificationType,
     message: str,
     actor_id: UUID = None,
     goal_id: UUID = None,
     proof_id: UUID = None,
-):
-    notif = PartnerNotification(
-        recipient_id=recipient_id,
-        actor_id=actor_id,
-        type=type,
-        message=message,
-        goal_id=goal_id,
-        proof_id=proof_id,
-        status=NotificationState.unread
-    )
-    db.add(notif)
-    await db.commit()
\ No newline at end of file
+) -> int:
+    """
+    Fan the same notification out to many recipients in batched INSERTs, inside
+    the caller's transaction, so the fan-out commits (or rolls back) together
+    with the change that triggered it. Returns the number of rows inserted.
+    """
+    rows = [
+        dict(
+            recipient_id=recipient_id,
+            actor_id=actor_id,
+            type=type,
+            message=message,
+            goal_id=goal_id,
+            proof_id=proof_id,
+        )
+        for recipient_id in dict.fromkeys(recipient_ids)  # de-duplicate, keep order
+    ]
+    return await insert_notifications(db, rows)
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, insert, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import models
+from app.db.session import SessionLocal
+
+logger = logging.getLogger("backend")
+
+RETENTION_MODES = ("archive", "delete")
+
+
+async def purge_notifications_chunk(
+    db: AsyncSession,
+    status: models.NotificationState,
+    cutoff: datetime,
+    batch_size: int,
+    archive: bool,
+) -> int:
+    """
+    Remove up to batch_size notifications in the given state created before
+    cutoff, copying them into partner_notifications_archive first when archive
+    is set. One statement; rows locked by someone else are skipped, so a chunk
+    never waits on user traffic. Runs in the caller's transaction.
+    Returns the number of rows removed.
+    """
+    notifications = models.PartnerNotification
+    victims = select(notifications.id).where(
+        notifications.status == status,
+        notifications.created_at < cutoff
+    ).limit(batch_size).with_for_update(skip_locked=True)
+
+    removed = delete(notifications).where(notifications.id.in_(victims))
+    if not archive:
+        result = await db.execute(removed.execution_options(synchronize_session=False))
+        return result.rowcount
+
+    columns = [c.name for c in notifications.__table__.columns]
+    moved = removed.returning(*notifications.__table__.columns).cte("moved")
+    result = await db.execute(
+        insert(models.PartnerNotificationArchive).from_select(
+            columns, select(*(moved.c[name] for name in columns))
+        )
+    )
+    return result.rowcount
+
+
+async def apply_notification_retention(db: AsyncSession) -> dict:
+    """
+    Enforce the per-state TTLs from settings in bounded chunks, committing
+    after each one so no transaction holds locks for long. Unread
+    notifications are never removed.
+    Returns {"removed": {state: rows}, "seconds": elapsed}.
+    """
+    mode = settings.NOTIFICATION_RETENTION_MODE
+    if mode not in RETENTION_MODES:
+        raise ValueError(f"NOTIFICATION_RETENTION_MODE must be one of {RETENTION_MODES}, got {mode!r}")
+
+    ttls = {
+        models.NotificationState.read: settings.NOTIFICATION_READ_TTL_DAYS,
+        models.NotificationState.archived: settings.NOTIFICATION_ARCHIVED_TTL_DAYS,
+    }
+    batch_size = settings.NOTIFICATION_RETENTION_BATCH_SIZE
+
+    started = time.monotonic()
+    removed = {}
+    for status, ttl_days in ttls.items():
+        if ttl_days is None:
+            continue
+        cutoff = datetime.now(timezone.utc) - timedelta(days=ttl_days)
+        removed[status.value] = 0
+        while True:
+            count = await purge_notifications_chunk(db, status, cutoff, batch_size, archive=mode == "archive")
+            await db.commit()
+            removed[status.value] += count
+            if count < batch_size:
+                break
+
+    return {"removed": removed, "seconds": round(time.monotonic() - started, 3)}
+
+
+async def run_notification_retention_worker(interval_seconds: int = None) -> None:
+    """Apply notification retention every interval_seconds until cancelled."""
+    interval_seconds = interval_seconds or settings.NOTIFICATION_RETENTION_INTERVAL_SECONDS
+    while True:
+        try:
+            async with SessionLocal() as db:
+                report = await apply_notification_retention(db)
+            logger.info(
+                f"Notification retention ({settings.NOTIFICATION_RETENTION_MODE}): "
+                f"removed {sum(report['removed'].values())} rows {report['removed']} in {report['seconds']}s"
+            )
+        except Exception:
+            logger.exception("Notification retention run failed")
+        await asyncio.sleep(interval_seconds)
+
+
+if __name__ == "__main__":
+    # One-off run: python -m app.services.notification_retention
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        async with SessionLocal() as db:
+            print(await apply_notification_retention(db))
+
+    asyncio.run(main())
@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import json
+import logging
+import secrets
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy import delete, insert, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import NotificationStreamTicket
+
+logger = logging.getLogger("backend")
+
+CHANNEL = "partner_notifications"
+
+# Per-subscriber buffer; a client that falls this far behind loses events
+# (every event carries the absolute unread count, so it resynchronises)
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more, and the error
+# would roll back the caller's transaction; larger events are dropped instead
+MAX_PAYLOAD_BYTES = 7900
+
+
+async def publish_events(db: AsyncSession, events: List[dict]) -> None:
+    """
+    Queue stream events with pg_notify in the caller's transaction.
+    Postgres delivers them only if the transaction commits, in commit order.
+    Each event must carry a "recipient_id". Events should hold ids and
+    counts only (clients fetch bodies over the API) so they stay far below
+    the NOTIFY size limit; an oversized one is skipped, never raised.
+    """
+    if not settings.NOTIFICATION_STREAM_ENABLED or not events:
+        return
+    payloads = []
+    for event in events:
+        payload = json.dumps(event, default=str)
+        if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+            logger.warning(f"Skipping oversized notification stream event {event.get('event')!r}")
+            continue
+        payloads.append(payload)
+    if not payloads:
+        return
+    await db.execute(
+        text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+        {"channel": CHANNEL, "payloads": payloads},
+    )
+
+
+def _ticket_hash(ticket: str) -> str:
+    return hashlib.sha256(ticket.encode()).hexdigest()
+
+
+async def issue_stream_ticket(db: AsyncSession, user_id: UUID) -> str:
+    """
+    Create a ticket that opens one notification stream for user_id within
+    NOTIFICATION_STREAM_TICKET_SECONDS. It is kept in Postgres so whichever
+    worker serves the stream can redeem it; expired tickets are swept here.
+    Runs in the caller's transaction; nothing is committed here.
+    """
+    ticket = secrets.token_urlsafe(32)
+    now = datetime.now(timezone.utc)
+    await db.execute(delete(NotificationStreamTicket).where(NotificationStreamTicket.expires_at < now))
+    await db.execute(insert(NotificationStreamTicket).values(
+        ticket_hash=_ticket_hash(ticket),
+        user_id=user_id,
+        expires_at=now + timedelta(seconds=settings.NOTIFICATION_STREAM_TICKET_SECONDS),
+    ))
+    return ticket
+
+
+async def redeem_stream_ticket(db: AsyncSession, ticket: str) -> Optional[UUID]:
+    """
+    Consume a ticket and return its user id, or None if it is unknown,
+    already used or expired. The DELETE makes redemption single-use even
+    when two workers race for the same ticket. Commits.
+    """
+    result = await db.execute(
+        delete(NotificationStreamTicket)
+        .where(NotificationStreamTicket.ticket_hash == _ticket_hash(ticket))
+        .returning(NotificationStreamTicket.user_id, NotificationStreamTicket.expires_at)
+    )
+    row = result.first()
+    await db.commit()
+    if row is None or row.expires_at <= datetime.now(timezone.utc):
+        return None
+    return row.user_id
+
+
+class NotificationHub:
+    """In-process fan-out of stream events to the connections of each user."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, user_id: UUID) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers[str(user_id)].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: UUID, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(str(user_id))
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[str(user_id)]
+
+    def dispatch(self, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("Dropping malformed notification stream payload")
+            return
+        for queue in self._subscribers.get(event.get("recipient_id"), ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                pass
+
+
+hub = NotificationHub()
+
+
+async def run_notification_listener(reconnect_seconds: int = 5) -> None:
+    """
+    Hold one dedicated LISTEN connection per process (outside the engine pool)
+    and feed every notification into the hub, reconnecting until cancelled.
+    """
+    dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+
+    def on_notify(connection, pid, channel, payload):
+        hub.dispatch(payload)
+
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(dsn)
+            await conn.add_listener(CHANNEL, on_notify)
+            closed = asyncio.Event()
+            conn.add_termination_listener(lambda _: closed.set())
+            await closed.wait()
+            logger.warning("Notification listener connection closed, reconnecting")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Notification listener failed, reconnecting")
+        finally:
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        await asyncio.sleep(reconnect_seconds)
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.notification import insert_notifications
+
+logger = logging.getLogger("backend")
+
+# Arbitrary application-wide key for pg_try_advisory_xact_lock
+PROOF_EXPIRY_LOCK_ID = 72_0001
+
+
+async def expire_proofs_chunk(db: AsyncSession, batch_size: int) -> int:
+    """
+    Reject up to batch_size pending proofs whose verification window has
+    passed and notify the uploaders, with one UPDATE ... RETURNING and one
+    notification insert. Proofs locked by someone else (a verification in
+    flight) are skipped until the next chunk or sweep.
+    Runs in the caller's transaction. Returns the number of proofs expired.
+    """
+    victims = select(models.Proof.id).where(
+        models.Proof.status == models.ProofStatus.pending,
+        models.Proof.verification_expires_at < func.now()
+    ).order_by(models.Proof.verification_expires_at).limit(batch_size).with_for_update(skip_locked=True)
+
+    expire_stmt = (
+        update(models.Proof)
+        .where(
+            models.Proof.id.in_(victims),
+            models.Proof.goal_id == models.Goal.id
+        )
+        .values(status=models.ProofStatus.rejected)
+        .returning(models.Proof.id, models.Proof.user_id, models.Proof.goal_id, models.Goal.title)
+        .execution_options(synchronize_session=False)
+    )
+    expired = (await db.execute(expire_stmt)).all()
+
+    # Create expiry notification for each uploader
+    await insert_notifications(db, [
+        dict(
+            recipient_id=user_id,
+            actor_id=user_id,  # System notification
+            type=models.NotificationType.proof_expired,
+            message=f"Your proof for '{goal_title}' has expired without sufficient verifications",
+            goal_id=goal_id,
+            proof_id=proof_id
+        )
+        for proof_id, user_id, goal_id, goal_title in expired
+    ])
+    return len(expired)
+
+
+async def expire_pending_proofs(db: AsyncSession, batch_size: int = None) -> int:
+    """
+    Reject every pending proof whose verification window has passed and notify
+    the uploaders, in chunks of PROOF_EXPIRY_BATCH_SIZE committed one by one,
+    so a large backlog never builds one oversized statement or transaction.
+
+    Only one sweep runs at a time across all processes: each chunk takes the
+    advisory lock, and if another worker holds it the sweep stops there.
+    Returns the number of proofs expired.
+    """
+    batch_size = batch_size or settings.PROOF_EXPIRY_BATCH_SIZE
+    total = 0
+    while True:
+        locked = (await db.execute(select(func.pg_try_advisory_xact_lock(PROOF_EXPIRY_LOCK_ID)))).scalar()
+        if not locked:
+            await db.rollback()
+            return total
+        count = await expire_proofs_chunk(db, batch_size)
+        await db.commit()
+        total += count
+        if count < batch_size:
+            return total
+
+
+async def run_proof_expiry_worker(interval_seconds: int = None) -> None:
+    """Sweep expired proofs every interval_seconds until cancelled."""
+    interval_seconds = interval_seconds or settings.PROOF_EXPIRY_INTERVAL_SECONDS
+    while True:
+        try:
+            async with SessionLocal() as db:
+                expired = await expire_pending_proofs(db)
+            if expired:
+                logger.info(f"Expired {expired} proofs past their verification window")
+        except Exception:
+            logger.exception("Proof expiry sweep failed")
+        await asyncio.sleep(interval_seconds)
+
+
+if __name__ == "__main__":
+    # Standalone worker: python -m app.services.proof_expiry
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_proof_expiry_worker())
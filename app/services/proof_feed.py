@@ -0,0 +1,224 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set
+from uuid import UUID
+
+from sqlalchemy import select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import models
+from app.services.friend_graph import friend_ids_query, friends_of
+from app.services.user_loader import UserLoader
+from app.schemas import proof as schemas
+from app.schemas.common import UserSummaryOut
+
+
+def visible_proofs_query(viewer_id: UUID, scope: str = "all"):
+    """
+    Select the proofs a user can see in their feed:
+    - mine: proofs the user submitted
+    - to_verify: other users' pending proofs the user may verify (friends
+      privacy and an accepted friendship, or select_friends privacy and an
+      allowed-viewer row), plus proofs the user approved in the last 48 hours
+
+    Each branch is a separate index-driven select combined with UNION rather
+    than one OR over correlated EXISTS, which Postgres can only evaluate with
+    a sequential scan of proofs.
+    """
+    if scope == "mine":
+        return select(models.Proof).where(models.Proof.user_id == viewer_id)
+
+    friend_ids = friend_ids_query(viewer_id)
+
+    # Scenario A: Pending verification on a friends-only goal
+    pending_from_friends = select(models.Proof.id).join(
+        models.Goal, models.Goal.id == models.Proof.goal_id
+    ).where(
+        models.Proof.user_id.in_(friend_ids),
+        models.Proof.status == models.ProofStatus.pending,
+        models.Goal.privacy_setting == models.GoalPrivacy.friends
+    )
+
+    # Scenario A': Pending verification on a goal the user was selected for
+    pending_as_viewer = select(models.Proof.id).join(
+        models.Goal, models.Goal.id == models.Proof.goal_id
+    ).join(
+        models.GoalAllowedViewer, models.GoalAllowedViewer.goal_id == models.Proof.goal_id
+    ).where(
+        models.GoalAllowedViewer.user_id == viewer_id,
+        models.GoalAllowedViewer.can_verify == True,
+        models.Goal.privacy_setting == models.GoalPrivacy.select_friends,
+        models.Proof.status == models.ProofStatus.pending
+    )
+
+    # Scenario B: Recently approved by the user (48-hour window)
+    cutoff_time = datetime.now(timezone.utc) - timedelta(hours=48)
+    verified_recently = select(models.ProofVerification.proof_id).where(
+        models.ProofVerification.verifier_id == viewer_id,
+        models.ProofVerification.approved == True,
+        models.ProofVerification.created_at >= cutoff_time
+    )
+
+    branches = [pending_from_friends, pending_as_viewer, verified_recently]
+    if scope != "to_verify":
+        branches.insert(0, select(models.Proof.id).where(models.Proof.user_id == viewer_id))
+
+    stmt = select(models.Proof).where(models.Proof.id.in_(union(*branches)))
+    if scope == "to_verify":
+        stmt = stmt.where(models.Proof.user_id != viewer_id)  # Never show my own proofs here
+    return stmt
+
+
+class ProofFeedBuilder:
+    """
+    Assemble ProofOut payloads for a batch of proofs with a fixed number of
+    set-based queries (goals, milestones, verifications, users, friends,
+    allowed viewers), independent of how many proofs are in the batch.
+
+    Lookups are cached on the builder, so it can be reused within a request
+    (e.g. permission check first, full payload later) without refetching.
+    Pass cached_friends=False when can_verify() authorizes an action, so the
+    viewer's friends are read from db rather than the friend-graph cache.
+    """
+
+    def __init__(self, db: AsyncSession, viewer_id: UUID, cached_friends: bool = True):
+        self.db = db
+        self.viewer_id = viewer_id
+        self.cached_friends = cached_friends
+        self.goals: Dict[UUID, models.Goal] = {}
+        self.milestones: Dict[UUID, models.Milestone] = {}
+        self.users: Dict[UUID, UserSummaryOut] = {}
+        self.user_loader = UserLoader(db)
+        self.verifications: Dict[UUID, List[models.ProofVerification]] = {}
+        self.friend_ids: Optional[FrozenSet[UUID]] = None
+        self.verifiable_goal_ids: Set[UUID] = set()
+        self._checked_viewer_goal_ids: Set[UUID] = set()
+
+    async def load_access(self, proofs: Iterable[models.Proof]) -> None:
+        """Load what is needed to evaluate can_verify() for these proofs."""
+        proofs = list(proofs)
+
+        missing_goal_ids = {p.goal_id for p in proofs} - self.goals.keys()
+        if missing_goal_ids:
+            result = await self.db.execute(
+                select(models.Goal).where(models.Goal.id.in_(missing_goal_ids))
+            )
+            for goal in result.scalars().all():
+                self.goals[goal.id] = goal
+
+        # Only goals owned by someone else matter for the viewer's permissions
+        foreign_goals = [
+            self.goals[p.goal_id] for p in proofs
+            if p.user_id != self.viewer_id and p.goal_id in self.goals
+        ]
+
+        if self.friend_ids is None and any(
+            g.privacy_setting == models.GoalPrivacy.friends for g in foreign_goals
+        ):
+            self.friend_ids = await friends_of(self.db, self.viewer_id, cached=self.cached_friends)
+
+        select_goal_ids = {
+            g.id for g in foreign_goals
+            if g.privacy_setting == models.GoalPrivacy.select_friends
+        } - self._checked_viewer_goal_ids
+        if select_goal_ids:
+            result = await self.db.execute(
+                select(models.GoalAllowedViewer.goal_id).where(
+                    models.GoalAllowedViewer.goal_id.in_(select_goal_ids),
+                    models.GoalAllowedViewer.user_id == self.viewer_id,
+                    models.GoalAllowedViewer.can_verify == True
+                )
+            )
+            self.verifiable_goal_ids.update(result.scalars().all())
+            self._checked_viewer_goal_ids.update(select_goal_ids)
+
+    async def load(self, proofs: Iterable[models.Proof]) -> None:
+        """Load everything needed to render these proofs as ProofOut."""
+        proofs = list(proofs)
+        await self.load_access(proofs)
+
+        missing_milestone_ids = {
+            p.milestone_id for p in proofs if p.milestone_id
+        } - self.milestones.keys()
+        if missing_milestone_ids:
+            result = await self.db.execute(
+                select(models.Milestone).where(models.Milestone.id.in_(missing_milestone_ids))
+            )
+            for milestone in result.scalars().all():
+                self.milestones[milestone.id] = milestone
+
+        # Verifications are always refetched: they change as proofs get verified
+        proof_ids = [p.id for p in proofs]
+        if proof_ids:
+            result = await self.db.execute(
+                select(models.ProofVerification).where(
+                    models.ProofVerification.proof_id.in_(proof_ids)
+                ).order_by(models.ProofVerification.created_at)
+            )
+            for proof_id in proof_ids:
+                self.verifications[proof_id] = []
+            for verification in result.scalars().all():
+                self.verifications[verification.proof_id].append(verification)
+
+        user_ids = {p.user_id for p in proofs}
+        for proof_id in proof_ids:
+            user_ids.update(v.verifier_id for v in self.verifications[proof_id])
+        self.users.update(await self.user_loader.load_many(user_ids))
+
+    def can_verify(self, proof: models.Proof) -> bool:
+        """In-memory equivalent of the per-proof privacy check."""
+        # Cannot verify your own proof
+        if proof.user_id == self.viewer_id:
+            return False
+
+        goal = self.goals.get(proof.goal_id)
+        if not goal:
+            return False
+
+        if goal.privacy_setting == models.GoalPrivacy.select_friends:
+            return goal.id in self.verifiable_goal_ids
+        elif goal.privacy_setting == models.GoalPrivacy.friends:
+            return proof.user_id in (self.friend_ids or set())
+
+        return False  # Private goals cannot be verified by others
+
+    def to_out(self, proof: models.Proof) -> schemas.ProofOut:
+        user = self.users.get(proof.user_id)
+        goal = self.goals.get(proof.goal_id)
+        milestone = self.milestones.get(proof.milestone_id) if proof.milestone_id else None
+
+        verif_out = []
+        for v in self.verifications.get(proof.id, []):
+            verifier = self.users.get(v.verifier_id)
+            verif_out.append(schemas.ProofVerificationOut(
+                id=v.id,
+                verifier_id=v.verifier_id,
+                verifier_name=verifier.username if verifier else "Unknown",
+                approved=v.approved,
+                comment=v.comment,
+                timestamp=v.created_at
+            ))
+
+        return schemas.ProofOut(
+            id=proof.id,
+            goal_id=proof.goal_id,
+            milestone_id=proof.milestone_id,
+            user_id=proof.user_id,
+            user_name=user.username if user else "Unknown",
+            image_url=proof.image_url,
+            thumbnail_url=proof.thumbnail_url,
+            medium_url=proof.medium_url,
+            caption=proof.caption,
+            status=proof.status,
+            requiredVerifications=proof.required_verifications,
+            uploadedAt=proof.uploaded_at,
+            verificationExpiresAt=proof.verification_expires_at,
+            verifications=verif_out,
+            goalTitle=goal.title if goal else "Unknown Goal",
+            milestoneTitle=milestone.title if milestone else None,
+            milestoneDescription=milestone.description if milestone else None,
+            canVerify=self.can_verify(proof)
+        )
+
+    async def build(self, proofs: Sequence[models.Proof]) -> List[schemas.ProofOut]:
+        await self.load(proofs)
+        return [self.to_out(proof) for proof in proofs]
@@ -1,18 +1,147 @@
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, NamedTuple, Optional
+
 import boto3
 from botocore.client import Config
+from botocore.exceptions import BotoCoreError, ClientError
 from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger("backend")
+
+head_cache_hits = metrics.counter("storage_head_cache_hits_total", "Object HEADs served from cache")
+
+# Uploaded objects never change (keys are random), so a HEAD that found an
+# object can be reused for a while; misses are not cached
+HEAD_CACHE_SECONDS = 300
+HEAD_CACHE_SIZE = 10_000
+
+
+class ObjectInfo(NamedTuple):
+    size: int
+    content_type: Optional[str]
+
+
+class ObjectNotFound(Exception):
+    pass
+
+
+class StorageUnavailable(Exception):
+    """The store could not be reached or refused a request for another reason than a missing object."""
+
+
+class StorageBackend(ABC):
+    """
+    Async object storage used for proof images and avatars.
+
+    Presigned URLs point clients straight at the store; object I/O (head, get,
+    put, delete) never blocks the event loop.
+    """
+
+    def __init__(self):
+        self._head_cache: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, ObjectInfo)
+
+    @abstractmethod
+    async def generate_presigned_put(self, object_name: str, content_type: str, content_length: int) -> Optional[str]:
+        """
+        Generate a URL for the frontend to upload directly to storage. The
+        Content-Length is part of the signature, so the store rejects a body
+        of any other size.
+        """
+
+    @abstractmethod
+    async def generate_presigned_get(self, object_name: str, expires_in: int = 3600) -> Optional[str]:
+        """Generate temporary access URL for authorized users (private access)."""
+
+    @abstractmethod
+    async def generate_presigned_post(
+        self, object_name: str, content_type: str, max_bytes: int, expires_in: int = 3600
+    ) -> Optional[dict]:
+        """
+        Presigned POST policy ({"url", "fields"}) that the store itself
+        enforces: exact key, content type and a 1..max_bytes size range.
+        """
+
+    @abstractmethod
+    def get_public_url(self, object_name: str) -> str:
+        """Return direct permanent URL for public bucket access."""
+
+    @abstractmethod
+    async def head_object(self, object_name: str) -> Optional[ObjectInfo]:
+        """
+        Size and content type of an object, or None if it does not exist.
+        Raises StorageUnavailable for any other failure.
+        """
+
+    async def head_objects(self, object_names: Iterable[str]) -> Dict[str, Optional[ObjectInfo]]:
+        """HEAD several objects concurrently, reusing recent results for objects that exist."""
+        now = time.time()
+        results = {}
+        pending = []
+        for name in dict.fromkeys(object_names):
+            cached = self._head_cache.get(name)
+            if cached is not None and cached[0] > now:
+                head_cache_hits.inc()
+                results[name] = cached[1]
+            else:
+                pending.append(name)
+
+        infos = await asyncio.gather(*(self.head_object(name) for name in pending))
+        for name, info in zip(pending, infos):
+            results[name] = info
+            if info is not None:
+                self._head_cache[name] = (now + HEAD_CACHE_SECONDS, info)
+                self._head_cache.move_to_end(name)
+        while len(self._head_cache) > HEAD_CACHE_SIZE:
+            self._head_cache.popitem(last=False)
+        return results
+
+    @abstractmethod
+    async def get_object(self, object_name: str) -> bytes:
+        """Read a whole object; raises ObjectNotFound."""
+
+    @abstractmethod
+    async def put_object(self, object_name: str, data: bytes, content_type: str) -> None:
+        """Write a whole object, replacing any existing one."""
+
+    @abstractmethod
+    async def delete_object(self, object_name: str) -> None:
+        """Delete an object (no error if it is missing)."""
+
+    def _forget(self, object_name: str) -> None:
+        self._head_cache.pop(object_name, None)
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    MinIO/S3 through boto3. Clients share one connection pool of
+    STORAGE_MAX_POOL_CONNECTIONS; blocking network calls run on an executor
+    of the same size. Presigning is local CPU work and runs inline.
+    """
 
-class StorageService:
     def __init__(self):
+        super().__init__()
+        config = Config(
+            signature_version="s3v4",
+            max_pool_connections=settings.STORAGE_MAX_POOL_CONNECTIONS,
+        )
         self.s3_client = boto3.client(
             "s3",
             endpoint_url=f"http://{settings.MINIO_ENDPOINT}",
             aws_access_key_id=settings.MINIO_ACCESS_KEY,
             aws_secret_access_key=settings.MINIO_SECRET_KEY,
-            config=Config(signature_version="s3v4"),
+            config=config,
             region_name="us-east-1",
         )
-        
+
         # Client for generating public-facing URLs (if different from internal)
         if settings.MINIO_PUBLIC_ENDPOINT:
             self.public_s3_client = boto3.client(
@@ -20,40 +149,39 @@ class StorageService:
                 endpoint_url=f"http://{settings.MINIO_PUBLIC_ENDPOINT}",
                 aws_access_key_id=settings.MINIO_ACCESS_KEY,
                 aws_secret_access_key=settings.MINIO_SECRET_KEY,
-                config=Config(signature_version="s3v4"),
+                config=config,
                 region_name="us-east-1",
             )
         else:
             self.public_s3_client = self.s3_client
 
-    def generate_presigned_put(self, object_name: str, content_type: str) -> str:
-        """Generate a URL for the frontend to upload directly to storage."""
-        import logging
-        logger = logging.getLogger("backend")
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.STORAGE_MAX_POOL_CONNECTIONS, thread_name_prefix="storage"
+        )
+
+    async def _call(self, fn, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(fn, **kwargs))
+
+    async def generate_presigned_put(self, object_name: str, content_type: str, content_length: int) -> Optional[str]:
         try:
-            endpoint = self.public_s3_client.meta.endpoint_url
-            print(f"DEBUG: Generating presigned PUT URL using endpoint: {endpoint}")
-            logger.info(f"Generating presigned PUT URL using endpoint: {endpoint}")
-            
             response = self.public_s3_client.generate_presigned_url(
                 "put_object",
                 Params={
                     "Bucket": settings.PROOF_BUCKET,
                     "Key": object_name,
                     "ContentType": content_type,
+                    "ContentLength": content_length,
                 },
                 ExpiresIn=3600,
             )
             return response
         except Exception as e:
             logger.error(f"Error generating presigned URL: {e}")
-            print(f"Error generating presigned URL: {e}")
             return None
 
-    def generate_presigned_get(self, object_name: str, expires_in: int = 3600) -> str:
-        """Generate temporary access URL for authorized users (private access)."""
+    async def generate_presigned_get(self, object_name: str, expires_in: int = 3600) -> Optional[str]:
         try:
-            response = self.public_s3_client.generate_presigned_url(
+            return self.public_s3_client.generate_presigned_url(
                 "get_object",
                 Params={
                     "Bucket": settings.PROOF_BUCKET,
@@ -61,22 +189,140 @@ class StorageService:
                 },
                 ExpiresIn=expires_in,
             )
-            return response
         except Exception as e:
-            print(f"Error generating presigned get URL: {e}")
+            logger.error(f"Error generating presigned get URL: {e}")
+            return None
+
+    async def generate_presigned_post(
+        self, object_name: str, content_type: str, max_bytes: int, expires_in: int = 3600
+    ) -> Optional[dict]:
+        try:
+            return self.public_s3_client.generate_presigned_post(
+                Bucket=settings.PROOF_BUCKET,
+                Key=object_name,
+                Fields={"Content-Type": content_type},
+                Conditions=[
+                    {"Content-Type": content_type},
+                    ["content-length-range", 1, max_bytes],
+                ],
+                ExpiresIn=expires_in,
+            )
+        except Exception as e:
+            logger.error(f"Error generating presigned POST: {e}")
             return None
 
     def get_public_url(self, object_name: str) -> str:
-        """Return direct permanent URL for public bucket access."""
         # Bucket is already public, return direct URL instead of expiring presigned URL
         endpoint = settings.MINIO_PUBLIC_ENDPOINT or settings.MINIO_ENDPOINT
         return f"http://{endpoint}/{settings.PROOF_BUCKET}/{object_name}"
-    
-    def get_object_key_from_url(self, url: str) -> str:
-        """Extract object key from full URL."""
-        # Handle both full URLs and relative paths
-        if '/' in url:
-            return url.split('/')[-1]
-        return url
-
-storage_service = StorageService()
+
+    async def head_object(self, object_name: str) -> Optional[ObjectInfo]:
+        try:
+            response = await self._call(self.s3_client.head_object, Bucket=settings.PROOF_BUCKET, Key=object_name)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise StorageUnavailable(f"HEAD {object_name} failed: {e}") from e
+        except BotoCoreError as e:
+            raise StorageUnavailable(f"HEAD {object_name} failed: {e}") from e
+        return ObjectInfo(size=response["ContentLength"], content_type=response.get("ContentType"))
+
+    async def get_object(self, object_name: str) -> bytes:
+        def read():
+            try:
+                response = self.s3_client.get_object(Bucket=settings.PROOF_BUCKET, Key=object_name)
+            except self.s3_client.exceptions.NoSuchKey:
+                raise ObjectNotFound(object_name)
+            return response["Body"].read()
+        return await self._call(read)
+
+    async def put_object(self, object_name: str, data: bytes, content_type: str) -> None:
+        await self._call(
+            self.s3_client.put_object,
+            Bucket=settings.PROOF_BUCKET, Key=object_name, Body=data, ContentType=content_type
+        )
+
+    async def delete_object(self, object_name: str) -> None:
+        self._forget(object_name)
+        await self._call(self.s3_client.delete_object, Bucket=settings.PROOF_BUCKET, Key=object_name)
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Filesystem stand-in for tests and local development. Objects live under
+    LOCAL_STORAGE_PATH and are served from LOCAL_STORAGE_BASE_URL by the
+    app itself (app/api/local_storage.py); presigned URLs are plain URLs
+    there that accept unauthenticated PUT and POST uploads.
+    """
+
+    def __init__(self, root: str, base_url: str):
+        super().__init__()
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+
+    def _path(self, object_name: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, object_name))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid object key: {object_name}")
+        return path
+
+    async def generate_presigned_put(self, object_name: str, content_type: str, content_length: int) -> Optional[str]:
+        return self.get_public_url(object_name)
+
+    async def generate_presigned_get(self, object_name: str, expires_in: int = 3600) -> Optional[str]:
+        return self.get_public_url(object_name)
+
+    async def generate_presigned_post(
+        self, object_name: str, content_type: str, max_bytes: int, expires_in: int = 3600
+    ) -> Optional[dict]:
+        return {"url": self.get_public_url(object_name), "fields": {"Content-Type": content_type}}
+
+    def get_public_url(self, object_name: str) -> str:
+        return f"{self.base_url}/{object_name}"
+
+    async def head_object(self, object_name: str) -> Optional[ObjectInfo]:
+        try:
+            size = await asyncio.to_thread(os.path.getsize, self._path(object_name))
+        except FileNotFoundError:
+            return None
+        return ObjectInfo(size=size, content_type=None)
+
+    async def get_object(self, object_name: str) -> bytes:
+        def read():
+            try:
+                with open(self._path(object_name), "rb") as f:
+                    return f.read()
+            except FileNotFoundError:
+                raise ObjectNotFound(object_name)
+        return await asyncio.to_thread(read)
+
+    async def put_object(self, object_name: str, data: bytes, content_type: str) -> None:
+        def write():
+            path = self._path(object_name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write-then-rename so readers never see a partial object
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        await asyncio.to_thread(write)
+
+    async def delete_object(self, object_name: str) -> None:
+        def remove():
+            try:
+                os.remove(self._path(object_name))
+            except FileNotFoundError:
+                pass
+        self._forget(object_name)
+        await asyncio.to_thread(remove)
+
+
+def create_storage_backend() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorageBackend(settings.LOCAL_STORAGE_PATH, settings.LOCAL_STORAGE_BASE_URL)
+    if settings.STORAGE_BACKEND == "s3":
+        return S3StorageBackend()
+    raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND!r}")
+
+
+storage_service = create_storage_backend()
@@ -0,0 +1,51 @@
+from typing import Dict, Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import models
+from app.schemas.common import UserSummaryOut
+
+
+class UserLoader:
+    """
+    Batched loader of other users as UserSummaryOut (user plus avatar).
+
+    load_many() fetches every id it has not seen yet in one users ⟕
+    user_profiles query; results, including unknown ids, are cached for the
+    loader's lifetime. Endpoints get one per request from
+    deps.get_user_loader, so helpers sharing a request also share lookups.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._summaries: Dict[UUID, Optional[UserSummaryOut]] = {}
+
+    async def load_many(self, user_ids: Iterable[UUID]) -> Dict[UUID, UserSummaryOut]:
+        """Summaries of the given users that exist, keyed by id."""
+        user_ids = {UUID(str(user_id)) for user_id in user_ids}
+        missing_ids = user_ids - self._summaries.keys()
+        if missing_ids:
+            result = await self.db.execute(
+                select(
+                    models.User.id,
+                    models.User.username,
+                    models.User.email,
+                    models.UserProfile.avatar_url,
+                )
+                .outerjoin(models.UserProfile, models.UserProfile.user_id == models.User.id)
+                .where(models.User.id.in_(missing_ids))
+            )
+            for row in result.all():
+                self._summaries[row.id] = UserSummaryOut.model_validate(row)
+            for user_id in missing_ids:
+                self._summaries.setdefault(user_id, None)
+
+        return {
+            user_id: self._summaries[user_id]
+            for user_id in user_ids if self._summaries[user_id] is not None
+        }
+
+    async def load(self, user_id: UUID) -> Optional[UserSummaryOut]:
+        return (await self.load_many([user_id])).get(UUID(str(user_id)))
@@ -0,0 +1,62 @@
+from uuid import UUID
+
+from sqlalchemy import select, and_, or_, case, func, literal
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+
+from app.db import models
+
+# Shorter terms only match prefixes: a trigram index cannot narrow down a
+# one- or two-character substring, but it can an anchored prefix
+MIN_SUBSTRING_LENGTH = 3
+
+# Within a match tier, shorter usernames (closer to the term) rank first
+_TIER_WIDTH = 1000
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def user_search_query(viewer_id: UUID, term: str):
+    """
+    Users whose email or username contains term, shaped like UserSearchResult
+    plus an integer rank to order by (highest first): exact matches, then
+    prefix matches, then other substring matches.
+
+    The ILIKE filters are served by the ix_users_*_trgm trigram indexes.
+    The profile is outer-joined and the friendship with the viewer is one
+    probe of uq_friends_pair per matched user.
+    """
+    User, Friend = models.User, models.Friend
+    viewer = literal(viewer_id, PG_UUID(as_uuid=True))
+    prefix = f"{_escape_like(term)}%"
+    pattern = prefix if len(term) < MIN_SUBSTRING_LENGTH else f"%{prefix}"
+    lowered = term.lower()
+
+    tier = case(
+        (or_(func.lower(User.email) == lowered, func.lower(User.username) == lowered), 3),
+        (or_(User.email.ilike(prefix, escape="\\"), User.username.ilike(prefix, escape="\\")), 2),
+        else_=1,
+    )
+    rank = (tier * _TIER_WIDTH - func.least(func.length(User.username), _TIER_WIDTH - 1)).label("rank")
+
+    return (
+        select(
+            User.id,
+            User.email,
+            User.username,
+            models.UserProfile.avatar_url,
+            func.coalesce(Friend.status == models.FriendStatus.accepted, False).label("is_friend"),
+            func.coalesce(Friend.status == models.FriendStatus.pending, False).label("has_pending_request"),
+            rank,
+        )
+        .outerjoin(models.UserProfile, models.UserProfile.user_id == User.id)
+        .outerjoin(Friend, and_(
+            Friend.user_low_id == func.least(User.id, viewer),
+            Friend.user_high_id == func.greatest(User.id, viewer),
+        ))
+        .where(
+            or_(User.email.ilike(pattern, escape="\\"), User.username.ilike(pattern, escape="\\")),
+            User.id != viewer_id,
+        )
+    )
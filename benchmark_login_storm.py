@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latency of an unrelated endpoint (/health) during a login storm.
+
+Registers a throwaway user, then fires LOGINS concurrent logins while probing
+/health every PROBE_INTERVAL seconds, and prints probe p50/p99 latency.
+The user is created in the _test database testkit selects. Run with --inline
+to hash on the event loop (the old behaviour) for comparison:
+
+    python benchmark_login_storm.py
+    python benchmark_login_storm.py --inline
+"""
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+
+# Before app: selects the test database, never the one .env points at
+import testkit  # noqa: F401
+
+import httpx
+from sqlalchemy import delete
+
+from app.core import security
+from app.db import models
+from app.db.session import SessionLocal, engine
+from app.main import app
+
+LOGINS = 50
+PROBE_INTERVAL = 0.005
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_benchmark(inline: bool) -> None:
+    if inline:
+        async def run_inline(fn, *args):
+            return fn(*args)
+        security._run_hashing = run_inline
+
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+    email, password = f"{name}@example.com", "benchmark-password"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        r = await client.post("/api/v1/auth/register", json={"email": email, "username": name, "password": password})
+        r.raise_for_status()
+        user_id = r.json()["id"]
+
+        probes = []
+        storm_done = asyncio.Event()
+
+        async def probe():
+            while not storm_done.is_set():
+                started = time.perf_counter()
+                await client.get("/health")
+                probes.append(time.perf_counter() - started)
+                await asyncio.sleep(PROBE_INTERVAL)
+
+        async def login():
+            r = await client.post("/api/v1/auth/login", data={"username": email, "password": password})
+            r.raise_for_status()
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(LOGINS)))
+        storm_seconds = time.perf_counter() - started
+        storm_done.set()
+        await prober
+
+    async with SessionLocal() as db:
+        await db.execute(delete(models.UserProfile).where(models.UserProfile.user_id == user_id))
+        await db.execute(delete(models.User).where(models.User.id == user_id))
+        await db.commit()
+    await engine.dispose()
+
+    mode = "inline (event loop)" if inline else f"executor ({security.HASH_WORKERS} workers)"
+    print(f"Hashing: {mode}")
+    print(f"{LOGINS} logins in {storm_seconds:.2f}s")
+    print(f"/health during storm: n={len(probes)} "
+          f"p50={statistics.median(probes) * 1000:.1f}ms p99={percentile(probes, 99) * 1000:.1f}ms "
+          f"max={max(probes) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark(inline="--inline" in sys.argv))
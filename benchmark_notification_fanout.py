@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark: notification fan-out cost against friend count.
+
+Seeds a user with max(FRIEND_COUNTS) accepted friends, then for every friend
+count in FRIEND_COUNTS notifies that many friends ROUNDS times in each mode
+and prints commits, SQL statements and latency p50/max per fan-out:
+
+- per-recipient: one notification and one commit per friend (how proofs.py,
+  interval_changes.py and social.py used to fan out)
+- bulk: one create_notifications_bulk call and one commit
+
+Seed data is removed afterwards. Like the checks, it runs against the _test
+database testkit selects.
+
+    python benchmark_notification_fanout.py
+    python benchmark_notification_fanout.py 50 500 2000
+"""
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+
+# Before app: selects the test database, never the one .env points at
+import testkit  # noqa: F401
+
+from sqlalchemy import delete, event, insert
+
+from app.db import models
+from app.db.session import SessionLocal, engine
+from app.services.friend_graph import friends_of
+from app.services.notification import create_notifications_bulk
+
+FRIEND_COUNTS = (10, 100, 300, 1000)
+ROUNDS = 5
+
+
+async def seed(friends: int) -> list:
+    run = uuid.uuid4().hex[:8]
+    user_ids = [uuid.uuid4() for _ in range(friends + 1)]
+    async with SessionLocal() as db:
+        await db.execute(insert(models.User), [
+            dict(id=user_id, email=f"fanout_{run}_{i}@example.com", username=f"fanout_{run}_{i}")
+            for i, user_id in enumerate(user_ids)
+        ])
+        await db.execute(insert(models.Friend), [
+            dict(requester_id=user_ids[0], addressee_id=friend_id, status=models.FriendStatus.accepted)
+            for friend_id in user_ids[1:]
+        ])
+        await db.commit()
+    return user_ids
+
+
+async def cleanup(user_ids: list) -> None:
+    async with SessionLocal() as db:
+        await db.execute(delete(models.PartnerNotification).where(models.PartnerNotification.recipient_id.in_(user_ids)))
+        await db.execute(delete(models.NotificationCounter).where(models.NotificationCounter.user_id.in_(user_ids)))
+        await db.execute(delete(models.Friend).where(models.Friend.requester_id.in_(user_ids)))
+        await db.execute(delete(models.User).where(models.User.id.in_(user_ids)))
+        await db.commit()
+
+
+async def fan_out_per_recipient(db, actor_id, recipient_ids) -> None:
+    for recipient_id in recipient_ids:
+        await create_notifications_bulk(
+            db, [recipient_id], type=models.NotificationType.proof_submission,
+            message="Benchmark proof submitted", actor_id=actor_id,
+        )
+        await db.commit()
+
+
+async def fan_out_bulk(db, actor_id, recipient_ids) -> None:
+    await create_notifications_bulk(
+        db, recipient_ids, type=models.NotificationType.proof_submission,
+        message="Benchmark proof submitted", actor_id=actor_id,
+    )
+    await db.commit()
+
+
+async def run_round(mode: str, fan_out, actor_id, recipient_ids) -> None:
+    commits, statements, latencies = [], [], []
+    for _ in range(ROUNDS):
+        counts = {"commits": 0, "statements": 0}
+
+        def on_commit(conn):
+            counts["commits"] += 1
+
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            counts["statements"] += 1
+
+        async with SessionLocal() as db:
+            event.listen(engine.sync_engine, "commit", on_commit)
+            event.listen(engine.sync_engine, "before_cursor_execute", on_execute)
+            started = time.perf_counter()
+            try:
+                await fan_out(db, actor_id, recipient_ids)
+            finally:
+                latencies.append(time.perf_counter() - started)
+                event.remove(engine.sync_engine, "commit", on_commit)
+                event.remove(engine.sync_engine, "before_cursor_execute", on_execute)
+        commits.append(counts["commits"])
+        statements.append(counts["statements"])
+
+    print(f"friends={len(recipient_ids):>5}  {mode:<14} commits={max(commits):>5}  "
+          f"statements={max(statements):>5}  p50={statistics.median(latencies) * 1000:8.1f}ms  "
+          f"max={max(latencies) * 1000:8.1f}ms")
+
+
+async def run_benchmark(friend_counts) -> None:
+    user_ids = await seed(max(friend_counts))
+    actor_id = user_ids[0]
+    try:
+        async with SessionLocal() as db:
+            friend_ids = sorted(await friends_of(db, actor_id), key=str)
+        print(f"{ROUNDS} fan-outs per mode and friend count")
+        for count in friend_counts:
+            recipient_ids = friend_ids[:count]
+            await run_round("per-recipient", fan_out_per_recipient, actor_id, recipient_ids)
+            await run_round("bulk", fan_out_bulk, actor_id, recipient_ids)
+    finally:
+        await cleanup(user_ids)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark([int(arg) for arg in sys.argv[1:]] or FRIEND_COUNTS))
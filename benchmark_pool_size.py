@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark: proof feed throughput against connection pool size.
+
+Seeds USERS users in a friendship ring, each with a friends-only goal holding
+PROOFS_PER_USER pending proofs, then for every pool size in POOL_SIZES fires
+REQUESTS feed requests (GET /api/v1/proofs) with CONCURRENCY in flight and
+prints requests/s, latency p50/p99 and pool checkout wait p99. Seed data is
+removed afterwards. Run it without READ_REPLICA_URL, or the feed reads go to
+the replica instead of the pool under test. Like the checks, it runs against
+the _test database testkit selects.
+
+    python benchmark_pool_size.py
+    python benchmark_pool_size.py 2 4 8 16
+"""
+import asyncio
+import datetime as dt
+import statistics
+import sys
+import time
+import uuid
+
+# Before app: selects the test database, never the one .env points at
+import testkit  # noqa: F401
+
+import httpx
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.api import deps
+from app.core import security
+from app.db import models
+from app.db.session import SessionLocal, build_engine, engine, pool_wait_seconds
+from app.core.metrics import Histogram
+from app.main import app
+
+USERS = 20
+PROOFS_PER_USER = 30
+REQUESTS = 1000
+CONCURRENCY = 50
+POOL_SIZES = (1, 2, 5, 10, 20)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def seed() -> list:
+    run = uuid.uuid4().hex[:8]
+    users = [
+        models.User(id=uuid.uuid4(), email=f"pool_{run}_{i}@example.com", username=f"pool_{run}_{i}")
+        for i in range(USERS)
+    ]
+    async with SessionLocal() as db:
+        db.add_all(users)
+        await db.flush()
+        for i, user in enumerate(users):
+            db.add(models.Friend(
+                requester_id=user.id,
+                addressee_id=users[(i + 1) % USERS].id,
+                status=models.FriendStatus.accepted,
+            ))
+            goal = models.Goal(
+                id=uuid.uuid4(), user_id=user.id, title="Benchmark goal",
+                milestone_type=models.MilestoneType.flexible,
+                start_date=dt.date.today(), deadline=dt.date.today() + dt.timedelta(days=30),
+                privacy_setting=models.GoalPrivacy.friends,
+            )
+            db.add(goal)
+            await db.flush()
+            db.add_all(
+                models.Proof(goal_id=goal.id, user_id=user.id, image_url=f"https://example.com/{run}/{i}/{n}.png")
+                for n in range(PROOFS_PER_USER)
+            )
+        await db.commit()
+    return [user.id for user in users]
+
+
+async def cleanup(user_ids: list) -> None:
+    async with SessionLocal() as db:
+        await db.execute(delete(models.Proof).where(models.Proof.user_id.in_(user_ids)))
+        await db.execute(delete(models.Goal).where(models.Goal.user_id.in_(user_ids)))
+        await db.execute(delete(models.Friend).where(models.Friend.requester_id.in_(user_ids)))
+        await db.execute(delete(models.User).where(models.User.id.in_(user_ids)))
+        await db.commit()
+
+
+async def run_round(pool_size: int, tokens: list) -> None:
+    round_engine = build_engine(pool_size=pool_size, max_overflow=0)
+    round_session = sessionmaker(round_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_db():
+        async with round_session() as session:
+            yield session
+
+    # GET /proofs reads through get_read_db, which falls back to get_db's
+    # session, so the whole request runs on the round pool
+    app.dependency_overrides[deps.get_db] = get_db
+    # Fresh wait histogram per round, same buckets as the shared one
+    waits = Histogram("round_wait", "", pool_wait_seconds.buckets)
+    observe = pool_wait_seconds.observe
+    pool_wait_seconds.observe = lambda value: (observe(value), waits.observe(value))
+
+    latencies = []
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def fetch(n):
+            async with semaphore:
+                started = time.perf_counter()
+                r = await client.get(
+                    "/api/v1/proofs", params={"limit": 20},
+                    headers={"Authorization": f"Bearer {tokens[n % len(tokens)]}"},
+                )
+                r.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(fetch(n) for n in range(REQUESTS)))
+        elapsed = time.perf_counter() - started
+
+    pool_wait_seconds.observe = observe
+    app.dependency_overrides.pop(deps.get_db, None)
+    await round_engine.dispose()
+
+    print(f"pool={pool_size:>3}  {REQUESTS / elapsed:7.1f} req/s  "
+          f"p50={statistics.median(latencies) * 1000:6.1f}ms  p99={percentile(latencies, 99) * 1000:6.1f}ms  "
+          f"pool wait p99<={waits.quantile(0.99) * 1000:g}ms")
+
+
+async def run_benchmark(pool_sizes) -> None:
+    user_ids = await seed()
+    tokens = [security.create_access_token(str(user_id)) for user_id in user_ids]
+    try:
+        print(f"{REQUESTS} feed requests, {CONCURRENCY} concurrent, {USERS} users x {PROOFS_PER_USER} proofs")
+        for pool_size in pool_sizes:
+            await run_round(pool_size, tokens)
+    finally:
+        await cleanup(user_ids)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark([int(arg) for arg in sys.argv[1:]] or POOL_SIZES))
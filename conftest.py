@@ -0,0 +1,2 @@
+# Point the app at the test database before pytest imports any check
+import testkit  # noqa: F401
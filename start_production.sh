@@ -6,9 +6,11 @@ cd /root/backend
 # Activate virtual environment
 source backend_env/bin/activate
 
-# Start FastAPI with uvicorn
-# Using --host 0.0.0.0 to listen on all network interfaces
-# Using --port 8000 for the backend API
+# Start FastAPI with the multi-worker launcher (app/server.py)
+# Listens on HOST:PORT (default 0.0.0.0:8000) with one worker per CPU the
+# container may use (affinity and cgroup quota), fewer if DB_MAX_CONNECTIONS
+# cannot serve that many; set WEB_CONCURRENCY to override. SIGTERM drains
+# in-flight requests for up to GRACEFUL_SHUTDOWN_SECONDS before the workers exit.
 # No --reload flag for production stability
 
 echo "Starting Accountability Hub Backend..."
@@ -18,8 +20,4 @@ echo "API docs at: http://localhost:8000/docs"
 echo "Press Ctrl+C to stop"
 echo "======================================"
 
-exec uvicorn app.main:app \
-    --host 0.0.0.0 \
-    --port 8000 \
-    --log-level info \
-    --access-log > /root/backend/backend.log 2>&1
+exec python -m app.server > /root/backend/backend.log 2>&1
@@ -0,0 +1,107 @@
+"""
+Check that the authenticated-user cache behind deps.get_current_user drops a
+user as soon as their account changes in this process.
+
+Seeds a user with two access tokens, warms the cache and checks a repeat
+lookup costs no query and that a cached user can be added to a session
+without an INSERT, then changes the password hash, renames, deactivates
+and finally deletes the user through the ORM. After each change the next
+lookup with either token must go back to the database and see the change;
+after the delete the token must be rejected. Seed rows are removed
+afterwards.
+"""
+import uuid
+from datetime import timedelta
+
+from testkit import Checks, count_queries, delete_seeded, main, run_check  # Before app: selects the test database
+
+from fastapi import HTTPException
+from sqlalchemy import delete, select
+
+from app.api.auth import create_access_token
+from app.api.deps import get_user_from_token
+from app.core.security import hash_password
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.auth_cache import auth_cache
+
+
+async def check_auth_cache() -> bool:
+    check = Checks()
+
+    async def authenticate(token):
+        """(user, statements issued) for one get_current_user lookup."""
+        with count_queries() as queries:
+            async with SessionLocal() as db:
+                return await get_user_from_token(db, token), len(queries)
+
+    async def change(**values):
+        async with SessionLocal() as db:
+            user = (await db.execute(select(models.User).where(models.User.id == user_id))).scalars().one()
+            for name, value in values.items():
+                setattr(user, name, value)
+            await db.commit()
+
+    run = uuid.uuid4().hex[:8]
+    user_id = uuid.uuid4()
+    tokens = [create_access_token(user_id), create_access_token(user_id, timedelta(minutes=5))]
+    auth_cache.clear()
+    try:
+        async with SessionLocal() as db:
+            db.add(models.User(
+                id=user_id, email=f"authcache_{run}@example.com", username=f"authcache_{run}",
+                password_hash=await hash_password("first password"),
+            ))
+            await db.commit()
+
+        for token in tokens:
+            await authenticate(token)
+        user, statements = await authenticate(tokens[0])
+        check("cached lookup issues no query", statements == 0 and user.id == user_id, f"{statements} queries")
+
+        try:
+            with count_queries() as queries:
+                async with SessionLocal() as db:
+                    db.add(user)
+                    await db.flush()
+            check("cached user joins a session without an INSERT", not any("INSERT" in q for q in queries))
+        except Exception as e:
+            check("cached user joins a session without an INSERT", False, type(e).__name__)
+
+        await change(password_hash=await hash_password("second password"))
+        for i, token in enumerate(tokens):
+            user, statements = await authenticate(token)
+            check(f"password change drops token {i + 1}", statements == 1, f"{statements} queries")
+
+        await change(username=f"renamed_{run}")
+        for i, token in enumerate(tokens):
+            user, statements = await authenticate(token)
+            check(f"rename seen with token {i + 1}", statements == 1 and user.username == f"renamed_{run}",
+                  f"{user.username}, {statements} queries")
+
+        await change(is_active=False)
+        user, statements = await authenticate(tokens[0])
+        check("deactivation seen", statements == 1 and user.is_active is False, f"{statements} queries")
+
+        async with SessionLocal() as db:
+            await db.delete(await db.get(models.User, user_id))
+            await db.commit()
+        for i, token in enumerate(tokens):
+            try:
+                await authenticate(token)
+                check(f"deleted user rejected with token {i + 1}", False)
+            except HTTPException as e:
+                check(f"deleted user rejected with token {i + 1}", e.status_code == 401, f"{e.status_code}")
+    finally:
+        await delete_seeded(delete(models.User).where(models.User.id == user_id))
+        auth_cache.clear()
+
+    return check.report("auth cache invalidation")
+
+
+def test_auth_cache():
+    assert run_check(check_auth_cache)
+
+
+if __name__ == "__main__":
+    main(check_auth_cache)
@@ -0,0 +1,139 @@
+"""
+Query-count regression check for the proof feed (GET /api/v1/proofs).
+
+Seeds a user whose friends have friends-only and select-friends goals full
+of pending proofs with milestones and verifications, inside a transaction
+that is rolled back at the end, then pages through the feed and fails if the
+number of SQL statements grows with the number of proofs on a page (feed
+assembly used to issue several lookups per proof).
+"""
+from testkit import Checks, count_queries, main, rolled_back, run_check  # Before app: selects the test database
+
+from fastapi import Response
+from sqlalchemy import select, text
+
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.api.proofs import list_proofs
+from app.db import models
+
+N_FRIENDS = 38
+PROOFS_PER_GOAL = 5
+N_OWN_PROOFS = 10
+
+SEED_SQL = [
+    f"""INSERT INTO users (id, email, username, auth_provider, is_active, created_at)
+        SELECT md5('fd-u' || i)::uuid, 'fd' || i || '@example.test', 'fd_user_' || i, 'local', true, now()
+        FROM generate_series(0, {N_FRIENDS}) i""",
+    f"""INSERT INTO user_profiles (id, user_id, avatar_url, onboarding_completed)
+        SELECT gen_random_uuid(), md5('fd-u' || i)::uuid, 'http://example.test/' || i || '.png', true
+        FROM generate_series(0, {N_FRIENDS}) i""",
+    f"""INSERT INTO friends (id, requester_id, addressee_id, status, created_at)
+        SELECT gen_random_uuid(), md5('fd-u0')::uuid, md5('fd-u' || i)::uuid, 'accepted', now()
+        FROM generate_series(1, {N_FRIENDS}) i""",
+    # One goal per user: the seeded user's is private, friends alternate
+    # between friends-only and select-friends goals that list the user
+    f"""INSERT INTO goals (id, user_id, title, milestone_type, milestone_interval_days, start_date, deadline,
+                           privacy_setting, status, is_completed, created_at)
+        SELECT md5('fd-g' || i)::uuid, md5('fd-u' || i)::uuid, 'Goal ' || i, 'flexible', 7,
+               current_date - 30, current_date + 60,
+               (CASE WHEN i = 0 THEN 'private' WHEN i % 2 = 1 THEN 'friends' ELSE 'select_friends' END)::goalprivacy,
+               'active', false, now()
+        FROM generate_series(0, {N_FRIENDS}) i""",
+    f"""INSERT INTO goal_allowed_viewers (goal_id, user_id, can_verify)
+        SELECT md5('fd-g' || i)::uuid, md5('fd-u0')::uuid, true
+        FROM generate_series(2, {N_FRIENDS}, 2) i""",
+    f"""INSERT INTO milestones (id, goal_id, title, description, is_flexible, batch_number, order_index, due_date,
+                                completed, failed, progress)
+        SELECT md5('fd-m' || i)::uuid, md5('fd-g' || i)::uuid, 'Milestone ' || i, 'Week ' || i, true, 1, 0,
+               current_date + 7, false, false, 0
+        FROM generate_series(0, {N_FRIENDS}) i""",
+    # Friends' proofs interleave (and the user's own fall between them), so
+    # any page mixes owners and privacy settings
+    f"""INSERT INTO proofs (id, goal_id, milestone_id, user_id, image_url, status, required_verifications,
+                            uploaded_at, verification_expires_at)
+        SELECT md5('fd-p' || i || '-' || j)::uuid, md5('fd-g' || i)::uuid, md5('fd-m' || i)::uuid,
+               md5('fd-u' || i)::uuid, 'http://example.test/p' || i || '-' || j || '.png', 'pending', 2,
+               now() - ((j * {N_FRIENDS} + i) || ' minutes')::interval, now() + interval '72 hours'
+        FROM generate_series(1, {N_FRIENDS}) i, generate_series(1, {PROOFS_PER_GOAL}) j""",
+    f"""INSERT INTO proofs (id, goal_id, milestone_id, user_id, image_url, status, required_verifications,
+                            uploaded_at, verification_expires_at)
+        SELECT md5('fd-p0-' || j)::uuid, md5('fd-g0')::uuid, md5('fd-m0')::uuid, md5('fd-u0')::uuid,
+               'http://example.test/own' || j || '.png', 'pending', 1,
+               now() - ((j * {N_FRIENDS}) || ' minutes 30 seconds')::interval, now() + interval '72 hours'
+        FROM generate_series(1, {N_OWN_PROOFS}) j""",
+    # Every friend's proof already has one verification from the next friend
+    f"""INSERT INTO proof_verifications (id, proof_id, verifier_id, approved, comment, created_at)
+        SELECT gen_random_uuid(), md5('fd-p' || i || '-' || j)::uuid, md5('fd-u' || (i % {N_FRIENDS} + 1))::uuid,
+               true, 'Looks good', now()
+        FROM generate_series(1, {N_FRIENDS}) i, generate_series(1, {PROOFS_PER_GOAL}) j""",
+]
+
+# Statements one feed page may issue, whatever its size: the page itself,
+# then goals, friends, allowed viewers, milestones, verifications and users
+# (the friend set may come from the friend-graph cache instead)
+MAX_QUERIES = 7
+
+
+async def check_feed_query_count() -> bool:
+    check = Checks()
+    queries = []
+
+    async with rolled_back(SEED_SQL) as (conn, db):
+        user_id = (await conn.execute(text("SELECT md5('fd-u0')::uuid"))).scalar()
+        user = (await db.execute(select(models.User).where(models.User.id == user_id))).scalars().one()
+
+        async def feed(response, limit, cursor=None, scope="all"):
+            with count_queries() as statements:
+                page = await list_proofs(
+                    response=response, scope=scope, status=None, goal_id=None, since=None,
+                    limit=limit, cursor=cursor, db=db, current_user=user,
+                )
+            queries[:] = statements
+            return page
+
+        total = N_FRIENDS * PROOFS_PER_GOAL + N_OWN_PROOFS
+        small = await feed(Response(), limit=5)
+        small_queries = len(queries)
+        check("5-proof page query count", len(small) == 5 and small_queries <= MAX_QUERIES,
+              f"{small_queries} queries")
+
+        proofs = await feed(Response(), limit=200)
+        check("full feed", len(proofs) == total, f"{len(proofs)} proofs")
+        check("full feed query count", len(queries) <= MAX_QUERIES,
+              f"{len(queries)} queries for {len(proofs)} proofs, {small_queries} for 5")
+
+        friend_proofs = [p for p in proofs if p.user_id != user_id]
+        check("friends' proofs verifiable", all(p.canVerify for p in friend_proofs))
+        check("own proofs not verifiable", not any(p.canVerify for p in proofs if p.user_id == user_id))
+        check("titles and names filled", all(
+            p.goalTitle and p.milestoneTitle and p.milestoneDescription and p.user_name for p in proofs
+        ))
+        check("verifier names filled", all(
+            len(p.verifications) == 1 and p.verifications[0].verifier_name != "Unknown" for p in friend_proofs
+        ))
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            response = Response()
+            page = await feed(response, limit=60, cursor=cursor)
+            check(f"page {pages + 1} query count", len(queries) <= MAX_QUERIES, f"{len(queries)} queries")
+            seen += [p.id for p in page]
+            pages += 1
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                break
+        check("pages cover the feed once", seen == [p.id for p in proofs], f"{pages} pages")
+
+        to_verify = await feed(Response(), limit=200, scope="to_verify")
+        check("to_verify feed", len(to_verify) == N_FRIENDS * PROOFS_PER_GOAL,
+              f"{len(to_verify)} proofs, {len(queries)} queries")
+
+    return check.report("proof feed query count")
+
+
+def test_feed_query_count():
+    assert run_check(check_feed_query_count)
+
+
+if __name__ == "__main__":
+    main(check_feed_query_count)
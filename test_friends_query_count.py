@@ -0,0 +1,99 @@
+"""
+Query-count regression check for GET /api/v1/friends and /friends/counts.
+
+Seeds a user with accepted friends and pending requests in both directions
+inside a transaction that is rolled back at the end, then calls the
+endpoints and fails if the number of SQL statements grows with the number
+of friendships (the list used to issue two lookups per friend).
+"""
+from testkit import Checks, count_queries, main, rolled_back, run_check  # Before app: selects the test database
+
+from fastapi import Response
+from sqlalchemy import select, text
+
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.api.social import count_friends, list_friends
+from app.db import models
+
+N_ACCEPTED = 150
+N_SENT = 20
+N_RECEIVED = 30
+
+SEED_SQL = [
+    f"""INSERT INTO users (id, email, username, auth_provider, is_active, created_at)
+        SELECT md5('fq-u' || i)::uuid, 'fq' || i || '@example.test', 'fq_user_' || i, 'local', true, now()
+        FROM generate_series(0, {N_ACCEPTED + N_SENT + N_RECEIVED}) i""",
+    f"""INSERT INTO user_profiles (id, user_id, avatar_url, onboarding_completed)
+        SELECT gen_random_uuid(), md5('fq-u' || i)::uuid, 'http://example.test/' || i || '.png', true
+        FROM generate_series(1, {N_ACCEPTED + N_SENT + N_RECEIVED}, 2) i""",
+    # The seeded user requested the first half of its friends; the rest requested it
+    f"""INSERT INTO friends (id, requester_id, addressee_id, status, created_at)
+        SELECT gen_random_uuid(),
+               CASE WHEN i <= {N_ACCEPTED // 2} THEN md5('fq-u0')::uuid ELSE md5('fq-u' || i)::uuid END,
+               CASE WHEN i <= {N_ACCEPTED // 2} THEN md5('fq-u' || i)::uuid ELSE md5('fq-u0')::uuid END,
+               'accepted', now() - (i || ' minutes')::interval
+        FROM generate_series(1, {N_ACCEPTED}) i""",
+    f"""INSERT INTO friends (id, requester_id, addressee_id, status, created_at)
+        SELECT gen_random_uuid(), md5('fq-u0')::uuid, md5('fq-u' || i)::uuid, 'pending',
+               now() - (i || ' minutes')::interval
+        FROM generate_series({N_ACCEPTED + 1}, {N_ACCEPTED + N_SENT}) i""",
+    f"""INSERT INTO friends (id, requester_id, addressee_id, status, created_at)
+        SELECT gen_random_uuid(), md5('fq-u' || i)::uuid, md5('fq-u0')::uuid, 'pending',
+               now() - (i || ' minutes')::interval
+        FROM generate_series({N_ACCEPTED + N_SENT + 1}, {N_ACCEPTED + N_SENT + N_RECEIVED}) i""",
+]
+
+# Statements a single call may issue, whatever the number of friendships
+MAX_QUERIES = 1
+
+
+async def check_friends_query_count() -> bool:
+    check = Checks()
+    queries = []
+
+    async with rolled_back(SEED_SQL) as (conn, db):
+        user_id = (await conn.execute(text("SELECT md5('fq-u0')::uuid"))).scalar()
+        user = (await db.execute(select(models.User).where(models.User.id == user_id))).scalars().one()
+
+        async def call(endpoint, **params):
+            with count_queries() as statements:
+                result = await endpoint(db=db, current_user=user, **params)
+            queries[:] = statements
+            return result
+
+        friends = await call(list_friends, response=Response(), status=None, limit=None, cursor=None)
+        check("full list", len(friends) == N_ACCEPTED + N_SENT + N_RECEIVED, f"{len(friends)} friendships")
+        check("full list query count", len(queries) <= MAX_QUERIES, f"{len(queries)} queries")
+        check("avatars joined", sum(f.avatar is not None for f in friends) > 0)
+        check("newest first", [f.added_at for f in friends] == sorted((f.added_at for f in friends), reverse=True))
+
+        for status, expected in [("accepted", N_ACCEPTED), ("pending_sent", N_SENT), ("pending_received", N_RECEIVED)]:
+            filtered = await call(list_friends, response=Response(), status=status, limit=None, cursor=None)
+            check(f"{status} filter", len(filtered) == expected and {f.status for f in filtered} == {status},
+                  f"{len(filtered)} friendships, {len(queries)} queries")
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            response = Response()
+            page = await call(list_friends, response=response, status=None, limit=40, cursor=cursor)
+            check(f"page {pages + 1} query count", len(queries) <= MAX_QUERIES, f"{len(queries)} queries")
+            seen += [f.id for f in page]
+            pages += 1
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                break
+        check("pages cover the list once", seen == [f.id for f in friends], f"{pages} pages")
+
+        counts = await call(count_friends)
+        check("counts", (counts.accepted, counts.pending_sent, counts.pending_received)
+              == (N_ACCEPTED, N_SENT, N_RECEIVED), f"{counts.model_dump()}, {len(queries)} queries")
+
+    return check.report("friends list query count")
+
+
+def test_friends_query_count():
+    assert run_check(check_friends_query_count)
+
+
+if __name__ == "__main__":
+    main(check_friends_query_count)
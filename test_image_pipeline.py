@@ -0,0 +1,145 @@
+"""
+Check of the proof image pipeline against the local filesystem storage
+backend (no MinIO needed).
+
+Renders variants of an EXIF-rotated JPEG and checks orientation, size,
+format and that metadata is stripped, that palette and grey-alpha images
+keep their transparency, then runs process_proof_image for a
+seeded proof and checks the stored variants and recorded URLs, and that a
+corrupt upload leaves the proof untouched. HEIC decoding is checked when
+pillow-heif is installed. Seed rows and files are removed afterwards.
+"""
+import io
+import shutil
+import tempfile
+import uuid
+from datetime import date, timedelta
+
+from testkit import Checks, delete_seeded, main, new_users, run_check  # Before app: selects the test database
+
+from PIL import Image
+from sqlalchemy import delete, select
+
+from app.core.config import settings
+from app.db import models
+from app.db.session import SessionLocal
+from app.services import image_pipeline
+from app.services.storage import LocalStorageBackend
+
+BASE_URL = "http://storage.test/proofs"
+
+
+def exif_rotated_jpeg(width: int, height: int) -> bytes:
+    """A width x height JPEG whose EXIF says "rotate 90° clockwise", plus a camera tag."""
+    image = Image.new("RGB", (width, height), (200, 30, 30))
+    exif = image.getexif()
+    exif[0x0112] = 6  # Orientation
+    exif[0x010F] = "Test Camera"  # Make
+    out = io.BytesIO()
+    image.save(out, format="JPEG", exif=exif)
+    return out.getvalue()
+
+
+async def check_image_pipeline() -> bool:
+    check = Checks()
+
+    variants = image_pipeline.render_variants(exif_rotated_jpeg(4000, 3000))
+    for variant, size in (("thumb", settings.IMAGE_THUMBNAIL_SIZE), ("medium", settings.IMAGE_MEDIUM_SIZE)):
+        with Image.open(io.BytesIO(variants[variant])) as image:
+            expected = (size * 3 // 4, size)  # Portrait once the orientation is applied
+            check(f"{variant} variant", image.format == "WEBP" and image.size == expected,
+                  f"{image.format} {image.size}, {len(variants[variant])} bytes")
+            check(f"{variant} metadata stripped", not image.getexif() and "exif" not in image.info)
+
+    small = image_pipeline.render_variants(exif_rotated_jpeg(200, 100))
+    with Image.open(io.BytesIO(small["medium"])) as image:
+        check("never upscaled", image.size == (100, 200), f"{image.size}")
+
+    for mode in ("P", "LA"):
+        image = Image.new("RGBA", (600, 400), (30, 30, 200, 255))
+        image.paste((0, 0, 0, 0), (0, 0, 300, 400))  # Left half fully transparent
+        image = image.convert("LA") if mode == "LA" else image.convert("P")
+        if mode == "P":
+            image.info["transparency"] = image.getpixel((0, 0))
+        out = io.BytesIO()
+        image.save(out, format="PNG")
+        with Image.open(io.BytesIO(image_pipeline.render_variants(out.getvalue())["thumb"])) as thumb:
+            alpha = thumb.convert("RGBA").getchannel("A")
+            check(f"{mode} transparency kept", thumb.mode == "RGBA" and alpha.getpixel((10, 10)) == 0
+                  and alpha.getpixel((thumb.width - 10, 10)) == 255, f"{thumb.mode}")
+
+    try:
+        import pillow_heif
+    except ImportError:
+        print("⏭️  heic variant: skipped, pillow-heif is not installed")
+    else:
+        heif = pillow_heif.from_pillow(Image.new("RGB", (800, 600), (30, 200, 30)))
+        out = io.BytesIO()
+        heif.save(out, format="HEIF")
+        with Image.open(io.BytesIO(image_pipeline.render_variants(out.getvalue())["thumb"])) as image:
+            check("heic variant", image.size == (settings.IMAGE_THUMBNAIL_SIZE, settings.IMAGE_THUMBNAIL_SIZE * 3 // 4),
+                  f"{image.size}")
+
+    root = tempfile.mkdtemp(prefix="proof-storage-")
+    storage = LocalStorageBackend(root, BASE_URL)
+    shared_storage = image_pipeline.storage_service
+    image_pipeline.storage_service = storage
+    user, = new_users("pipeline", 1)
+    goal = models.Goal(
+        id=uuid.uuid4(), user_id=user.id, title="Pipeline goal", milestone_type=models.MilestoneType.flexible,
+        start_date=date.today(), deadline=date.today() + timedelta(days=30),
+    )
+    good_key, bad_key = f"proofs/{user.id}/{uuid.uuid4()}.jpg", f"proofs/{user.id}/{uuid.uuid4()}.png"
+    proofs = {
+        key: models.Proof(id=uuid.uuid4(), goal_id=goal.id, user_id=user.id, image_url=storage.get_public_url(key))
+        for key in (good_key, bad_key)
+    }
+    try:
+        async with SessionLocal() as db:
+            db.add(user)
+            await db.flush()
+            db.add(goal)
+            await db.flush()
+            db.add_all(proofs.values())
+            await db.commit()
+        await storage.put_object(good_key, exif_rotated_jpeg(2000, 1500), "image/jpeg")
+        await storage.put_object(bad_key, b"not an image", "image/png")
+
+        for key, proof in proofs.items():
+            await image_pipeline.process_proof_image(proof.id, key)
+
+        async with SessionLocal() as db:
+            result = await db.execute(select(models.Proof).where(models.Proof.id.in_([p.id for p in proofs.values()])))
+            stored = {proof.id: proof for proof in result.scalars().all()}
+
+        good = stored[proofs[good_key].id]
+        thumb_key = image_pipeline.variant_key(good_key, "thumb")
+        medium_key = image_pipeline.variant_key(good_key, "medium")
+        check("variant urls recorded", good.thumbnail_url == storage.get_public_url(thumb_key)
+              and good.medium_url == storage.get_public_url(medium_key), f"{good.thumbnail_url}")
+        for key in (thumb_key, medium_key):
+            with Image.open(io.BytesIO(await storage.get_object(key))) as image:
+                check(f"stored {key.rsplit('_', 1)[-1]}", image.format == "WEBP", f"{image.size}")
+
+        bad = stored[proofs[bad_key].id]
+        check("corrupt upload keeps the original", bad.thumbnail_url is None and bad.medium_url is None)
+        check("no variants for corrupt upload",
+              await storage.head_object(image_pipeline.variant_key(bad_key, "thumb")) is None)
+    finally:
+        image_pipeline.storage_service = shared_storage
+        await delete_seeded(
+            delete(models.Proof).where(models.Proof.user_id == user.id),
+            delete(models.Goal).where(models.Goal.user_id == user.id),
+            delete(models.User).where(models.User.id == user.id),
+        )
+        shutil.rmtree(root, ignore_errors=True)
+
+    return check.report("image pipeline")
+
+
+def test_image_pipeline():
+    assert run_check(check_image_pipeline)
+
+
+if __name__ == "__main__":
+    main(check_image_pipeline)
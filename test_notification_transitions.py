@@ -0,0 +1,134 @@
+"""
+Check of set-based notification transitions (transition_notifications via
+POST /notifications/bulk-status and /notifications/mark-all-read).
+
+Seeds a recipient with unread, read and archived notifications of two types
+and ages, plus another user's notifications, then runs bulk transitions by
+id list (including ids already in the target state and the other user's),
+by type, by age and mark-all-read. After each one checks the reported count
+against the rows that actually changed state, that the unread counter still
+equals COUNT(*) of unread rows, and that the other user's rows and counter
+are untouched. Seed rows are removed afterwards.
+"""
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from testkit import Checks, delete_seeded, main, new_users, run_check  # Before app: selects the test database
+
+from sqlalchemy import delete, select
+
+from app.api.notifications import (
+    NotificationBulkStatusUpdate, bulk_update_notification_status, mark_all_notifications_as_read,
+)
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.notification import get_unread_count, insert_notifications
+
+State, Type = models.NotificationState, models.NotificationType
+
+# (type, status, age in days, how many)
+SEED = [
+    (Type.proof_submission, State.unread, 10, 4),
+    (Type.proof_submission, State.read, 10, 3),
+    (Type.proof_submission, State.archived, 10, 2),
+    (Type.friend_request, State.unread, 10, 2),
+    (Type.friend_request, State.unread, 0, 3),
+    (Type.friend_request, State.read, 0, 2),
+]
+
+
+async def check_notification_transitions() -> bool:
+    check = Checks()
+    recipient, other = users = new_users("transition", 2)
+    user_ids = [user.id for user in users]
+    now = datetime.now(timezone.utc)
+
+    async def snapshot(user):
+        """{notification id: (type, status, created_at)} and the unread counter for user."""
+        async with SessionLocal() as db:
+            result = await db.execute(select(
+                models.PartnerNotification.id, models.PartnerNotification.type,
+                models.PartnerNotification.status, models.PartnerNotification.created_at,
+            ).where(models.PartnerNotification.recipient_id == user.id))
+            rows = {row.id: (row.type, row.status, row.created_at) for row in result.all()}
+            return rows, await get_unread_count(db, user.id)
+
+    async def run_step(name, transition, target, selects):
+        """Run transition() and check it against the rows selects(id, type, status, created_at) picks."""
+        before, _ = await snapshot(recipient)
+        other_before = await snapshot(other)
+        expected = sum(
+            1 for id_, (type_, status, created_at) in before.items()
+            if selects(id_, type_, status, created_at) and status != target
+        )
+        async with SessionLocal() as db:
+            reported = await transition(db)
+        after, counter = await snapshot(recipient)
+        changed = sum(1 for id_ in before if before[id_][1] != after[id_][1])
+        unread = Counter(status for _, status, _ in after.values())[State.unread]
+        check(name, reported == changed == expected and counter == unread,
+              f"reported {reported}, changed {changed}, expected {expected}, counter {counter}, unread rows {unread}")
+        check(f"{name}: other user untouched", await snapshot(other) == other_before)
+
+    try:
+        async with SessionLocal() as db:
+            db.add_all(users)
+            await db.commit()
+            for user in users:
+                await insert_notifications(db, [
+                    dict(recipient_id=user.id, type=type_, message=f"{type_.value} {status.value} {i}",
+                         status=status, created_at=now - timedelta(days=age_days))
+                    for type_, status, age_days, count in SEED for i in range(count)
+                ])
+            await db.commit()
+        rows, counter = await snapshot(recipient)
+        unread = Counter(status for _, status, _ in rows.values())[State.unread]
+        check("seeded counter", counter == unread == 9, f"counter {counter}, unread rows {unread}")
+
+        other_rows, _ = await snapshot(other)
+        by_status = {status: [id_ for id_, row in rows.items() if row[1] == status] for status in State}
+        # Unread, read and already-archived rows of the recipient plus rows of someone else
+        picked = by_status[State.unread][:2] + by_status[State.read][:2] + by_status[State.archived][:1] \
+            + list(other_rows)[:3]
+        cutoff = now - timedelta(days=5)
+
+        def bulk(**fields):
+            async def transition(db):
+                update = NotificationBulkStatusUpdate(**fields)
+                return (await bulk_update_notification_status(update, db, recipient))["updated"]
+            return transition
+
+        async def mark_all_read(db):
+            return int((await mark_all_notifications_as_read(db, recipient))["message"].split()[1])
+
+        await run_step("archive by ids", bulk(status=State.archived, ids=picked), State.archived,
+                       lambda id_, type_, status, created_at: id_ in picked)
+        await run_step("unread by type", bulk(status=State.unread, type=Type.proof_submission), State.unread,
+                       lambda id_, type_, status, created_at: type_ == Type.proof_submission)
+        await run_step("read by age", bulk(status=State.read, older_than=cutoff), State.read,
+                       lambda id_, type_, status, created_at: created_at < cutoff)
+        await run_step("archive by type and age",
+                       bulk(status=State.archived, type=Type.friend_request, older_than=cutoff), State.archived,
+                       lambda id_, type_, status, created_at: type_ == Type.friend_request and created_at < cutoff)
+        await run_step("mark all read", mark_all_read, State.read,
+                       lambda id_, type_, status, created_at: status == State.unread)
+        await run_step("mark all read again", mark_all_read, State.read,
+                       lambda id_, type_, status, created_at: status == State.unread)
+        await run_step("everything unread", bulk(status=State.unread), State.unread,
+                       lambda id_, type_, status, created_at: True)
+    finally:
+        await delete_seeded(
+            delete(models.PartnerNotification).where(models.PartnerNotification.recipient_id.in_(user_ids)),
+            delete(models.NotificationCounter).where(models.NotificationCounter.user_id.in_(user_ids)),
+            delete(models.User).where(models.User.id.in_(user_ids)),
+        )
+
+    return check.report("notification transitions")
+
+
+def test_notification_transitions():
+    assert run_check(check_notification_transitions)
+
+
+if __name__ == "__main__":
+    main(check_notification_transitions)
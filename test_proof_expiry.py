@@ -0,0 +1,117 @@
+"""
+Check of the pending-proof expiry sweep on a backlog larger than one batch.
+
+Seeds a few users with thousands of pending proofs past their verification
+window (plus some still inside it), then sweeps with a batch size that
+needs several chunks and one chunk holding more notifications than fit in
+a single INSERT's bind parameters. Checks every overdue proof is rejected
+exactly once, each uploader gets one notification per proof, the unread
+counters match, and a sweep blocked by the advisory lock does nothing.
+Seed rows are removed afterwards.
+"""
+from testkit import Checks, main, run_check  # Before app: selects the test database
+
+from sqlalchemy import text
+
+from app.db.session import SessionLocal, engine
+from app.services.proof_expiry import PROOF_EXPIRY_LOCK_ID, expire_pending_proofs
+
+N_USERS = 3
+N_EXPIRED = 6000
+N_PENDING = 50
+BATCH_SIZE = 4500  # Two chunks; the first alone is past the 32767-parameter cap
+
+SEED_SQL = [
+    f"""INSERT INTO users (id, email, username, auth_provider, is_active, created_at)
+        SELECT md5('px-u' || i)::uuid, 'px' || i || '@example.test', 'px_user_' || i, 'local', true, now()
+        FROM generate_series(1, {N_USERS}) i""",
+    f"""INSERT INTO goals (id, user_id, title, milestone_type, milestone_interval_days, start_date, deadline,
+                           privacy_setting, status, is_completed, created_at)
+        SELECT md5('px-g' || i)::uuid, md5('px-u' || i)::uuid, 'Expiry goal ' || i, 'flexible', 7,
+               current_date - 30, current_date + 60, 'friends', 'active', false, now()
+        FROM generate_series(1, {N_USERS}) i""",
+    f"""INSERT INTO proofs (id, goal_id, user_id, image_url, status, required_verifications,
+                            uploaded_at, verification_expires_at)
+        SELECT gen_random_uuid(), md5('px-g' || (j % {N_USERS} + 1))::uuid, md5('px-u' || (j % {N_USERS} + 1))::uuid,
+               'http://example.test/px' || j || '.png', 'pending', 2,
+               now() - interval '4 days', now() - (j || ' seconds')::interval
+        FROM generate_series(1, {N_EXPIRED}) j""",
+    f"""INSERT INTO proofs (id, goal_id, user_id, image_url, status, required_verifications,
+                            uploaded_at, verification_expires_at)
+        SELECT gen_random_uuid(), md5('px-g1')::uuid, md5('px-u1')::uuid,
+               'http://example.test/px-live' || j || '.png', 'pending', 2, now(), now() + interval '72 hours'
+        FROM generate_series(1, {N_PENDING}) j""",
+]
+
+USERS = f"(SELECT md5('px-u' || i)::uuid FROM generate_series(1, {N_USERS}) i)"
+
+CLEANUP_SQL = [
+    f"DELETE FROM partner_notifications WHERE recipient_id IN {USERS}",
+    f"DELETE FROM notification_counters WHERE user_id IN {USERS}",
+    f"DELETE FROM proofs WHERE user_id IN {USERS}",
+    f"DELETE FROM goals WHERE user_id IN {USERS}",
+    f"DELETE FROM users WHERE id IN {USERS}",
+]
+
+
+async def check_proof_expiry() -> bool:
+    check = Checks()
+
+    async def scalar(sql):
+        async with engine.connect() as conn:
+            return (await conn.execute(text(sql))).scalar()
+
+    try:
+        async with engine.begin() as conn:
+            for sql in CLEANUP_SQL + SEED_SQL:
+                await conn.execute(text(sql))
+
+        async with engine.connect() as other:
+            await other.execute(text(f"SELECT pg_advisory_lock({PROOF_EXPIRY_LOCK_ID})"))
+            async with SessionLocal() as db:
+                blocked = await expire_pending_proofs(db, batch_size=BATCH_SIZE)
+            await other.execute(text(f"SELECT pg_advisory_unlock({PROOF_EXPIRY_LOCK_ID})"))
+        check("sweep skipped while the lock is held", blocked == 0, f"{blocked} expired")
+
+        async with SessionLocal() as db:
+            expired = await expire_pending_proofs(db, batch_size=BATCH_SIZE)
+        check("whole backlog expired", expired == N_EXPIRED, f"{expired} of {N_EXPIRED}")
+
+        rejected = await scalar(f"SELECT count(*) FROM proofs WHERE user_id IN {USERS} AND status = 'rejected'")
+        pending = await scalar(f"SELECT count(*) FROM proofs WHERE user_id IN {USERS} AND status = 'pending'")
+        check("overdue proofs rejected", rejected == N_EXPIRED, f"{rejected} rejected")
+        check("proofs in their window kept", pending == N_PENDING, f"{pending} pending")
+
+        notified = await scalar(f"""
+            SELECT count(*) FROM partner_notifications n JOIN proofs p ON p.id = n.proof_id
+            WHERE n.type = 'proof_expired' AND n.recipient_id = p.user_id AND p.user_id IN {USERS}""")
+        distinct = await scalar(f"""
+            SELECT count(DISTINCT proof_id) FROM partner_notifications
+            WHERE type = 'proof_expired' AND recipient_id IN {USERS}""")
+        check("one notification per expired proof", notified == distinct == N_EXPIRED, f"{notified} notifications")
+
+        mismatched = await scalar(f"""
+            SELECT count(*) FROM users u
+            LEFT JOIN notification_counters c ON c.user_id = u.id
+            WHERE u.id IN {USERS} AND coalesce(c.unread_count, 0) <> (
+                SELECT count(*) FROM partner_notifications n
+                WHERE n.recipient_id = u.id AND n.status = 'unread')""")
+        check("unread counters match", mismatched == 0, f"{mismatched} users off")
+
+        async with SessionLocal() as db:
+            again = await expire_pending_proofs(db, batch_size=BATCH_SIZE)
+        check("second sweep finds nothing", again == 0, f"{again} expired")
+    finally:
+        async with engine.begin() as conn:
+            for sql in CLEANUP_SQL:
+                await conn.execute(text(sql))
+
+    return check.report("proof expiry")
+
+
+def test_proof_expiry():
+    assert run_check(check_proof_expiry)
+
+
+if __name__ == "__main__":
+    main(check_proof_expiry)
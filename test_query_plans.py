@@ -0,0 +1,201 @@
+"""
+EXPLAIN-based check that the hot API queries are served by indexes.
+
+Seeds a synthetic dataset inside a transaction that is rolled back at the end,
+ANALYZEs it, and fails if the plan of any hot query falls back to a
+sequential scan on one of the seeded tables.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from testkit import Checks, main, rolled_back, run_check  # Before app: selects the test database
+
+from sqlalchemy import select, update, cast, Date, text
+
+from app.api.pagination import keyset_paginate
+from app.db import models
+from app.services.friend_graph import friend_counts_query, friend_ids_query, friend_list_query, friendship_between
+from app.services.milestone_expiry import fail_overdue_chunk_stmt
+from app.services.notification import unread_count_query, unread_count_upsert
+from app.services.proof_feed import visible_proofs_query
+from app.services.user_search import user_search_query
+
+N_USERS = 5000
+N_GOALS = 20000
+N_PROOFS = 60000
+
+SEED_SQL = [
+    f"""INSERT INTO users (id, email, username, auth_provider, is_active, created_at)
+        SELECT md5('plan-u' || i)::uuid, 'plan' || i || '@example.test', 'plan_user_' || i, 'local', true, now()
+        FROM generate_series(0, {N_USERS - 1}) i""",
+    f"""INSERT INTO user_profiles (id, user_id, onboarding_completed)
+        SELECT gen_random_uuid(), md5('plan-u' || i)::uuid, true
+        FROM generate_series(0, {N_USERS - 1}) i""",
+    f"""INSERT INTO goals (id, user_id, title, milestone_type, milestone_interval_days, start_date, deadline,
+                           privacy_setting, status, is_completed, created_at)
+        SELECT md5('plan-g' || i)::uuid, md5('plan-u' || (i % {N_USERS}))::uuid, 'Goal ' || i, 'flexible', 7,
+               current_date - 30, current_date + 60,
+               (ARRAY['private', 'friends', 'select_friends'])[i % 3 + 1]::goalprivacy,
+               (ARRAY['active', 'active', 'active', 'archived'])[i % 4 + 1]::goalstatus,
+               false, now() - (i || ' minutes')::interval
+        FROM generate_series(0, {N_GOALS - 1}) i""",
+    f"""INSERT INTO milestones (id, goal_id, title, is_flexible, batch_number, order_index, due_date,
+                                completed, failed, progress)
+        SELECT md5('plan-m' || i)::uuid, md5('plan-g' || (i % {N_GOALS}))::uuid, 'Milestone ' || i, true, 1,
+               i / {N_GOALS}, current_date - 10 + (i / {N_GOALS}) * 7, false, false, 0
+        FROM generate_series(0, {N_GOALS * 3 - 1}) i""",
+    f"""INSERT INTO goal_allowed_viewers (goal_id, user_id, can_verify)
+        SELECT md5('plan-g' || i)::uuid, md5('plan-u' || ((i + 1) % {N_USERS}))::uuid, true
+        FROM generate_series(2, {N_GOALS - 1}, 3) i""",
+    f"""INSERT INTO proofs (id, goal_id, milestone_id, user_id, image_url, status, required_verifications,
+                            uploaded_at, verification_expires_at)
+        SELECT md5('plan-p' || i)::uuid, md5('plan-g' || (i % {N_GOALS}))::uuid,
+               md5('plan-m' || (i % {N_GOALS}))::uuid, md5('plan-u' || ((i % {N_GOALS}) % {N_USERS}))::uuid,
+               'http://example.test/' || i || '.png',
+               (ARRAY['pending', 'approved', 'approved', 'rejected', 'approved'])[i % 5 + 1]::proofstatus, 1,
+               now() - (i || ' minutes')::interval, now() - (i || ' minutes')::interval + interval '72 hours'
+        FROM generate_series(0, {N_PROOFS - 1}) i""",
+    f"""INSERT INTO proof_verifications (id, proof_id, verifier_id, approved, created_at)
+        SELECT gen_random_uuid(), md5('plan-p' || i)::uuid, md5('plan-u' || ((i * 7 + 1) % {N_USERS}))::uuid,
+               i % 4 <> 0, now() - (i || ' minutes')::interval
+        FROM generate_series(0, {N_PROOFS - 1}) i""",
+    f"""INSERT INTO friends (id, requester_id, addressee_id, status, created_at)
+        SELECT gen_random_uuid(), md5('plan-u' || i)::uuid, md5('plan-u' || ((i + d) % {N_USERS}))::uuid,
+               (CASE WHEN d = 5 THEN 'pending' ELSE 'accepted' END)::friendstatus, now()
+        FROM generate_series(0, {N_USERS - 1}) i, generate_series(1, 5) d""",
+    f"""INSERT INTO partner_notifications (id, recipient_id, actor_id, type, goal_id, message, status, created_at)
+        SELECT gen_random_uuid(), md5('plan-u' || (i % {N_USERS}))::uuid,
+               md5('plan-u' || ((i + 1) % {N_USERS}))::uuid, 'proof_submission',
+               md5('plan-g' || (i % {N_GOALS}))::uuid, 'Notification ' || i,
+               (ARRAY['unread', 'read', 'read', 'archived'])[i % 4 + 1]::notificationstate,
+               now() - (i || ' seconds')::interval
+        FROM generate_series(0, 200000 - 1) i""",
+    f"""INSERT INTO notification_counters (user_id, unread_count)
+        SELECT md5('plan-u' || i)::uuid, 10
+        FROM generate_series(0, {N_USERS - 1}) i""",
+    f"""INSERT INTO daily_tasks (id, user_id, title, completed, created_at)
+        SELECT gen_random_uuid(), md5('plan-u' || (i % {N_USERS}))::uuid, 'Task ' || i, false,
+               now() - ((i / {N_USERS}) || ' days')::interval
+        FROM generate_series(0, 100000 - 1) i""",
+    f"""INSERT INTO interval_change_requests (id, goal_id, requester_id, current_interval, requested_interval,
+                                              status, created_at)
+        SELECT gen_random_uuid(), md5('plan-g' || i)::uuid, md5('plan-u' || (i % {N_USERS}))::uuid, 7, 14,
+               CASE WHEN i % 10 = 0 THEN 'pending' ELSE 'approved' END, now()
+        FROM generate_series(0, {N_GOALS - 1}) i""",
+]
+
+# Queries served by an index that needs an extension (pg_trgm); skipped
+# where the migration creating the index could not run
+REQUIRED_INDEXES = {
+    "users: search": "ix_users_email_trgm",
+    "users: search (short prefix)": "ix_users_email_trgm",
+}
+
+SEEDED_TABLES = [
+    "users", "user_profiles", "goals", "milestones", "goal_allowed_viewers", "proofs",
+    "proof_verifications", "friends", "partner_notifications", "notification_counters", "daily_tasks",
+    "interval_change_requests",
+]
+
+
+def hot_queries(user_id, other_id, goal_ids, proof_ids):
+    """The WHERE/ORDER BY shapes issued by the busiest endpoints in app/api."""
+    now = datetime.now(timezone.utc)
+    today = date.today()
+    Proof, Friend, Notification = models.Proof, models.Friend, models.PartnerNotification
+
+    def feed(scope):
+        return keyset_paginate(visible_proofs_query(user_id, scope), Proof.uploaded_at, Proof.id, 50)
+
+    def search(term):
+        stmt = user_search_query(user_id, term)
+        return keyset_paginate(stmt, stmt.selected_columns.rank, models.User.id, 10)
+
+    return {
+        "proofs: feed (all)": feed("all"),
+        "proofs: feed (to_verify)": feed("to_verify"),
+        "proofs: feed (mine)": feed("mine"),
+        "proofs: builder verifications": select(models.ProofVerification).where(
+            models.ProofVerification.proof_id.in_(proof_ids)),
+        "proofs: already verified check": select(models.ProofVerification).where(
+            models.ProofVerification.proof_id == proof_ids[0],
+            models.ProofVerification.verifier_id == user_id),
+        "proofs: expiry sweep": select(Proof.id).where(
+            Proof.status == models.ProofStatus.pending, Proof.verification_expires_at < now
+        ).order_by(Proof.verification_expires_at).limit(500),
+        "friends: friend set": friend_ids_query(user_id),
+        "friends: pair lookup": select(Friend).where(friendship_between(user_id, other_id)),
+        "friends: list": keyset_paginate(friend_list_query(user_id), Friend.created_at, Friend.id, 50),
+        "friends: list pending received": keyset_paginate(
+            friend_list_query(user_id, "pending_received"), Friend.created_at, Friend.id, 50),
+        "friends: counts": friend_counts_query(user_id),
+        "notifications: list": keyset_paginate(select(Notification).where(
+            Notification.recipient_id == user_id), Notification.created_at, Notification.id, 50),
+        "notifications: list unread": keyset_paginate(select(Notification).where(
+            Notification.recipient_id == user_id,
+            Notification.status == models.NotificationState.unread), Notification.created_at, Notification.id, 50),
+        "notifications: unread count": unread_count_query(user_id),
+        "notifications: unread counter upsert": unread_count_upsert(
+            [dict(user_id=user_id, unread_count=1), dict(user_id=other_id, unread_count=1)]),
+        "notifications: mark all read": update(Notification).where(
+            Notification.recipient_id == user_id,
+            Notification.status == models.NotificationState.unread).values(status=models.NotificationState.read),
+        "goals: list": select(models.Goal).where(
+            models.Goal.user_id == user_id,
+            models.Goal.status != models.GoalStatus.archived).order_by(models.Goal.created_at.desc()),
+        "milestones: by goals": select(models.Milestone).where(models.Milestone.goal_id.in_(goal_ids)),
+        "milestones: overdue sweep": fail_overdue_chunk_stmt(500),
+        "daily tasks: today": select(models.DailyTask).where(
+            models.DailyTask.user_id == user_id,
+            models.DailyTask.created_at >= cast(today, Date),
+            models.DailyTask.created_at < cast(today + timedelta(days=1), Date)),
+        "allowed viewers: by user": select(models.GoalAllowedViewer.goal_id).where(
+            models.GoalAllowedViewer.user_id == user_id, models.GoalAllowedViewer.can_verify == True),
+        "interval changes: pending for goals": select(models.IntervalChangeRequest).where(
+            models.IntervalChangeRequest.goal_id.in_(goal_ids),
+            models.IntervalChangeRequest.status == "pending"),
+        "users: profile": select(models.UserProfile).where(models.UserProfile.user_id == user_id),
+        "users: search": search("user_4"),
+        "users: search (short prefix)": search("pl"),
+    }
+
+
+def seq_scans(plan_node, tables):
+    """Yield relation names of Seq Scan nodes over the given tables."""
+    if plan_node.get("Node Type") == "Seq Scan" and plan_node.get("Relation Name") in tables:
+        yield plan_node["Relation Name"]
+    for child in plan_node.get("Plans", []):
+        yield from seq_scans(child, tables)
+
+
+async def check_query_plans() -> bool:
+    check = Checks()
+    async with rolled_back(SEED_SQL) as (conn, _):
+        for table in SEEDED_TABLES:
+            await conn.execute(text(f"ANALYZE {table}"))
+
+        user_id = (await conn.execute(text("SELECT md5('plan-u42')::uuid"))).scalar()
+        other_id = (await conn.execute(text("SELECT md5('plan-u43')::uuid"))).scalar()
+        goal_ids = (await conn.execute(
+            select(models.Goal.id).where(models.Goal.user_id == user_id))).scalars().all()
+        proof_ids = (await conn.execute(
+            select(models.Proof.id).where(models.Proof.user_id == user_id).limit(50))).scalars().all()
+
+        for name, stmt in hot_queries(user_id, other_id, goal_ids, proof_ids).items():
+            index = REQUIRED_INDEXES.get(name)
+            if index and (await conn.execute(text(f"SELECT to_regclass('{index}')"))).scalar() is None:
+                print(f"⏭️  {name}: skipped, {index} does not exist")
+                continue
+            sql = stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+            plan = (await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar()
+            scanned = sorted(set(seq_scans(plan[0]["Plan"], SEEDED_TABLES)))
+            check(name, not scanned, f"Seq Scan on {', '.join(scanned)}" if scanned else "")
+
+    return check.report("All hot queries are index-backed")
+
+
+def test_query_plans():
+    assert run_check(check_query_plans)
+
+
+if __name__ == "__main__":
+    main(check_query_plans)
@@ -0,0 +1,78 @@
+"""
+Check that a read endpoint cannot deadlock a one-connection pool.
+
+Serves GET /api/v1/friends/counts (get_read_db, no replica configured) from
+an engine with pool_size=1 and no overflow, with the auth cache cleared so
+get_current_user queries the users table on the request's get_db session.
+Several concurrent requests must all succeed without a pool timeout: the
+read reuses that session instead of waiting for a second connection. Seed
+rows are removed afterwards.
+"""
+import asyncio
+
+from testkit import Checks, delete_seeded, main, new_users, run_check  # Before app: selects the test database
+
+import httpx
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.api import deps
+from app.core import security
+from app.core.config import settings
+from app.db import models
+from app.db.session import SessionLocal, build_engine, pool_timeouts
+from app.main import app
+from app.services.auth_cache import auth_cache
+
+REQUESTS = 5
+POOL_TIMEOUT_SECONDS = 3
+
+
+async def check_read_pool() -> bool:
+    check = Checks()
+    users = new_users("readpool", REQUESTS)
+    async with SessionLocal() as db:
+        db.add_all(users)
+        await db.commit()
+    tokens = [security.create_access_token(str(user.id)) for user in users]
+
+    pool_timeout, settings.DB_POOL_TIMEOUT = settings.DB_POOL_TIMEOUT, POOL_TIMEOUT_SECONDS
+    small_engine = build_engine(pool_size=1, max_overflow=0)
+    settings.DB_POOL_TIMEOUT = pool_timeout
+    small_session = sessionmaker(small_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_db():
+        async with small_session() as session:
+            yield session
+
+    app.dependency_overrides[deps.get_db] = get_db
+    auth_cache.clear()
+    timeouts = pool_timeouts.value
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+            responses = await asyncio.gather(*(
+                client.get("/api/v1/friends/counts", headers={"Authorization": f"Bearer {token}"})
+                for token in tokens
+            ), return_exceptions=True)
+        statuses = [getattr(r, "status_code", type(r).__name__) for r in responses]
+        check("cold-cache reads succeed on a one-connection pool",
+              all(s == 200 for s in statuses), f"statuses {statuses}")
+        check("no checkout timed out", pool_timeouts.value == timeouts,
+              f"{pool_timeouts.value - timeouts} timeouts")
+    finally:
+        app.dependency_overrides.pop(deps.get_db, None)
+        auth_cache.clear()
+        await small_engine.dispose()
+        await delete_seeded(delete(models.User).where(models.User.id.in_([user.id for user in users])))
+
+    return check.report("read endpoints hold one primary connection")
+
+
+def test_read_pool():
+    assert run_check(check_read_pool)
+
+
+if __name__ == "__main__":
+    main(check_read_pool)
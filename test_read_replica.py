@@ -0,0 +1,113 @@
+"""
+Check of read-replica routing with the replica and the primary on the same
+Postgres (READ_REPLICA_URL is the test database here).
+
+- a caught-up replica serves get_read_db sessions, which are read-only
+- a replica behind READ_REPLICA_MAX_LAG_SECONDS falls back to the primary,
+  through the request's own get_db session
+- an unreachable replica falls back to the primary
+- friend sets read through the replica are never cached, so an invalidation
+  is not undone by a replica that has not caught up with it
+"""
+import uuid
+from contextlib import asynccontextmanager
+
+from testkit import Checks, main, run_check  # Before app: selects the test database
+
+from app.core.config import settings
+
+settings.READ_REPLICA_URL = settings.DATABASE_URL
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.api import deps
+from app.db import session
+from app.db.session import ReplicaMonitor, build_engine
+from app.services.friend_graph import friend_graph, invalidate_friendship
+
+
+@asynccontextmanager
+async def read_session():
+    """(session deps.get_read_db would hand to an endpoint, the request's get_db session)."""
+    async with session.SessionLocal() as request_db:
+        dependency = deps.get_read_db(request_db)
+        try:
+            yield await dependency.__anext__(), request_db
+        finally:
+            await dependency.aclose()
+
+
+async def check_read_replica() -> bool:
+    check = Checks()
+
+    # app.db.session sets up the replica at import; another test in the same
+    # process may have imported it before READ_REPLICA_URL was set
+    configured_here = session.read_engine is None
+    if configured_here:
+        session.read_engine = build_engine(settings.READ_REPLICA_URL, name="replica")
+        session.replica_monitor = ReplicaMonitor(session.read_engine)
+        session.ReplicaSessionLocal = sessionmaker(
+            session.read_engine.execution_options(postgresql_readonly=True),
+            class_=AsyncSession, expire_on_commit=False, info={"replica": True}
+        )
+
+    # Caught up: reads go to the replica engine in READ ONLY transactions
+    async with read_session() as (db, _):
+        check("replica serves reads", db.bind.pool is session.read_engine.pool)
+        check("read session is read-only",
+              (await db.execute(text("SHOW transaction_read_only"))).scalar() == "on")
+        try:
+            await db.execute(text("CREATE TEMP TABLE replica_write_check (id int)"))
+            check("writes through a read session fail", False)
+        except Exception:
+            check("writes through a read session fail", True)
+
+    # Lagging: a negative threshold makes any lag too much
+    max_lag, settings.READ_REPLICA_MAX_LAG_SECONDS = settings.READ_REPLICA_MAX_LAG_SECONDS, -1
+    session.replica_monitor._checked_at = float("-inf")
+    fallbacks = session.replica_fallbacks.value
+    async with read_session() as (db, request_db):
+        check("lagging replica falls back to the primary", db.bind.pool is session.engine.pool)
+        check("fallback reuses the request's session", db is request_db)
+        check("fallback is counted", session.replica_fallbacks.value == fallbacks + 1)
+    settings.READ_REPLICA_MAX_LAG_SECONDS = max_lag
+
+    # Unreachable: nothing listens on port 1
+    down_engine = build_engine(make_url(settings.DATABASE_URL).set(host="127.0.0.1", port=1, query={})
+                               .render_as_string(hide_password=False))
+    check("unreachable replica is not used", not await ReplicaMonitor(down_engine).is_usable())
+    await down_engine.dispose()
+
+    # Invalidation then a replica read: the set may predate the change, so it
+    # is returned uncached and the next primary read loads it again
+    user_id = uuid.uuid4()
+    async with session.SessionLocal() as db:
+        await friend_graph.friends_of(db, user_id)
+    check("primary read is cached", user_id in friend_graph._entries)
+    invalidate_friendship(user_id)
+    session.replica_monitor._checked_at = float("-inf")
+    async with read_session() as (db, _):
+        check("replica serves the friend read", db.bind.pool is session.read_engine.pool)
+        await friend_graph.friends_of(db, user_id)
+    check("replica read after invalidation is not cached", user_id not in friend_graph._entries)
+    async with session.SessionLocal() as db:
+        await friend_graph.friends_of(db, user_id)
+    check("next primary read is cached", user_id in friend_graph._entries)
+    invalidate_friendship(user_id)
+
+    await session.read_engine.dispose()
+    if configured_here:
+        session.read_engine = session.replica_monitor = session.ReplicaSessionLocal = None
+
+    return check.report("read replica routing")
+
+
+def test_read_replica():
+    assert run_check(check_read_replica)
+
+
+if __name__ == "__main__":
+    main(check_read_replica)
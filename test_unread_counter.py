@@ -0,0 +1,116 @@
+"""
+Check of the per-user unread notification counter (notification_counters).
+
+Seeds a recipient with unread and read notifications through
+insert_notifications, then moves single notifications between states with
+the PATCH endpoint (including no-op and repeated changes) and checks after
+every step that the counter, and GET /notifications/unread-count, equal
+COUNT(*) of the user's unread notifications. Also checks that
+adjust_unread_count never takes a counter below zero. Seed rows are removed
+afterwards.
+"""
+from testkit import Checks, delete_seeded, main, new_users, run_check  # Before app: selects the test database
+
+from sqlalchemy import delete, func, select
+
+from app.api.notifications import NotificationUpdateStatus, get_unread_notification_count, update_notification
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.notification import adjust_unread_count, get_unread_count, insert_notifications
+
+
+async def check_unread_counter() -> bool:
+    check = Checks()
+    users = new_users("counter", 3)
+    recipient, actor, empty = users
+    user_ids = [user.id for user in users]
+
+    async def counts(user):
+        """(counter, unread rows, unread-count endpoint) for user."""
+        async with SessionLocal() as db:
+            counter = await get_unread_count(db, user.id)
+            unread = (await db.execute(select(func.count()).select_from(models.PartnerNotification).where(
+                models.PartnerNotification.recipient_id == user.id,
+                models.PartnerNotification.status == models.NotificationState.unread,
+            ))).scalar()
+            endpoint = (await get_unread_notification_count(db=db, current_user=user))["unread_count"]
+        return counter, unread, endpoint
+
+    async def check_consistent(name, expected):
+        counter, unread, endpoint = await counts(recipient)
+        check(name, counter == unread == endpoint == expected,
+              f"counter {counter}, unread rows {unread}, endpoint {endpoint}")
+
+    async def patch(notification_id, status):
+        async with SessionLocal() as db:
+            await update_notification(notification_id, NotificationUpdateStatus(status=status), db, recipient)
+
+    try:
+        async with SessionLocal() as db:
+            db.add_all(users)
+            await db.commit()
+
+        async with SessionLocal() as db:
+            await insert_notifications(db, [
+                dict(recipient_id=recipient.id, actor_id=actor.id, type=models.NotificationType.proof_submission,
+                     message=f"Proof {i}", **({"status": models.NotificationState.read} if i == 0 else {}))
+                for i in range(6)
+            ])
+            await db.commit()
+        await check_consistent("insert counts unread rows only", 5)
+
+        async with SessionLocal() as db:
+            await insert_notifications(db, [
+                dict(recipient_id=recipient.id, actor_id=actor.id, type=models.NotificationType.proof_submission,
+                     message="Another proof")
+            ])
+            await db.commit()
+        await check_consistent("insert adds to an existing counter", 6)
+
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(models.PartnerNotification.message, models.PartnerNotification.id)
+                .where(models.PartnerNotification.recipient_id == recipient.id)
+            )
+            ids = dict(result.all())
+        first, second = ids["Proof 1"], ids["Proof 2"]  # Both unread
+
+        await patch(first, "read")
+        await check_consistent("PATCH unread -> read", 5)
+        await patch(first, "read")
+        await check_consistent("PATCH read -> read", 5)
+        await patch(first, "unread")
+        await check_consistent("PATCH read -> unread", 6)
+        await patch(first, "archived")
+        await check_consistent("PATCH unread -> archived", 5)
+        await patch(first, "read")
+        await check_consistent("PATCH archived -> read", 5)
+        await patch(second, "unread")
+        await check_consistent("PATCH unread -> unread", 5)
+
+        async with SessionLocal() as db:
+            await adjust_unread_count(db, empty.id, -3)
+            await db.commit()
+            no_row = await get_unread_count(db, empty.id)
+            await adjust_unread_count(db, empty.id, 2)
+            await adjust_unread_count(db, empty.id, -5)
+            await db.commit()
+            floored = await get_unread_count(db, empty.id)
+        check("decrement without a counter row", no_row == 0, f"{no_row}")
+        check("counter never below zero", floored == 0, f"{floored}")
+    finally:
+        await delete_seeded(
+            delete(models.PartnerNotification).where(models.PartnerNotification.recipient_id.in_(user_ids)),
+            delete(models.NotificationCounter).where(models.NotificationCounter.user_id.in_(user_ids)),
+            delete(models.User).where(models.User.id.in_(user_ids)),
+        )
+
+    return check.report("unread counter")
+
+
+def test_unread_counter():
+    assert run_check(check_unread_counter)
+
+
+if __name__ == "__main__":
+    main(check_unread_counter)
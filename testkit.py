@@ -0,0 +1,132 @@
+"""
+Shared plumbing for the test_*.py checks.
+
+Importing this module points the app at a dedicated test database before
+anything connects: TEST_DATABASE_URL if set, else DATABASE_URL with "_test"
+appended to the database name; it refuses any database whose name does not
+end in "_test", and configures no read replica. Create and migrate the test
+database once:
+
+    createdb <name>_test
+    DATABASE_URL=postgresql+asyncpg://.../<name>_test alembic upgrade head
+
+conftest.py imports it for pytest; every test_*.py imports it before any
+app module so it also holds when a check is run as a script.
+"""
+import asyncio
+import os
+import sys
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from typing import Awaitable, Callable, List
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+
+def _test_database_url() -> str:
+    """TEST_DATABASE_URL, else DATABASE_URL with "_test" appended to the database name."""
+    url = make_url(os.environ.get("TEST_DATABASE_URL") or settings.DATABASE_URL)
+    if "TEST_DATABASE_URL" not in os.environ and not url.database.endswith("_test"):
+        url = url.set(database=f"{url.database}_test")
+    if not url.database.endswith("_test"):
+        raise RuntimeError(f"Refusing to run checks against {url.database!r}: test databases end in _test")
+    return url.render_as_string(hide_password=False)
+
+
+TEST_DATABASE_URL = _test_database_url()
+# Environment too, so anything that re-reads settings agrees
+os.environ["DATABASE_URL"] = settings.DATABASE_URL = TEST_DATABASE_URL
+os.environ.pop("READ_REPLICA_URL", None)
+settings.READ_REPLICA_URL = None
+
+from sqlalchemy import event, text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+
+from app.db import models  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+
+
+class Checks:
+    """Named pass/fail checks, printed as they run; report() gives the verdict."""
+
+    def __init__(self):
+        self.failures: List[str] = []
+
+    def __call__(self, name: str, ok: bool, detail: str = "") -> None:
+        print(f"{'✅' if ok else '❌'} {name}{f': {detail}' if detail else ''}")
+        if not ok:
+            self.failures.append(name)
+
+    def report(self, title: str) -> bool:
+        print(f"PASSED: {title}" if not self.failures else f"FAILED: {len(self.failures)} check(s)")
+        return not self.failures
+
+
+def new_users(prefix: str, count: int) -> List[models.User]:
+    """count unsaved users with unique emails and usernames starting with prefix."""
+    run = uuid.uuid4().hex[:8]
+    return [
+        models.User(id=uuid.uuid4(), email=f"{prefix}_{run}_{i}@example.com", username=f"{prefix}_{run}_{i}")
+        for i in range(count)
+    ]
+
+
+async def delete_seeded(*statements) -> None:
+    """Run cleanup DELETEs (children first) in one transaction."""
+    async with SessionLocal() as db:
+        for statement in statements:
+            await db.execute(statement)
+        await db.commit()
+
+
+@contextmanager
+def count_queries():
+    """Collect the SQL statements the engine issues inside the block."""
+    statements: List[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+@asynccontextmanager
+async def rolled_back(seed_sql=()):
+    """
+    (connection, session) inside one transaction that is rolled back on exit,
+    after running seed_sql on it. Commits through the session only release
+    savepoints, so nothing the check does is kept.
+    """
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            for sql in seed_sql:
+                await conn.execute(text(sql))
+            db = AsyncSession(bind=conn, join_transaction_mode="create_savepoint")
+            try:
+                yield conn, db
+            finally:
+                await db.close()
+        finally:
+            await trans.rollback()
+
+
+def run_check(check: Callable[[], Awaitable[bool]]) -> bool:
+    """Run an async check in a fresh event loop, disposing the pool afterwards."""
+    async def run() -> bool:
+        try:
+            return await check()
+        finally:
+            await engine.dispose()
+    return asyncio.run(run())
+
+
+def main(check: Callable[[], Awaitable[bool]]) -> None:
+    """Script entry point: exit 0 if the check passed, else 1."""
+    sys.exit(0 if run_check(check) else 1)